@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket
 from backend.app.database.mongo import get_db
-from backend.app.auth.utils import get_current_user
+from backend.app.database.loaders import get_loaders
+from backend.app.auth.utils import get_current_user, get_user_from_token
+from backend.app.dashboard.live import live_feed, ADMIN_TOPICS
+from backend.app.utils import rollups
 from typing import Optional, List
 from datetime import datetime, timedelta
 
@@ -95,53 +98,8 @@ async def get_system_stats(
     if not current_user or not current_user.get("is_admin", False):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
-    now = datetime.utcnow()
-    last_24h = now - timedelta(hours=24)
-    last_7d = now - timedelta(days=7)
-    
-    # Total Users
-    total_users = await db.users.count_documents({})
-    
-    # Transaction Stats
-    total_tx = await db.payments.count_documents({})
-    completed_tx = await db.payments.count_documents({"payment_status": "completed"})
-    failed_tx = await db.payments.count_documents({"payment_status": "failed"})
-    
-    # High-Value Transactions (>= ₹20k)
-    high_value_tx = await db.payments.count_documents({"amount": {"$gte": 20000}, "payment_status": "completed"})
-    
-    # Biometric Stats
-    biometric_success = await db.audit_logs.count_documents({"event_type": "biometric_auth", "status": "VERIFIED"})
-    biometric_fail = await db.audit_logs.count_documents({"event_type": "biometric_auth", "status": "REJECTED"})
-    total_bio = biometric_success + biometric_fail
-    
-    # MFA Distribution
-    # Palm-Only (< 2k), Palm+PIN (2k-10k), Palm+OTP (> 10k)
-    palm_only = await db.payments.count_documents({"amount": {"$lt": 2000}, "payment_status": "completed"})
-    palm_pin = await db.payments.count_documents({"amount": {"$gte": 2000, "$lte": 10000}, "payment_status": "completed"})
-    palm_otp = await db.payments.count_documents({"amount": {"$gt": 10000}, "payment_status": "completed"})
+    return await rollups.admin_stats(db)
 
-    # Recent Incidents (Status: REJECTED or FAILED) - Last 24h
-    recent_incidents = await db.audit_logs.count_documents({
-        "status": {"$in": ["REJECTED", "FAILED"]},
-        "timestamp": {"$gte": last_24h}
-    })
-    
-    return {
-        "total_users": total_users,
-        "total_transactions": total_tx,
-        "completed_payments": completed_tx,
-        "failed_payments": failed_tx,
-        "high_value_transactions": high_value_tx,
-        "biometric_accuracy": round((biometric_success / total_bio * 100), 1) if total_bio > 0 else 0,
-        "biometric_attempts": total_bio,
-        "recent_incidents": recent_incidents,
-        "mfa_distribution": {
-            "palm_only": palm_only,
-            "palm_pin": palm_pin,
-            "palm_otp": palm_otp
-        }
-    }
 @router.get("/health")
 async def get_system_health(
     current_user = Depends(get_current_user),
@@ -164,7 +122,8 @@ async def get_system_health(
 @router.get("/users")
 async def get_all_users(
     current_user = Depends(get_current_user),
-    db = Depends(get_db)
+    db = Depends(get_db),
+    loaders = Depends(get_loaders)
 ):
     """
     List all registered users with enrollment status.
@@ -174,10 +133,12 @@ async def get_all_users(
     
     users = await db.users.find({}, {"password_hash": 0, "hashed_pin": 0}).to_list(length=100)
     
-    # Check enrollment
+    # Check enrollment: one query for all listed users
     for user in users:
         user["_id"] = str(user["_id"])
-        bio = await db.biometrics.find_one({"user_id": user["_id"]})
+    enrollments = await loaders.enrollments.load_many(user["_id"] for user in users)
+    for user in users:
+        bio = enrollments.get(user["_id"])
         user["is_enrolled"] = bio is not None
         user["hand_type"] = bio.get("hand_type") if bio else "N/A"
         
@@ -203,3 +164,15 @@ async def get_system_alerts(
         alert["_id"] = str(alert["_id"])
         
     return alerts
+
+@router.websocket("/live")
+async def admin_live(websocket: WebSocket, token: str = Query(None), db = Depends(get_db)):
+    """
+    Live system stats and security alerts (see dashboard/live.py).
+    Auth: the JWT is passed as ?token=; the user must be an admin.
+    """
+    current_user = await get_user_from_token(token, db) if token else None
+    if not current_user or not current_user.get("is_admin", False):
+        await websocket.close(code=1008)
+        return
+    await live_feed.serve(websocket, db, ADMIN_TOPICS)
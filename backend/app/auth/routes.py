@@ -3,16 +3,17 @@ from fastapi.security import OAuth2PasswordRequestForm
 from backend.app.database.mongo import get_db
 from backend.app.models.user_model import UserCreate, UserResponse, UserInDB
 from backend.app.utils.security import get_password_hash, verify_password, create_access_token, encrypt_template
-from backend.app.biometric.hand_detector import HandDetector
-from backend.app.biometric.feature_extractor import FeatureExtractor
-import numpy as np
-import cv2
+from backend.app.biometric.enrollment import run_enrollment, ENROLLMENT_MIN_SAMPLES
+from backend.app.biometric.template import CNN_STORAGE_DTYPE
+from backend.app.biometric.template_cache import template_cache, template_version
+from backend.app.biometric.index import palm_index
+from backend.app.utils.logger import get_logger
+from backend.app.utils import rollups, events
 from bson import ObjectId
 from datetime import datetime
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-detector = HandDetector(mode=True)
-extractor = FeatureExtractor() # Initialize global instance (loads model)
+log = get_logger(__name__)
 
 @router.post("/secure-register")
 async def secure_register(
@@ -24,66 +25,40 @@ async def secure_register(
     db = Depends(get_db)
 ):
     try:
-        print(f"DEBUG: secure_register called for {email}. Images received: {len(images)}")
+        log.debug("secure_register called", email=email, images=len(images))
         
         # 1. Check if user exists
         existing_user = await db.users.find_one({"email": email})
         if existing_user:
-            print(f"DEBUG: Email {email} already exists.")
+            log.debug("Email already registered", email=email)
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # 2. Extract Biometric Features FIRST (Validate before creating user)
-        if len(images) < 5:
-            print(f"DEBUG: Insufficient images. Got {len(images)}, need 5.")
+        if len(images) < ENROLLMENT_MIN_SAMPLES:
+            log.debug("Insufficient enrollment images", received=len(images), required=ENROLLMENT_MIN_SAMPLES)
             raise HTTPException(status_code=400, detail="Minimum 5 hand images required for high-security enrollment")
             
-        feature_vectors = []
-        cnn_feature_vectors = []
-        hand_types = [] 
-        for i, image in enumerate(images):
-            contents = await image.read()
-            nparr = np.frombuffer(contents, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None: 
-                print(f"DEBUG: Image {i} failed to decode.")
-                continue
+        contents_list = [await image.read() for image in images]
+        enrollment = await run_enrollment(contents_list)
 
-            # Quality Check
-            is_good, issues = detector.check_image_quality(img)
-            if not is_good:
-                print(f"DEBUG: Image {i} rejected due to quality: {issues}")
-                continue
-            
-            detector.find_hands(img)
-            landmarks, h_type = detector.find_position(img) 
-            
-            if landmarks and h_type: 
-                # Geometric Features
-                features = FeatureExtractor.extract_features(landmarks)
-                
-                # CNN Features (Deep Feature Extraction)
-                cnn_feat = extractor.extract_cnn_features(img)
-                
-                if features and cnn_feat:
-                    feature_vectors.append(features)
-                    cnn_feature_vectors.append(cnn_feat)
-                    hand_types.append(h_type)
-                    print(f"DEBUG: Image {i} -> OK ({h_type}) | CNN: {len(cnn_feat)} dims")
-                else:
-                    print(f"DEBUG: Image {i} -> Feature extraction failed.")
-            else:
-                print(f"DEBUG: Image {i} -> No hand/landmarks detected.")
-                
-        print(f"DEBUG: Final samples: {len(feature_vectors)}. Hand Types: {hand_types}")
+        for r in enrollment.rejections:
+            log.debug("Enrollment image rejected", index=r["index"], reason=r["reason"], issues=r["issues"])
+        log.debug("Enrollment samples collected", accepted=enrollment.accepted, hand_types=enrollment.hand_types)
         
-        if len(feature_vectors) < 5:
-            # Get specific counts for why it failed
-            raise HTTPException(status_code=422, detail=f"Extracted {len(feature_vectors)}/5 samples. Please ensure your hand is fully visible, fingers are spread, and lighting is good.")
+        if enrollment.accepted < ENROLLMENT_MIN_SAMPLES:
+            # Report exactly which frames failed and why
+            raise HTTPException(status_code=422, detail={
+                "message": f"Extracted {enrollment.accepted}/{ENROLLMENT_MIN_SAMPLES} samples. Please ensure your hand is fully visible, fingers are spread, and lighting is good.",
+                "rejections": enrollment.rejections
+            })
+
+        feature_vectors = enrollment.feature_vectors
+        cnn_feature_vectors = enrollment.cnn_vectors
+        hand_types = enrollment.hand_types
 
         # Ensure all samples are of the same hand type
         if len(set(hand_types)) > 1:
-            print(f"DEBUG: Inconsistent hand types: {set(hand_types)}")
+            log.debug("Inconsistent hand types", hand_types=sorted(set(hand_types)))
             raise HTTPException(status_code=400, detail="Inconsistent hand types detected. Please use ONLY one hand (Left or Right) for all 5 samples.")
 
         # 3. Create User
@@ -96,23 +71,32 @@ async def secure_register(
         }
         
         result = await db.users.insert_one(user_dict)
+        await rollups.record_user(db, user_dict["created_at"])
+        events.publish("user", {"user_id": str(result.inserted_id)})
         user_id = str(result.inserted_id)
         
         # 4. Store Biometrics linked to this User ID
+        created_at = datetime.utcnow()
         await db.biometrics.insert_one({
             "user_id": user_id,
             "feature_vectors": encrypt_template(feature_vectors), # AES-256 Encrypted
-            "cnn_features": encrypt_template(cnn_feature_vectors), # AES-256 Encrypted
+            "cnn_features": encrypt_template(cnn_feature_vectors, CNN_STORAGE_DTYPE), # AES-256 Encrypted
             "hand_type": hand_types[0],
-            "created_at": datetime.utcnow()
+            "cnn_preprocess": enrollment.cnn_preprocess,
+            "created_at": created_at,
+            "updated_at": created_at
         })
+        template = enrollment.compile()
+        version = template_version({"updated_at": created_at})
+        template_cache.put(user_id, version, template)
+        palm_index.upsert(user_id, version, template)
         
         return {"message": "User and biometrics registered successfully", "user_id": user_id}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Secure Registration Error: {str(e)}")
+        log.exception("Secure registration failed", email=email)
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @router.post("/register", response_model=UserResponse)
@@ -131,10 +115,12 @@ async def register(user_in: UserCreate, db = Depends(get_db)):
         user_dict["created_at"] = datetime.utcnow()
         
         result = await db.users.insert_one(user_dict)
+        await rollups.record_user(db, user_dict["created_at"])
+        events.publish("user", {"user_id": str(result.inserted_id)})
         user_dict["id"] = str(result.inserted_id)
         return user_dict
     except Exception as e:
-        print(f"Registration Error: {str(e)}")
+        log.exception("Registration failed", email=user_in.email)
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @router.post("/login")
@@ -1,27 +1,54 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Header, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 import os
+import hmac
 from backend.app.database.mongo import get_db
 from backend.app.utils.security import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Shared secret for unattended "pay by palm" terminals; identification is disabled when unset
+TERMINAL_API_KEY = os.getenv("TERMINAL_API_KEY")
+# Bearer token the Prometheus scraper sends to /metrics; the endpoint is disabled when unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+async def get_user_from_token(token, db):
+    """Resolve a JWT to its user document, or None (also used by WebSocket endpoints)."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            return None
     except JWTError:
-        raise credentials_exception
+        return None
     
-    user = await db.users.find_one({"email": email})
+    return await db.users.find_one({"email": email})
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user = await get_user_from_token(token, db)
     if user is None:
         raise credentials_exception
     return user
+
+async def verify_terminal_key(x_terminal_key: str = Header(None)):
+    """Authenticate a payment terminal by its X-Terminal-Key header."""
+    if not TERMINAL_API_KEY:
+        raise HTTPException(status_code=503, detail="Palm identification is not enabled on this server")
+    if not x_terminal_key or not hmac.compare_digest(x_terminal_key.encode(), TERMINAL_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid terminal key")
+    return True
+
+async def verify_metrics_token(authorization: str = Header(None)):
+    """Authenticate the metrics scraper by its "Authorization: Bearer <METRICS_TOKEN>" header."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return True
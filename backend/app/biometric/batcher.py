@@ -0,0 +1,111 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from backend.app.biometric import registry
+from backend.app.biometric.executor import run_inference
+from backend.app.utils.metrics import stage
+
+load_dotenv()
+
+# Requests arriving within CNN_BATCH_MAX_WAIT_MS of the first one share a
+# single MobileNetV2 forward pass, up to CNN_BATCH_MAX_SIZE frames.
+CNN_BATCH_MAX_SIZE = int(os.getenv("CNN_BATCH_MAX_SIZE", 8))
+CNN_BATCH_MAX_WAIT_MS = float(os.getenv("CNN_BATCH_MAX_WAIT_MS", 5))
+
+class CNNBatcher:
+    """
+    In-process dynamic micro-batcher for CNN embeddings.
+    Callers await embed(img, landmarks) and get back their own 1280-D vector.
+    """
+    def __init__(self, max_batch_size=CNN_BATCH_MAX_SIZE, max_wait_ms=CNN_BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = None
+        self._worker = None
+
+    async def embed(self, image_np, landmarks=None):
+        """landmarks selects the palm-ROI preprocessing; None keeps the legacy full frame."""
+        # Timed as the caller sees it: batching window + forward pass
+        with stage("cnn"):
+            if self.max_batch_size == 1:
+                return await run_inference(registry.extract_cnn_features, image_np, landmarks)
+
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.create_task(self._run())
+
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((image_np, landmarks, future))
+            return await future
+
+    async def _collect(self):
+        # Block for the first request, then gather whatever arrives in the window
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Skip callers that gave up (e.g. a cancelled speculative embedding)
+            batch = [item for item in await self._collect() if not item[2].done()]
+            if not batch:
+                continue
+            images = [image for image, _, _ in batch]
+            landmarks = [lms for _, lms, _ in batch]
+            try:
+                vectors = await run_inference(registry.extract_cnn_features_batch, images, landmarks)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("CNN batcher shut down"))
+                raise
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+
+            for (_, _, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Fail anything still waiting so no request hangs on shutdown
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("CNN batcher shut down"))
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+_batcher = None
+
+def get_batcher():
+    """Process-wide CNN batcher shared by all routes."""
+    global _batcher
+    if _batcher is None:
+        _batcher = CNNBatcher()
+    return _batcher
+
+async def shutdown():
+    global _batcher
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
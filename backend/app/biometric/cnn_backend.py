@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import torch
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# eager | torchscript | onnx
+CNN_BACKEND = os.getenv("CNN_BACKEND", "eager").lower()
+# Set to "int8" to load the dynamically quantized ONNX graph
+CNN_QUANTIZE = os.getenv("CNN_QUANTIZE", "").lower()
+# Where scripts/export_cnn.py writes the pre-exported graphs
+CNN_MODEL_DIR = os.getenv("CNN_MODEL_DIR", os.path.dirname(__file__))
+
+def model_path(backend, quantize=""):
+    if backend == "torchscript":
+        return os.path.join(CNN_MODEL_DIR, "mobilenet_v2.torchscript.pt")
+    if backend == "onnx":
+        suffix = ".int8.onnx" if quantize == "int8" else ".onnx"
+        return os.path.join(CNN_MODEL_DIR, "mobilenet_v2" + suffix)
+    raise ValueError(f"No exported graph for CNN backend '{backend}'")
+
+class EagerRunner:
+    """Plain PyTorch mobilenet_v2 (the reference embeddings)."""
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, batch):
+        with torch.no_grad():
+            return self.model(batch).numpy()
+
+class TorchScriptRunner:
+    """Frozen TorchScript graph traced from the eager model."""
+    def __init__(self, path):
+        self.model = torch.jit.load(path, map_location="cpu")
+        self.model.eval()
+
+    def __call__(self, batch):
+        with torch.inference_mode():
+            return self.model(batch).numpy()
+
+class OnnxRunner:
+    """ONNX Runtime CPU session, fp32 or dynamically quantized int8."""
+    def __init__(self, path):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("CNN_BACKEND=onnx requires the onnxruntime package (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        return self.session.run(None, {self.input_name: batch.numpy()})[0]
+
+def load_runner(backend, quantize=""):
+    """Open a pre-exported graph for the given backend."""
+    if quantize and quantize != "int8":
+        raise ValueError(f"Unsupported CNN_QUANTIZE value '{quantize}'")
+    if quantize == "int8" and backend != "onnx":
+        # torch dynamic quantization only covers nn.Linear, and the
+        # embedding model has none once the classifier is removed.
+        raise ValueError("CNN_QUANTIZE=int8 is only available with CNN_BACKEND=onnx")
+
+    path = model_path(backend, quantize)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found. Run backend/scripts/export_cnn.py first.")
+
+    if backend == "torchscript":
+        return TorchScriptRunner(path)
+    return OnnxRunner(path)
+
+def parity_report(reference, candidate, batch):
+    """
+    Cosine drift of a candidate backend against the eager embeddings.
+    Input: two runners and a preprocessed N x 3 x 224 x 224 batch
+    """
+    ref = reference(batch).astype(np.float64)
+    out = candidate(batch).astype(np.float64)
+    cos = np.sum(ref * out, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(out, axis=1) + 1e-12)
+    return {
+        "samples": int(len(cos)),
+        "mean_cosine": float(np.mean(cos)),
+        "min_cosine": float(np.min(cos)),
+        "max_drift": float(np.max(1.0 - cos))
+    }
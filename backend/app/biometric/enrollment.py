@@ -0,0 +1,130 @@
+import asyncio
+import os
+import numpy as np
+from dotenv import load_dotenv
+from backend.app.biometric.feature_extractor import FeatureExtractor, CNN_PREPROCESS
+from backend.app.biometric import registry
+from backend.app.biometric.executor import run_inference
+from backend.app.biometric.ingest import decode_upload, ImageRejected
+from backend.app.biometric.template import CompiledTemplate, GEO_STORAGE_DTYPE, CNN_STORAGE_DTYPE
+from backend.app.utils.metrics import stage
+
+load_dotenv()
+
+ENROLLMENT_MIN_SAMPLES = 5
+# Stop analysing uploads once this many good samples are collected
+ENROLLMENT_TARGET_SAMPLES = max(ENROLLMENT_MIN_SAMPLES, int(os.getenv("ENROLLMENT_TARGET_SAMPLES", 5)))
+
+class EnrollmentResult:
+    """
+    Accepted samples from one enrollment request plus a structured
+    rejection entry ({"index", "reason", "issues"}) for every frame dropped.
+    """
+    def __init__(self):
+        self.feature_vectors = []
+        self.cnn_vectors = []
+        self.hand_types = []
+        self.rejections = []
+        self.skipped = 0
+        # Stored with the template so verification embeds probes the same way
+        self.cnn_preprocess = CNN_PREPROCESS
+
+    def reject(self, index, reason, issues=None):
+        self.rejections.append({"index": index, "reason": reason, "issues": issues or []})
+
+    @property
+    def accepted(self):
+        return len(self.feature_vectors)
+
+    def compile(self):
+        """Matcher-ready template for the accepted samples (seeds the template cache)."""
+        # Round to storage precision so the cached copy matches what is persisted
+        geo = np.asarray(self.feature_vectors, dtype=GEO_STORAGE_DTYPE)
+        cnn = np.asarray(self.cnn_vectors, dtype=CNN_STORAGE_DTYPE) if self.cnn_vectors else None
+        return CompiledTemplate(geo, cnn, self.hand_types[0], self.cnn_preprocess)
+
+def _decode_all(contents_list):
+    # (img, None) on success, (None, reason) when the upload is refused
+    decoded = []
+    for data in contents_list:
+        try:
+            decoded.append((decode_upload(data)[0], None))
+        except ImageRejected as e:
+            decoded.append((None, str(e)))
+    return decoded
+
+async def run_enrollment(contents_list, check_quality=True, with_cnn=True, target=ENROLLMENT_TARGET_SAMPLES):
+    """
+    Turn raw uploads into enrollment samples.
+    1. Decode every upload in one pool hop.
+    2. Analyse frames in waves sized to the samples still missing, stopping
+       once `target` good samples are collected. Geometry is computed per
+       wave in one vectorized call.
+    3. Run the CNN over each wave's good frames as one batch, so a frame
+       whose embedding fails is replaced from the later uploads.
+    """
+    result = EnrollmentResult()
+
+    # 1. Decode
+    decoded = await run_inference(_decode_all, contents_list)
+    images = [img for img, _ in decoded]
+    pending = []
+    for i, (img, error) in enumerate(decoded):
+        if img is None:
+            result.reject(i, "decode_failed", [error])
+        else:
+            pending.append(i)
+
+    pos = 0
+    roi = result.cnn_preprocess == "roi"
+    while result.accepted < target and pos < len(pending):
+        wave = pending[pos:pos + target - result.accepted]
+        pos += len(wave)
+
+        # 2. Quality + Landmarks + Geometry
+        analyses = await asyncio.gather(*[
+            run_inference(registry.analyze, images[i], check_quality=check_quality) for i in wave
+        ])
+        detected = []
+        for i, analysis in zip(wave, analyses):
+            if not analysis.is_good:
+                result.reject(i, "quality", analysis.issues)
+            elif not analysis.landmarks or not analysis.hand_type:
+                result.reject(i, "no_hand")
+            else:
+                detected.append((i, analysis))
+        if not detected:
+            continue
+
+        # Geometry for the whole wave in one vectorized call
+        geometry = FeatureExtractor.extract_features_batch(np.array([a.landmarks for _, a in detected]), dtype=np.float64)
+        good = []
+        for (i, analysis), row in zip(detected, geometry):
+            if np.isnan(row).any():
+                result.reject(i, "features_failed")
+            else:
+                good.append((i, row.tolist(), analysis))
+        if not good:
+            continue
+
+        # 3. CNN (one batched forward pass per wave; the first wave is usually the only one)
+        cnn_vectors = [None] * len(good)
+        if with_cnn:
+            with stage("cnn"):
+                cnn_vectors = await run_inference(
+                    registry.extract_cnn_features_batch,
+                    [images[i] for i, _, _ in good],
+                    [a.landmarks if roi else None for _, _, a in good]
+                )
+
+        for (i, features, analysis), cnn_feat in zip(good, cnn_vectors):
+            if with_cnn and not cnn_feat:
+                result.reject(i, "cnn_failed")
+                continue
+            result.feature_vectors.append(features)
+            result.hand_types.append(analysis.hand_type)
+            if with_cnn:
+                result.cnn_vectors.append(cnn_feat)
+
+    result.skipped = len(pending) - pos
+    return result
@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Threads that run decode / detection / CNN / matching for this worker.
+# OpenCV, MediaPipe and torch release the GIL, so threads scale with cores
+# while sharing the single set of models held by the registry.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+# Upper bound on inference calls in flight; extra callers wait on the event
+# loop (not on a thread) until a slot frees up.
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", 8))
+# Intra-op threads each torch / OpenCV call may use. Landmarks and CNN run
+# side by side on separate pool threads, so by default the cores are split
+# between the pool threads instead of every call grabbing all of them.
+INFERENCE_INTRA_OP_THREADS = int(os.getenv("INFERENCE_INTRA_OP_THREADS", max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)))
+
+_executor = None
+_semaphore = None
+
+def configure_threads():
+    """Apply the per-call thread budget to torch and OpenCV."""
+    import cv2
+    import torch
+    torch.set_num_threads(INFERENCE_INTRA_OP_THREADS)
+    cv2.setNumThreads(INFERENCE_INTRA_OP_THREADS)
+    log.info("Inference pool configured", workers=INFERENCE_WORKERS, intra_op_threads=INFERENCE_INTRA_OP_THREADS)
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        configure_threads()
+        _executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+    return _executor
+
+def _get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(INFERENCE_MAX_PENDING)
+    return _semaphore
+
+async def run_inference(func, *args, **kwargs):
+    """
+    Await a blocking biometric call (imdecode, detect, CNN, match) on the
+    inference pool so the event loop keeps serving I/O-bound endpoints.
+    """
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        # Carry contextvars into the worker thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        return await loop.run_in_executor(get_executor(), call)
+
+def shutdown():
+    global _executor, _semaphore
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    _semaphore = None
@@ -1,24 +1,115 @@
+import os
+import cv2
 import numpy as np
 import torch
 import torch.nn as nn
 from torchvision import models, transforms
 from PIL import Image
+from dotenv import load_dotenv
+from backend.app.biometric.cnn_backend import CNN_BACKEND, CNN_QUANTIZE, EagerRunner, load_runner
+from backend.app.utils.metrics import timed
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Preprocessing used for NEW enrollments: "roi" (aligned palm crop) or
+# "legacy" (full frame). Each template records its own mode, and matching
+# always embeds the probe the same way the template was built.
+CNN_PREPROCESS = os.getenv("CNN_PREPROCESS", "roi").lower()
+# Margin around the landmark bounding box, as a fraction of its size
+CNN_ROI_PADDING = float(os.getenv("CNN_ROI_PADDING", 0.15))
+
+CNN_INPUT_SIZE = 224
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
 
 class FeatureExtractor:
-    def __init__(self):
+    def __init__(self, backend=CNN_BACKEND, quantize=CNN_QUANTIZE, pretrained=True):
+        self.backend = backend
+        self.model = None
+        if backend == "eager":
+            # pretrained=False skips the ImageNet weight download (offline benchmarks)
+            self.model = FeatureExtractor.build_model(pretrained)
+            self.runner = EagerRunner(self.model)
+        else:
+            # Pre-exported TorchScript / ONNX graph; eager weights are never loaded
+            self.runner = load_runner(backend, quantize)
+        
+        self.preprocess = FeatureExtractor.build_preprocess()
+
+    @staticmethod
+    def build_model(pretrained=True):
         # Initialize MobileNetV2 for lightweight feature extraction
-        self.model = models.mobilenet_v2(weights=models.MobileNet_V2_Weights.DEFAULT)
+        model = models.mobilenet_v2(weights=models.MobileNet_V2_Weights.DEFAULT if pretrained else None)
         # Remove the last classification layer to get features
-        self.model.classifier = nn.Identity()
-        self.model.eval()
-        
-        self.preprocess = transforms.Compose([
+        model.classifier = nn.Identity()
+        model.eval()
+        return model
+
+    @staticmethod
+    def build_preprocess():
+        return transforms.Compose([
             transforms.Resize(256),
             transforms.CenterCrop(224),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
         ])
 
+    @staticmethod
+    def preprocess_roi(image_np, landmarks, size=CNN_INPUT_SIZE, padding=CNN_ROI_PADDING):
+        """
+        Crop a padded palm ROI aligned so the wrist -> middle finger base axis
+        points up, downscale it with OpenCV and normalize it.
+        Output: 3 x size x size float32 array in RGB order
+        """
+        h, w = image_np.shape[:2]
+        pts = np.asarray(landmarks, dtype=np.float64)[:, :2] * (w, h)
+
+        # 1. Hand-aligned axes: e_y runs from the fingers down to the wrist
+        axis = pts[0] - pts[9]
+        norm = np.linalg.norm(axis)
+        e_y = axis / norm if norm > 0 else np.array([0.0, 1.0])
+        e_x = np.array([e_y[1], -e_y[0]])
+
+        # 2. Square ROI around the landmarks in the aligned frame
+        rel = pts - pts.mean(axis=0)
+        q = np.stack([rel @ e_x, rel @ e_y], axis=1)
+        q_min, q_max = q.min(axis=0), q.max(axis=0)
+        side = max(float((q_max - q_min).max()) * (1 + 2 * padding), 16.0)
+        mid = (q_min + q_max) / 2
+        center = pts.mean(axis=0) + mid[0] * e_x + mid[1] * e_y
+
+        # 3. Work only on the axis-aligned window covering the rotated square
+        half = side * (np.abs(e_x) + np.abs(e_y)) / 2
+        x0, y0 = np.maximum(np.floor(center - half).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(center + half).astype(int), (w, h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            raise ValueError("Palm ROI outside the frame")
+        window = image_np[y0:y1, x0:x1]
+
+        # Output pixel -> source pixel mapping (dst -> src affine)
+        k = side / size
+        t = center - (x0, y0) + k * (0.5 - size / 2) * (e_x + e_y)
+        M = np.array([[k * e_x[0], k * e_y[0], t[0]],
+                      [k * e_x[1], k * e_y[1], t[1]]])
+
+        # 4. Downscale large ROIs with area interpolation before warping
+        if k > 1.5:
+            new_w = max(2, int(round((x1 - x0) / k)))
+            new_h = max(2, int(round((y1 - y0) / k)))
+            fx, fy = new_w / (x1 - x0), new_h / (y1 - y0)
+            window = cv2.resize(window, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            M = M * np.array([[fx], [fy]])
+
+        crop = cv2.warpAffine(window, M, (size, size), flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+
+        # 5. BGR -> RGB, ImageNet normalization, HWC -> CHW
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB).astype(np.float32)
+        crop = (crop * (1.0 / 255.0) - _MEAN) / _STD
+        return np.ascontiguousarray(crop.transpose(2, 0, 1))
+
     @staticmethod
     def calculate_distance(p1, p2):
         return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
@@ -34,77 +125,134 @@ class FeatureExtractor:
         unit_v1, unit_v2 = v1 / norm1, v2 / norm2
         return float(np.arccos(np.clip(np.dot(unit_v1, unit_v2), -1.0, 1.0)))
 
-    def extract_cnn_features(self, image_np):
+    def extract_cnn_features(self, image_np, landmarks=None):
         """
         Extract deep features using MobileNetV2.
-        Input: Numpy image (BGR or RGB)
+        Input: Numpy image (BGR), optional hand landmarks for the palm ROI
         Output: 1280-D feature vector
         """
+        return self.extract_cnn_features_batch([image_np], [landmarks])[0]
+
+    def extract_cnn_features_batch(self, images, landmarks=None):
+        """
+        Extract deep features for several images in one forward pass.
+        Input: list of Numpy images (BGR); optional per-image landmarks.
+               Frames with landmarks use the palm ROI, others the legacy full frame.
+        Output: list of 1280-D feature vectors (None for unusable images)
+        """
+        if landmarks is None:
+            landmarks = [None] * len(images)
+
+        results = [None] * len(images)
+        tensors, slots = [], []
+        for i, (image_np, lms) in enumerate(zip(images, landmarks)):
+            try:
+                if image_np is None or len(image_np.shape) != 3:
+                    continue
+                if lms:
+                    tensors.append(torch.from_numpy(FeatureExtractor.preprocess_roi(image_np, lms)))
+                else:
+                    # Legacy path: whole frame through PIL, still in BGR order,
+                    # which is what templates enrolled before the ROI crop hold.
+                    tensors.append(self.preprocess(Image.fromarray(image_np)))
+                slots.append(i)
+            except Exception:
+                log.exception("CNN preprocessing failed", index=i)
+
+        if not tensors:
+            return results
+
         try:
-            # Convert numpy image to PIL
-            if len(image_np.shape) == 3:
-                image_pil = Image.fromarray(image_np)
-            else:
-                return None
-                
-            input_tensor = self.preprocess(image_pil)
-            input_batch = input_tensor.unsqueeze(0)  # Create a mini-batch as expected by the model
-
-            with torch.no_grad():
-                features = self.model(input_batch)
-            
-            return features.numpy().flatten().tolist()
-        except Exception as e:
-            print(f"CNN Extraction Error: {e}")
-            return None
+            input_batch = torch.stack(tensors)  # N x 3 x 224 x 224
+            features = self.runner(input_batch)
+        except Exception:
+            log.exception("CNN extraction failed", batch=len(tensors))
+            return results
+
+        for slot, vector in zip(slots, features):
+            results[slot] = vector.tolist()
+        return results
 
     @staticmethod
     def extract_features(landmarks):
         """
-        Extract 51-Dimensional high-fidelity geometric signature.
+        Extract the 48-Dimensional high-fidelity geometric signature.
         Rotation and Scale Invariant.
         """
-        if not landmarks or len(landmarks) < 21: return None
-        
-        pts = np.array(landmarks)[:, :2] # Use only x, y for geometry
-        features = []
-        
+        if landmarks is None or len(landmarks) < 21: return None
+
+        # Same arithmetic as the batched path, kept in float64 for the stored templates
+        features = FeatureExtractor.extract_features_batch(np.asarray(landmarks)[None, :21], dtype=np.float64)[0]
+        if np.isnan(features[0]): return None
+        return features.tolist()
+
+    @staticmethod
+    @timed("geometry")
+    def extract_features_batch(landmarks, dtype=np.float32):
+        """
+        Vectorized geometric signature for many hands at once.
+        Input: (N, 21, 2 or 3) landmark array
+        Output: (N, 48) matrix; rows whose wrist-to-middle-base distance is 0 are NaN
+        """
+        pts = np.asarray(landmarks, dtype=np.float64)[:, :, :2] # Use only x, y for geometry
+        wrist = pts[:, :1]
+
         # 1. Base Reference: Wrist to Middle Finger Base
-        ref_dist = FeatureExtractor.calculate_distance(pts[0], pts[9])
-        if ref_dist == 0: return None
+        ref_dist = _distance(pts[:, 0], pts[:, 9])
+        invalid = ref_dist == 0
+        ref = np.where(invalid, 1.0, ref_dist)[:, None]
 
         # 2. Point-to-Wrist Ratios (20 features)
-        for i in range(1, 21):
-            features.append(FeatureExtractor.calculate_distance(pts[0], pts[i]) / ref_dist)
+        wrist_ratios = _distance(wrist, pts[:, 1:]) / ref
 
         # 3. Inter-finger Angles (4 features)
         # Thumb(4)-Wrist(0)-Index(8), etc.
-        finger_tips = [4, 8, 12, 16, 20]
-        for i in range(len(finger_tips) - 1):
-            features.append(FeatureExtractor.calculate_angle(pts[finger_tips[i]], pts[0], pts[finger_tips[i+1]]))
-
-        # 4. Finger Segment Ratios (Internal 5 segments x 4 fingers = 20 features)
-        # For each finger: Tip->DIP / DIP->PIP, PIP->MCP / ref_dist, etc.
-        # Index: 5(Base), 6(PIP), 7(DIP), 8(Tip)
-        fingers = [[5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]]
-        for f in fingers:
-            d1 = FeatureExtractor.calculate_distance(pts[f[3]], pts[f[2]])
-            d2 = FeatureExtractor.calculate_distance(pts[f[2]], pts[f[1]])
-            d3 = FeatureExtractor.calculate_distance(pts[f[1]], pts[f[0]])
-            features.append(d1/ref_dist)
-            features.append(d2/ref_dist)
-            features.append(d3/ref_dist)
-            features.append(d1/(d2 + 1e-6))
-            features.append(d2/(d3 + 1e-6))
-
-        # 5. Hand Aspect Ratio (4 features)
-        palm_width = FeatureExtractor.calculate_distance(pts[5], pts[17])
-        features.append(palm_width / ref_dist)
-        
-        # 6. Triangle Areas (Curvature)
+        v1 = pts[:, _TIPS[:-1]] - wrist
+        v2 = pts[:, _TIPS[1:]] - wrist
+        norm1 = np.sqrt(_dot(v1, v1))
+        norm2 = np.sqrt(_dot(v2, v2))
+        degenerate = (norm1 == 0) | (norm2 == 0)
+        norm1 = np.where(norm1 == 0, 1.0, norm1)[..., None]
+        norm2 = np.where(norm2 == 0, 1.0, norm2)[..., None]
+        cos = _dot(v1 / norm1, v2 / norm2)
+        angles = np.where(degenerate, 0.0, np.arccos(np.clip(cos, -1.0, 1.0)))
+
+        # 4. Finger Segment Ratios (5 ratios x 4 fingers = 20 features)
+        # d1 = Tip->DIP, d2 = DIP->PIP, d3 = PIP->MCP
+        d1 = _distance(pts[:, _FINGERS[:, 3]], pts[:, _FINGERS[:, 2]])
+        d2 = _distance(pts[:, _FINGERS[:, 2]], pts[:, _FINGERS[:, 1]])
+        d3 = _distance(pts[:, _FINGERS[:, 1]], pts[:, _FINGERS[:, 0]])
+        segments = np.stack([d1 / ref, d2 / ref, d3 / ref, d1 / (d2 + 1e-6), d2 / (d3 + 1e-6)], axis=-1)
+
+        # 5. Hand Aspect Ratio (1 feature)
+        palm_width = _distance(pts[:, 5], pts[:, 17])[:, None] / ref
+
+        # 6. Triangle Areas (Curvature, 3 features)
         # (Wrist, IndexBase, MiddleBase), etc.
-        for i in [5, 9, 13]:
-            area = 0.5 * np.abs(np.cross(pts[i]-pts[0], pts[i+4]-pts[0]))
-            features.append(area / (ref_dist**2))
+        a = pts[:, _AREA_BASES] - wrist
+        b = pts[:, _AREA_BASES + 4] - wrist
+        areas = 0.5 * np.abs(a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]) / np.float_power(ref, 2)
+
+        features = np.concatenate([
+            wrist_ratios,
+            angles,
+            segments.reshape(len(pts), -1),
+            palm_width,
+            areas
+        ], axis=1)
+        features[invalid] = np.nan
+        return features.astype(dtype, copy=False)
+
+# Precomputed landmark index arrays for the geometric signature
+_TIPS = np.array([4, 8, 12, 16, 20])
+_FINGERS = np.array([[5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]])
+_AREA_BASES = np.array([5, 9, 13])
+
+# float_power and matmul reproduce the rounding of the scalar helpers above
+# (pow() for `**2` on numpy scalars, BLAS for np.dot / np.linalg.norm), so
+# batched output is bit-identical to the per-hand signature.
+def _distance(p1, p2):
+    return np.sqrt(np.float_power(p1[..., 0] - p2[..., 0], 2) + np.float_power(p1[..., 1] - p2[..., 1], 2))
 
-        return np.array(features).tolist()
+def _dot(v1, v2):
+    return (v1[..., None, :] @ v2[..., :, None])[..., 0, 0]
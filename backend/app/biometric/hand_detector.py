@@ -4,29 +4,113 @@ from mediapipe.tasks.python import vision
 import cv2
 import numpy as np
 import os
+import threading
+from backend.app.biometric.quality import QualityAnalyzer
+from backend.app.utils.metrics import timed
+
+class HandAnalysis:
+    """
+    Result of one HandDetector.analyze() pass over a frame.
+    Routes read the quality verdict, landmarks and handedness from here
+    instead of re-running detection for each of them.
+    """
+    def __init__(self, landmarks=None, hand_type=None, brightness=None, blur=None, issues=None, glare=None):
+        self.landmarks = landmarks or []
+        self.hand_type = hand_type
+        self.brightness = brightness
+        self.blur = blur
+        self.glare = glare
+        self.issues = issues or []
+
+    @property
+    def metrics(self):
+        return {"brightness": self.brightness, "blur": self.blur, "glare": self.glare, "scale": self.scale}
+
+    @property
+    def scale(self):
+        # Wrist (0) to Middle Finger Base (9), in normalized image units
+        if not self.landmarks:
+            return None
+        wrist = self.landmarks[0]
+        mcp = self.landmarks[9]
+        return float(np.sqrt((wrist[0] - mcp[0])**2 + (wrist[1] - mcp[1])**2))
+
+    @property
+    def is_good(self):
+        return not self.issues
 
 class HandDetector:
-    def __init__(self, mode=False, max_hands=1, detection_con=0.5, track_con=0.5):
+    def __init__(self, mode=False, max_hands=1, detection_con=0.5, track_con=0.5, video=False):
         # Path to the model file
         model_path = os.path.join(os.path.dirname(__file__), 'hand_landmarker.task')
         
         base_options = python.BaseOptions(model_asset_path=model_path)
         options = vision.HandLandmarkerOptions(
             base_options=base_options,
+            # VIDEO mode tracks the hand from the previous frame and only
+            # re-runs palm detection when tracking is lost (one instance per stream)
+            running_mode=vision.RunningMode.VIDEO if video else vision.RunningMode.IMAGE,
             num_hands=max_hands,
             min_hand_detection_confidence=0.3,
             min_hand_presence_confidence=0.3,
             min_tracking_confidence=track_con
         )
+        self.video = video
         self.detector = vision.HandLandmarker.create_from_options(options)
+        # One landmarker graph is shared by all inference threads
+        self._lock = threading.Lock()
+        self.quality = QualityAnalyzer()
 
-    def find_hands(self, img, draw=True):
+    @timed("detection")
+    def _detect(self, img, timestamp_ms=None):
         # Convert the image to MediaPipe Image object
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-        
-        # Detect hands
-        detection_result = self.detector.detect(mp_image)
+        with self._lock:
+            if self.video:
+                return self.detector.detect_for_video(mp_image, timestamp_ms)
+            return self.detector.detect(mp_image)
+
+    def close(self):
+        self.detector.close()
+
+    def analyze(self, img, hand_no=0, check_quality=True, timestamp_ms=None):
+        """
+        Run a single detection pass over a frame and collect everything the
+        routes need from it (landmarks, handedness, scale, brightness, blur).
+        timestamp_ms is required (monotonically increasing) in video mode.
+        Returns: HandAnalysis
+        """
+        if img is None:
+            return HandAnalysis(issues=["Image not found"])
+
+        analysis = HandAnalysis()
+
+        if check_quality:
+            # 1-2. Brightness / Glare / Blur on a low-resolution proxy
+            report = self.quality.analyze(img)
+            analysis.brightness = report.brightness
+            analysis.blur = report.blur
+            analysis.glare = report.glare
+            analysis.issues.extend(report.issues)
+
+        # 3. Landmarks + Handedness (one detect call per frame)
+        detection_result = self._detect(img, timestamp_ms)
+        if detection_result.hand_landmarks and len(detection_result.hand_landmarks) > hand_no:
+            analysis.landmarks = [[lm.x, lm.y, lm.z] for lm in detection_result.hand_landmarks[hand_no]]
+            analysis.hand_type = detection_result.handedness[hand_no][0].category_name
+
+        # 4. Hand Scale Check (Distance)
+        if check_quality and analysis.scale is not None:
+            if analysis.scale < 0.18:
+                analysis.issues.append("Hand is too far. Bring it closer to the scanner.")
+            elif analysis.scale > 0.5:
+                analysis.issues.append("Hand is too close. Please move back slightly.")
+
+        return analysis
+
+    def find_hands(self, img, draw=True):
+        detection_result = self._detect(img)
         
         all_hands = []
         if detection_result.hand_landmarks:
@@ -56,63 +140,14 @@ class HandDetector:
             cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
 
     def find_position(self, img, hand_no=0):
-        # This method is used by feature_extractor.py
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-        detection_result = self.detector.detect(mp_image)
-        
-        lm_list = []
-        hand_label = None
-        if detection_result.hand_landmarks and len(detection_result.hand_landmarks) > hand_no:
-            for landmark in detection_result.hand_landmarks[hand_no]:
-                lm_list.append([landmark.x, landmark.y, landmark.z])
-            hand_label = detection_result.handedness[hand_no][0].category_name
-            
-        return lm_list, hand_label
+        # Kept for callers that only need landmarks; prefer analyze()
+        analysis = self.analyze(img, hand_no=hand_no, check_quality=False)
+        return analysis.landmarks, analysis.hand_type
 
     def check_image_quality(self, img):
         """
-        Analyze image for brightness and blur.
+        Analyze image for brightness, glare and blur.
         Returns: is_good (bool), issues (list)
         """
-        issues = []
-        is_good = True
-        
-        if img is None:
-            return False, ["Image not found"]
-
-        # 1. Brightness Check
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        v_channel = hsv[:,:,2]
-        avg_brightness = np.mean(v_channel)
-        
-        if avg_brightness < 40:
-            is_good = False
-            issues.append("Lighting is too dark. Increase brightness.")
-        elif avg_brightness > 250:
-            is_good = False
-            issues.append("Too much glare. Avoid direct light.")
-            
-        # 2. Blur Check
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
-        if laplacian_var < 20: # Threshold for blur
-            is_good = False
-            issues.append("Image is blurry. Please hold steady.")
-
-        # 3. Hand Scale Check (Distance)
-        lm_list, _ = self.find_position(img)
-        if lm_list:
-            # Wrist (0) to Middle Finger Base (9)
-            wrist = lm_list[0]
-            mcp = lm_list[9]
-            dist = np.sqrt((wrist[0] - mcp[0])**2 + (wrist[1] - mcp[1])**2)
-            if dist < 0.18:
-                is_good = False
-                issues.append("Hand is too far. Bring it closer to the scanner.")
-            elif dist > 0.5:
-                is_good = False
-                issues.append("Hand is too close. Please move back slightly.")
-            
-        return is_good, issues
+        analysis = self.analyze(img)
+        return analysis.is_good, analysis.issues
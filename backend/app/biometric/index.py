@@ -0,0 +1,365 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import numpy as np
+from datetime import datetime
+from dotenv import load_dotenv
+from backend.app.biometric.template import CompiledTemplate
+from backend.app.biometric.template_cache import template_version
+from backend.app.biometric.executor import run_inference
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Candidates re-scored by Matcher for each identification
+IDENTIFY_TOP_K = int(os.getenv("IDENTIFY_TOP_K", 5))
+# Partitions larger than this are searched through an IVF index instead of exhaustively
+IDENTIFY_IVF_MIN_SIZE = int(os.getenv("IDENTIFY_IVF_MIN_SIZE", 2000))
+IDENTIFY_IVF_NPROBE = int(os.getenv("IDENTIFY_IVF_NPROBE", 8))
+# How often changed enrollments are pulled in, and how often the index is rebuilt from scratch
+IDENTIFY_REFRESH_SECONDS = float(os.getenv("IDENTIFY_REFRESH_SECONDS", 30))
+IDENTIFY_REBUILD_SECONDS = float(os.getenv("IDENTIFY_REBUILD_SECONDS", 3600))
+
+# Same 70/30 weighting as Matcher's score fusion, folded into the vectors so
+# one inner product gives 0.7 * geo_cosine + 0.3 * cnn_cosine.
+_GEO_WEIGHT = np.sqrt(0.7)
+_CNN_WEIGHT = np.sqrt(0.3)
+
+_LOAD_PROJECTION = {"user_id": 1, "feature_vectors": 1, "cnn_features": 1, "hand_type": 1,
+                    "cnn_preprocess": 1, "updated_at": 1, "created_at": 1}
+_LOAD_CHUNK = 256
+
+def _normalize(vec):
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+def index_vector(geo_unit, cnn_unit=None):
+    """
+    Search vector for a probe or an enrolled centroid.
+    Geometry only when there is no CNN embedding (legacy profiles).
+    """
+    geo = _GEO_WEIGHT * _normalize(np.asarray(geo_unit, dtype=np.float32))
+    if cnn_unit is None:
+        return geo.astype(np.float32)
+    cnn = _CNN_WEIGHT * _normalize(np.asarray(cnn_unit, dtype=np.float32))
+    return np.concatenate([geo, cnn]).astype(np.float32)
+
+def partition_key(template, vector):
+    """Templates are only comparable within one hand, CNN preprocessing and vector size."""
+    cnn_preprocess = None
+    if template.cnn_unit is not None:
+        # Profiles enrolled before cnn_preprocess was stored embed the full frame,
+        # like payment / verify do for anything that is not "roi"
+        cnn_preprocess = template.cnn_preprocess or "legacy"
+    return template.hand_type, cnn_preprocess, vector.shape[0]
+
+def template_vector(template):
+    cnn = template.cnn_unit.mean(axis=0) if template.cnn_unit is not None else None
+    return index_vector(template.centroid_unit, cnn)
+
+def train_ivf(vectors, iterations=10, seed=0):
+    """
+    Spherical k-means with ~sqrt(N) lists over a snapshot of a partition.
+    Returns: (centroids, list of every row). Runs on the inference pool.
+    """
+    n = len(vectors)
+    nlist = max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = _normalize(members.mean(axis=0))
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+class Partition:
+    """
+    Dense matrix of enrolled vectors for one (hand_type, cnn_preprocess).
+    Exact inner-product search; above IDENTIFY_IVF_MIN_SIZE an inverted-file
+    index (k-means coarse quantizer) narrows the rows that are scored. The
+    index is trained off the event loop (see PalmIndex._train); searches
+    keep using the previous lists, or scan exhaustively, until it is installed.
+    """
+    def __init__(self, dim):
+        self.dim = dim
+        self._data = np.zeros((64, dim), dtype=np.float32)  # grown by doubling
+        self.user_ids = []
+        self.rows = {}
+        # IVF state (None until the partition is large enough)
+        self.centroids = None
+        self.assignments = None
+        self.trained_size = 0
+        # Rows written since the training snapshot was taken (None when not training)
+        self._touched = None
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @property
+    def vectors(self):
+        return self._data[:len(self.user_ids)]
+
+    def upsert(self, user_id, vector):
+        row = self.rows.get(user_id)
+        if row is None:
+            row = len(self.user_ids)
+            if row == len(self._data):
+                self._data = np.concatenate([self._data, np.zeros_like(self._data)])
+            self.user_ids.append(user_id)
+            self.rows[user_id] = row
+            if self.assignments is not None:
+                self.assignments = np.append(self.assignments, 0)
+        self._data[row] = vector
+        if self.assignments is not None:
+            self.assignments[row] = int(np.argmax(self.centroids @ vector))
+        if self._touched is not None:
+            self._touched.add(row)
+
+    def remove(self, user_id):
+        row = self.rows.pop(user_id, None)
+        if row is None:
+            return
+        # Swap the last row into the hole
+        last = len(self.user_ids) - 1
+        if row != last:
+            moved = self.user_ids[last]
+            self.user_ids[row] = moved
+            self.rows[moved] = row
+            self._data[row] = self._data[last]
+            if self.assignments is not None:
+                self.assignments[row] = self.assignments[last]
+        self.user_ids.pop()
+        if self.assignments is not None:
+            self.assignments = self.assignments[:last]
+        if self._touched is not None:
+            # The hole now holds the moved row
+            self._touched.add(row)
+
+    def training_due(self):
+        """Whether the IVF lists should be (re)trained; drops them below IDENTIFY_IVF_MIN_SIZE."""
+        size = len(self)
+        if size < IDENTIFY_IVF_MIN_SIZE:
+            self.centroids = self.assignments = None
+            self.trained_size = 0
+            return False
+        return self._touched is None and (self.centroids is None or size >= 2 * self.trained_size)
+
+    def snapshot(self):
+        """Copy of the vectors to train on; writes from now on are tracked until install()."""
+        self._touched = set()
+        return self.vectors.copy()
+
+    def install(self, centroids, assignments):
+        """Swap in lists trained on snapshot(); rows written since are reassigned here."""
+        touched, self._touched = self._touched, None
+        n = len(self)
+        if n < IDENTIFY_IVF_MIN_SIZE:
+            return
+        keep = np.zeros(n, dtype=bool)
+        keep[:min(n, len(assignments))] = True
+        keep[[row for row in touched if row < n]] = False
+        merged = np.empty(n, dtype=assignments.dtype)
+        merged[keep] = assignments[:n][keep[:len(assignments)]]
+        stale = np.flatnonzero(~keep)
+        if stale.size:
+            merged[stale] = np.argmax(self.vectors[stale] @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.assignments = merged
+        self.trained_size = len(assignments)
+
+    def abort_training(self):
+        self._touched = None
+
+    def search(self, query, k):
+        if not len(self):
+            return []
+        rows = None
+        if self.centroids is not None:
+            probe = np.argsort(-(self.centroids @ query))[:IDENTIFY_IVF_NPROBE]
+            rows = np.flatnonzero(np.isin(self.assignments, probe))
+            if rows.size == 0:
+                # Probed lists emptied by removals since the last training: scan everything
+                rows = None
+        candidates = self.vectors if rows is None else self.vectors[rows]
+        scores = candidates @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(self.user_ids[rows[i]], float(scores[i])) for i in top]
+        return [(self.user_ids[i], float(scores[i])) for i in top]
+
+class PalmIndex:
+    """
+    In-memory 1:N index over every enrolled template, partitioned by
+    hand_type (and CNN preprocessing, since ROI and full-frame embeddings
+    are not comparable). Kept current by write-through from enrollment and
+    by periodically pulling records whose updated_at moved.
+    """
+    def __init__(self):
+        self.partitions = {}
+        self.owner = {}  # user_id -> (partition key, version)
+        self._lock = threading.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self._training = {}  # partition key -> training task
+        self.watermark = None
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+
+    def upsert(self, user_id, version, template):
+        if template is None:
+            return self.remove(user_id)
+        vector = template_vector(template)
+        key = partition_key(template, vector)
+        with self._lock:
+            current = self.owner.get(user_id)
+            if current is not None and current[0] != key:
+                self.partitions[current[0]].remove(user_id)
+            partition = self.partitions.get(key)
+            if partition is None:
+                partition = self.partitions[key] = Partition(vector.shape[0])
+            partition.upsert(user_id, vector)
+            self.owner[user_id] = (key, version)
+            due = partition.training_due()
+        if due and key not in self._training:
+            # Fresh context: the training outlives the request that triggered it
+            self._training[key] = contextvars.Context().run(asyncio.create_task, self._train(key))
+
+    async def _train(self, key):
+        """Train the partition's IVF lists on the inference pool, then swap them in under the lock."""
+        try:
+            while True:
+                with self._lock:
+                    # Looked up again each round: rebuild() may have swapped the partition
+                    partition = self.partitions.get(key)
+                    if partition is None or not partition.training_due():
+                        return
+                    vectors = partition.snapshot()
+                start = time.perf_counter()
+                try:
+                    centroids, assignments = await run_inference(train_ivf, vectors)
+                except BaseException:
+                    with self._lock:
+                        partition.abort_training()
+                    raise
+                with self._lock:
+                    partition.install(centroids, assignments)
+                log.info("Palm index lists trained", partition=f"{key[0]}/{key[1] or 'geometry'}/{key[2]}",
+                         size=len(vectors), lists=len(centroids), ms=round((time.perf_counter() - start) * 1000))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("Palm index training failed; searching exhaustively")
+        finally:
+            self._training.pop(key, None)
+
+    async def _finish_training(self):
+        while self._training:
+            await asyncio.gather(*list(self._training.values()), return_exceptions=True)
+
+    def remove(self, user_id):
+        with self._lock:
+            current = self.owner.pop(user_id, None)
+            if current is not None:
+                self.partitions[current[0]].remove(user_id)
+
+    def preprocess_modes(self, hand_type):
+        """CNN preprocessing modes the probe must be embedded with for this hand."""
+        return {key[1] for key, partition in self.partitions.items() if key[0] == hand_type and key[1] and len(partition)}
+
+    def search(self, hand_type, geo, cnn_by_mode, k=IDENTIFY_TOP_K):
+        """
+        Top-k candidates across the hand's partitions.
+        Input: probe geometry and {cnn_preprocess: probe embedding}
+        Returns: [(user_id, cnn_preprocess, score)] best first
+        """
+        geo_unit = _normalize(np.asarray(geo, dtype=np.float32))
+        results = []
+        with self._lock:
+            for (hand, mode, dim), partition in self.partitions.items():
+                if hand != hand_type:
+                    continue
+                cnn = cnn_by_mode.get(mode) if mode else None
+                if mode and cnn is None:
+                    continue
+                query = index_vector(geo_unit, cnn)
+                if query.shape[0] != dim:
+                    continue
+                results.extend((uid, mode, score) for uid, score in partition.search(query, k))
+        results.sort(key=lambda r: r[2], reverse=True)
+        return results[:k]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self.owner),
+                "partitions": {f"{hand}/{mode or 'geometry'}/{dim}": {"size": len(p), "ivf": p.centroids is not None}
+                               for (hand, mode, dim), p in self.partitions.items()}
+            }
+
+    async def ensure_fresh(self, db):
+        """Full load on first use / every IDENTIFY_REBUILD_SECONDS, incremental refresh in between."""
+        now = time.monotonic()
+        if now - self.refreshed_at < IDENTIFY_REFRESH_SECONDS and self.loaded_at:
+            return
+        async with self._refresh_lock:
+            now = time.monotonic()
+            if not self.loaded_at or now - self.loaded_at >= IDENTIFY_REBUILD_SECONDS:
+                await self.rebuild(db)
+            elif now - self.refreshed_at >= IDENTIFY_REFRESH_SECONDS:
+                await self.refresh(db)
+
+    async def rebuild(self, db):
+        start = time.perf_counter()
+        fresh = PalmIndex()
+        await fresh._load(db, {})
+        # Searches keep using the current index while the new lists train
+        await fresh._finish_training()
+        with self._lock:
+            self.partitions, self.owner = fresh.partitions, fresh.owner
+        self.watermark = fresh.watermark
+        self.loaded_at = self.refreshed_at = time.monotonic()
+        log.info("Palm index rebuilt", templates=len(self.owner), ms=round((time.perf_counter() - start) * 1000))
+
+    async def refresh(self, db):
+        query = {"updated_at": {"$gte": self.watermark}} if self.watermark else {}
+        changed = await self._load(db, query)
+        self.refreshed_at = time.monotonic()
+        if changed:
+            log.debug("Palm index refreshed", changed=changed)
+
+    async def _load(self, db, query):
+        changed = 0
+        chunk = []
+        async for record in db.biometrics.find(query, _LOAD_PROJECTION):
+            chunk.append(record)
+            if len(chunk) >= _LOAD_CHUNK:
+                changed += await self._ingest(chunk)
+                chunk = []
+        if chunk:
+            changed += await self._ingest(chunk)
+        return changed
+
+    async def _ingest(self, records):
+        # Decrypt + compile off the event loop
+        templates = await run_inference(lambda: [CompiledTemplate.from_record(r) for r in records])
+        changed = 0
+        for record, template in zip(records, templates):
+            user_id = record.get("user_id")
+            version = template_version(record)
+            current = self.owner.get(user_id)
+            if current is not None and current[1] == version:
+                continue
+            self.upsert(user_id, version, template)
+            changed += 1
+            if isinstance(version, datetime) and (self.watermark is None or version > self.watermark):
+                self.watermark = version
+        return changed
+
+palm_index = PalmIndex()
@@ -0,0 +1,102 @@
+import os
+import struct
+import time
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from backend.app.utils.metrics import timed
+
+load_dotenv()
+
+# Hard limits checked from the raw bytes / header, before any decoding
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 15 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", 40_000_000))
+# Shortest side we need after decoding; MediaPipe and the palm ROI only use
+# a few hundred pixels, so 12 MP phone frames are decoded at 1/2, 1/4 or 1/8.
+DECODE_TARGET_SIZE = int(os.getenv("DECODE_TARGET_SIZE", 720))
+
+_REDUCED_MODES = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+# JPEG start-of-frame markers carry the image size (C4, C8 and CC are not SOFs)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+class ImageRejected(ValueError):
+    """Upload refused before decoding (too large, malformed or unsupported)."""
+
+def read_image_header(data):
+    """
+    Read format and dimensions from a JPEG/PNG header without decoding pixels.
+    Returns: (format, width, height)
+    """
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        if len(data) < 24 or data[12:16] != b"IHDR":
+            raise ImageRejected("Malformed PNG header")
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 4 <= len(data):
+            if data[i] != 0xFF:
+                raise ImageRejected("Malformed JPEG header")
+            marker = data[i + 1]
+            if marker == 0xFF:  # fill byte
+                i += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # no length field
+                i += 2
+                continue
+            length = struct.unpack(">H", data[i + 2:i + 4])[0]
+            if marker in _JPEG_SOF:
+                if i + 9 > len(data):
+                    break
+                height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                return "jpeg", width, height
+            if marker == 0xDA or length < 2:  # scan data before any frame header
+                break
+            i += 2 + length
+        raise ImageRejected("Malformed JPEG header")
+
+    raise ImageRejected("Unsupported image format. Upload a JPEG or PNG.")
+
+@timed("decode")
+def decode_upload(data, target=DECODE_TARGET_SIZE):
+    """
+    Validate an uploaded image from its header, then decode it at the
+    smallest reduced scale that keeps the shortest side >= target.
+    Returns: (img, info) where info has format, width, height, scale, decode_ms
+    """
+    if not data:
+        raise ImageRejected("Empty image file received")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ImageRejected(f"Image exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit")
+
+    fmt, width, height = read_image_header(data)
+    if width == 0 or height == 0:
+        raise ImageRejected("Image has no pixels")
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageRejected(f"Image resolution {width}x{height} exceeds the {MAX_IMAGE_PIXELS // 1_000_000} MP limit")
+
+    scale, mode = 1, cv2.IMREAD_COLOR
+    for factor, reduced in _REDUCED_MODES:
+        if min(width, height) // factor >= target:
+            scale, mode = factor, reduced
+            break
+
+    start = time.perf_counter()
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), mode)
+    decode_ms = (time.perf_counter() - start) * 1000
+    if img is None:
+        raise ImageRejected("Invalid image format or corrupted file")
+
+    return img, {
+        "format": fmt,
+        "width": width,
+        "height": height,
+        "scale": scale,
+        "decode_ms": decode_ms
+    }
@@ -1,5 +1,20 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from backend.app.biometric.template import CompiledTemplate
+from backend.app.utils.metrics import timed
+from backend.app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+def _unit(vec):
+    norm = np.linalg.norm(vec)
+    return (vec / norm if norm > 0 else vec).astype(np.float32)
+
+def _gate_outcome(result):
+    # Metrics label for geometric_stage: "continue" or the early decision
+    early = result[0]
+    if early is None:
+        return "continue"
+    return early[0] if isinstance(early[0], str) else early[0]["status"].lower()
 
 class Matcher:
     @staticmethod
@@ -14,55 +29,103 @@ class Matcher:
                 "confidence_score": 0.0
             }, {}
 
+        template = CompiledTemplate(stored_geo, stored_cnn, enrolled_hand_type)
+        return Matcher.verify_compiled(new_geo, template, new_cnn, current_hand_type)
+
+    @staticmethod
+    def verify_compiled(new_geo, template, new_cnn=None, current_hand_type=None):
+        """
+        Hybrid Fusion against a precompiled template (see CompiledTemplate).
+        """
+        early, stage = Matcher.geometric_stage(new_geo, template, current_hand_type)
+        if early is not None:
+            return early
+        return Matcher.fuse(stage, template, new_cnn)
+
+    @staticmethod
+    @timed("match", outcome=_gate_outcome)
+    def geometric_stage(new_geo, template, current_hand_type=None):
+        """
+        Cheap gates of the cascade (hand type, dimension, geometric consistency).
+        Returns: (final result or None, stage) -- when the result is None,
+        stage["cnn_needed"] says whether the CNN embedding can still change
+        the decision, so callers can skip MobileNet otherwise.
+        """
+        if template is None or template.count < 1:
+            return ({
+                "status": "REJECTED",
+                "reason": "Biometric profile empty or corrupt.",
+                "confidence_score": 0.0
+            }, {}), None
+
         # Rule 3: Reject immediately if hand type differs
+        enrolled_hand_type = template.hand_type
         if current_hand_type and enrolled_hand_type and current_hand_type != enrolled_hand_type:
-             return {
+             return ({
                 "status": "REJECTED",
                 "reason": f"Skeletal Mismatch: Enrolled hand is {enrolled_hand_type}, but {current_hand_type} hand was detected.",
                 "confidence_score": 0.1
-            }, {}
+            }, {}), None
 
         # --- GEOMETRIC MATCHING (Dominant: 70%) ---
-        new_vec = np.array(new_geo).reshape(1, -1)
-        stored_vecs = np.array(stored_geo)
+        new_vec = np.asarray(new_geo, dtype=np.float64).reshape(-1)
 
         # Gate 0: Dimension Check
-        if stored_vecs.shape[1] != new_vec.shape[1]:
-            return "re-register", {}
+        if template.dim != new_vec.shape[0]:
+            return ("re-register", {}), None
+
+        new_unit = _unit(new_vec)
 
         # Gate 1: Individual Vector Consensus
-        geo_similarities = cosine_similarity(new_vec, stored_vecs)[0]
+        geo_similarities = template.geo_unit @ new_unit
         geo_top_3 = sorted(geo_similarities, reverse=True)[:3]
         
         # Gate 2: Centroid Check
-        centroid = np.mean(stored_vecs, axis=0).reshape(1, -1)
-        geo_centroid_sim = cosine_similarity(new_vec, centroid)[0][0]
+        geo_centroid_sim = float(template.centroid_unit @ new_unit)
 
         # Gate 3: Variance Gate
-        user_mean = np.mean(stored_vecs, axis=0)
-        user_std = np.std(stored_vecs, axis=0)
-        user_std = np.where(user_std < 0.01, 0.01, user_std)
-        z_scores = np.abs((new_geo - user_mean) / user_std)
+        z_scores = np.abs((new_vec - template.mean) / template.std)
         avg_z = np.mean(z_scores)
 
-        geo_score = float(geo_centroid_sim)
+        # 1. Geometric Consistency
+        # ENFORCED: Threshold 0.90 -> 0.95 | Z-score 3.5 -> 2.5
+        # This prevents "False Acceptance" of similar-sized hands.
+        geo_pass = (sum(1 for s in geo_top_3 if s >= 0.94) >= 2) and (geo_centroid_sim >= 0.95) and (avg_z < 2.5)
+
+        return None, {
+            "geo_score": float(geo_centroid_sim),
+            "avg_z": float(avg_z),
+            "geo_pass": geo_pass,
+            # A failed geometric gate rejects whatever the CNN says, and
+            # legacy templates have no CNN branch to compare against.
+            "cnn_needed": geo_pass and template.cnn_unit is not None
+        }
+
+    @staticmethod
+    @timed("fusion", outcome=lambda result: result[0]["status"].lower())
+    def fuse(stage, template, new_cnn=None):
+        """
+        CNN branch + score-level fusion after geometric_stage.
+        new_cnn may be None when stage["cnn_needed"] is False.
+        """
+        geo_score = stage["geo_score"]
+        cnn_available = new_cnn is not None and len(new_cnn) > 0
+        # The cascade left the embedding out because it could not change the decision
+        cnn_skipped = not cnn_available and not stage["cnn_needed"] and template.cnn_unit is not None
         
         # --- CNN MATCHING (Supportive: 30%) ---
         cnn_score = 0.0
         cnn_pass = False
         
-        if new_cnn and stored_cnn and len(stored_cnn) > 0:
-            new_cnn_vec = np.array(new_cnn).reshape(1, -1)
-            stored_cnn_vecs = np.array(stored_cnn)
-            
-            cnn_similarities = cosine_similarity(new_cnn_vec, stored_cnn_vecs)[0]
+        if cnn_available and template.cnn_unit is not None:
+            cnn_similarities = template.cnn_unit @ _unit(np.asarray(new_cnn, dtype=np.float32).reshape(-1))
             # Use max similarity for CNN (best match strategy)
             cnn_score = float(np.max(cnn_similarities))
             
             # CNN Pass Threshold (MobileNet features are usually robust)
             cnn_pass = cnn_score > 0.85
         else:
-            # Fallback if CNN features missing (Legacy users)
+            # Fallback if CNN features missing (Legacy users) or not computed
             cnn_score = geo_score 
             cnn_pass = True 
 
@@ -74,14 +137,9 @@ class Matcher:
         final_score = (0.7 * geo_score) + (0.3 * cnn_score)
 
         # --- DECISION LOGIC ---
-        # 1. Geometric Consistency
-        # ENFORCED: Threshold 0.90 -> 0.95 | Z-score 3.5 -> 2.5
-        # This prevents "False Acceptance" of similar-sized hands.
-        geo_pass = (sum(1 for s in geo_top_3 if s >= 0.94) >= 2) and (geo_centroid_sim >= 0.95) and (avg_z < 2.5)
-        
         # 2. Final Verified Status (ENFORCED: 0.88 -> 0.93)
         # 93% is the "Gold Standard" for production biometric systems with these feature sets.
-        is_verified = geo_pass and cnn_pass and (final_score > 0.93)
+        is_verified = stage["geo_pass"] and cnn_pass and (final_score > 0.93)
 
         reason = "Hybrid Identity Confirmed." if is_verified else "Identity Verification Failed."
         if not is_verified:
@@ -102,12 +160,12 @@ class Matcher:
             "geo_score": geo_score,
             "cnn_score": cnn_score,
             "final_score": final_score,
-            "avg_z_score": float(avg_z),
-            "cnn_available": bool(new_cnn)
+            "avg_z_score": stage["avg_z"],
+            "cnn_available": cnn_available,
+            "cnn_skipped": cnn_skipped
         }
 
-        print(f"--- HYBRID SECURITY AUDIT ---")
-        print(f"Geo: {geo_score:.4f} | CNN: {cnn_score:.4f} | Final: {final_score:.4f}")
-        print(f"Result: {result['status']}")
+        # Hybrid security audit: one structured record per decision
+        log.debug("Hybrid match decision", status=result["status"], **telemetry)
 
         return result, telemetry
@@ -0,0 +1,74 @@
+import os
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from backend.app.utils.metrics import timed
+
+load_dotenv()
+
+# Longest side of the low-resolution proxy all quality metrics are computed on
+QUALITY_PROXY_SIZE = int(os.getenv("QUALITY_PROXY_SIZE", 320))
+# Mean brightness (HSV value, 0-255) bounds
+QUALITY_MIN_BRIGHTNESS = float(os.getenv("QUALITY_MIN_BRIGHTNESS", 40))
+QUALITY_MAX_BRIGHTNESS = float(os.getenv("QUALITY_MAX_BRIGHTNESS", 250))
+# Laplacian variance on the proxy. Downscaling drops the finest detail, so the
+# scale differs from the previous full-frame CV_64F variance: on 640x480
+# captures its threshold of 20 corresponds to roughly 200-250 here.
+QUALITY_BLUR_THRESHOLD = float(os.getenv("QUALITY_BLUR_THRESHOLD", 220))
+# Share of saturated pixels (value >= 250) that counts as glare
+QUALITY_GLARE_RATIO = float(os.getenv("QUALITY_GLARE_RATIO", 0.25))
+
+class QualityReport:
+    """Numeric quality metrics for a frame plus the user-facing issue strings."""
+    def __init__(self, brightness, blur, glare, issues):
+        self.brightness = brightness
+        self.blur = blur
+        self.glare = glare
+        self.issues = issues
+
+    @property
+    def metrics(self):
+        return {"brightness": self.brightness, "blur": self.blur, "glare": self.glare}
+
+class QualityAnalyzer:
+    """
+    Brightness, blur and glare from one downsampled 8-bit proxy instead of
+    full-frame HSV + CV_64F Laplacian passes. The proxy is built with
+    INTER_AREA, the value channel is an integer max over B/G/R and the
+    Laplacian runs in CV_16S.
+    """
+    def __init__(self, proxy_size=QUALITY_PROXY_SIZE):
+        self.proxy_size = proxy_size
+
+    def proxy(self, img):
+        h, w = img.shape[:2]
+        scale = self.proxy_size / max(h, w)
+        if scale >= 1:
+            return img
+        return cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+    @timed("quality")
+    def analyze(self, img):
+        small = self.proxy(img)
+        issues = []
+
+        # 1. Brightness (HSV value channel == max(B, G, R)) and glare
+        blue, green, red = cv2.split(small)
+        value = cv2.max(cv2.max(blue, green), red)
+        brightness = float(cv2.mean(value)[0])
+        glare = cv2.countNonZero(cv2.compare(value, 250, cv2.CMP_GE)) / value.size
+
+        if brightness < QUALITY_MIN_BRIGHTNESS:
+            issues.append("Lighting is too dark. Increase brightness.")
+        elif brightness > QUALITY_MAX_BRIGHTNESS or glare > QUALITY_GLARE_RATIO:
+            issues.append("Too much glare. Avoid direct light.")
+
+        # 2. Blur (variance of the integer Laplacian)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))[1][0, 0]
+        blur = float(std * std)
+
+        if blur < QUALITY_BLUR_THRESHOLD:
+            issues.append("Image is blurry. Please hold steady.")
+
+        return QualityReport(brightness, blur, float(glare), issues)
@@ -0,0 +1,69 @@
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from backend.app.biometric.hand_detector import HandDetector
+from backend.app.biometric.feature_extractor import FeatureExtractor
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Run one dummy inference per model at startup so the first real request
+# after a deploy doesn't pay for graph initialisation.
+BIOMETRIC_WARMUP = os.getenv("BIOMETRIC_WARMUP", "true").lower() == "true"
+
+_lock = threading.Lock()
+_detector = None
+_extractor = None
+
+def get_detector():
+    """Process-wide HandDetector, created on first use."""
+    global _detector
+    if _detector is None:
+        with _lock:
+            if _detector is None:
+                _detector = HandDetector(mode=True)
+    return _detector
+
+def get_extractor():
+    """Process-wide MobileNetV2 FeatureExtractor, created on first use."""
+    global _extractor
+    if _extractor is None:
+        with _lock:
+            if _extractor is None:
+                _extractor = FeatureExtractor()
+    return _extractor
+
+# Pool entry points: the model is resolved (and loaded on first use) inside
+# the run_inference thread, never on the event loop.
+
+def analyze(img, check_quality=True):
+    """HandDetector.analyze on the shared detector. Call through run_inference."""
+    return get_detector().analyze(img, check_quality=check_quality)
+
+def extract_cnn_features(image_np, landmarks=None):
+    """FeatureExtractor.extract_cnn_features on the shared extractor. Call through run_inference."""
+    return get_extractor().extract_cnn_features(image_np, landmarks)
+
+def extract_cnn_features_batch(images, landmarks=None):
+    """FeatureExtractor.extract_cnn_features_batch on the shared extractor. Call through run_inference."""
+    return get_extractor().extract_cnn_features_batch(images, landmarks)
+
+def create_tracker():
+    """
+    Per-stream HandDetector in VIDEO (tracking) mode.
+    Not shared: tracking state belongs to one frame sequence.
+    """
+    return HandDetector(mode=True, video=True)
+
+def warm_up():
+    """
+    Load every biometric model and push a blank frame through it.
+    Called from the app lifespan so the worker only accepts traffic once ready.
+    """
+    dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+    get_detector().analyze(dummy)
+    get_extractor().extract_cnn_features(dummy)
+    log.info("Biometric models loaded and warmed up")
@@ -1,57 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-import cv2
-import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Query
+import asyncio
 import base64
+import os
 from backend.app.database.mongo import get_db
-from backend.app.biometric.hand_detector import HandDetector
 from backend.app.biometric.feature_extractor import FeatureExtractor
+from backend.app.biometric import registry
+from backend.app.biometric.executor import run_inference
+from backend.app.biometric.ingest import decode_upload, ImageRejected
+from backend.app.biometric.batcher import get_batcher
 from backend.app.biometric.matcher import Matcher
-from backend.app.auth.utils import get_current_user
+from backend.app.biometric.index import palm_index
+from backend.app.biometric.stream import StreamSession, STREAM_MAX_CONCURRENT
+from backend.app.biometric.enrollment import run_enrollment, ENROLLMENT_MIN_SAMPLES
+from backend.app.biometric.template import CNN_STORAGE_DTYPE
+from backend.app.biometric.template_cache import template_cache, template_version, load_template
+from backend.app.utils.security import encrypt_template
+from backend.app.auth.utils import get_current_user, get_user_from_token, verify_terminal_key
+from backend.app.utils.audit_logger import AuditLogger
+from backend.app.utils.log_writer import write_log
+from backend.app.utils import rollups, events
+from backend.app.utils.logger import get_logger
 from bson import ObjectId
+from datetime import datetime
 
 router = APIRouter(prefix="/biometric", tags=["biometric"])
-detector = HandDetector(mode=True)
+log = get_logger(__name__)
+# Streams currently open in this worker (see STREAM_MAX_CONCURRENT)
+_open_streams = 0
+
+async def log_verification(db, entry):
+    """Append a verification_logs entry, count it in the stats rollups and publish it."""
+    entry.setdefault("_id", ObjectId())
+    await write_log(db, "verification_logs", entry)
+    await rollups.record_verification(db, entry["status"], entry["timestamp"])
+    events.publish("verification", entry)
+
+# Best identification match must beat the runner-up by this much, or it is treated as ambiguous
+IDENTIFY_MIN_MARGIN = float(os.getenv("IDENTIFY_MIN_MARGIN", 0.01))
 
 @router.post("/register-hand")
 async def register_hand(images: list[UploadFile] = File(...), current_user = Depends(get_current_user), db = Depends(get_db)):
-    if len(images) < 5:
+    if len(images) < ENROLLMENT_MIN_SAMPLES:
         raise HTTPException(status_code=400, detail="Minimum 5 hand images required for high-security enrollment")
     
-    vectors = []
-    hand_types = []
-    
-    for image_file in images:
-        contents = await image_file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            continue
+    contents_list = [await image_file.read() for image_file in images]
+    enrollment = await run_enrollment(contents_list)
             
-        detector.find_hands(img)
-        landmarks, h_type = detector.find_position(img)
-        
-        if landmarks and h_type:
-            features = FeatureExtractor.extract_features(landmarks)
-            if features:
-                vectors.append(features)
-                hand_types.append(h_type)
-            
-    if len(vectors) < 5:
-        raise HTTPException(status_code=400, detail=f"Could not capture 5 valid hand samples. Landmarks detected in {len(vectors)} images.")
+    if enrollment.accepted < ENROLLMENT_MIN_SAMPLES:
+        raise HTTPException(status_code=400, detail={
+            "message": f"Could not capture {ENROLLMENT_MIN_SAMPLES} valid hand samples. Landmarks detected in {enrollment.accepted} images.",
+            "rejections": enrollment.rejections
+        })
 
+    hand_types = enrollment.hand_types
     if len(set(hand_types)) > 1:
         raise HTTPException(status_code=400, detail="Inconsistent hand types. Use only one hand for all samples (left or right).")
         
+    # Rewrite geometry and CNN together so the profile never mixes enrollments
+    user_id = str(current_user["_id"])
+    updated_at = datetime.utcnow()
+    template_cache.invalidate(user_id)
     await db.biometrics.update_one(
-        {"user_id": str(current_user["_id"])},
+        {"user_id": user_id},
         {"$set": {
-            "feature_vectors": vectors,
+            "feature_vectors": encrypt_template(enrollment.feature_vectors), # AES-256 Encrypted
+            "cnn_features": encrypt_template(enrollment.cnn_vectors, CNN_STORAGE_DTYPE), # AES-256 Encrypted
             "hand_type": hand_types[0],
-            "updated_at": ObjectId().generation_time
+            "cnn_preprocess": enrollment.cnn_preprocess,
+            "updated_at": updated_at
         }},
         upsert=True
     )
+    template = enrollment.compile()
+    version = template_version({"updated_at": updated_at})
+    template_cache.put(user_id, version, template)
+    palm_index.upsert(user_id, version, template)
     
     return {"message": "Hand biometrics registered successfully"}
 
@@ -62,40 +85,37 @@ async def verify_hand(
     db = Depends(get_db)
 ):
     try:
-        print(f"DEBUG: Starting hand verification for user {current_user['email']}")
+        log.debug("Starting hand verification", email=current_user["email"])
         
         # 1. Fetch biometric data
-        biometric_data = await db.biometrics.find_one({"user_id": str(current_user["_id"])})
-        if not biometric_data:
-            print(f"DEBUG: No biometric data found for user {current_user['email']}")
+        template = await load_template(db, str(current_user["_id"]))
+        if template is None:
+            log.debug("No biometric profile", email=current_user["email"])
             raise HTTPException(status_code=404, detail="Biometric profile not found. Please register your hand first.")
 
         # 2. Read and decode image
         contents = await image.read()
-        if not contents:
-            raise HTTPException(status_code=400, detail="Empty image file received")
-            
-        print(f"DEBUG: Received image, size: {len(contents)} bytes")
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            print("DEBUG: OpenCV failed to decode image")
-            raise HTTPException(status_code=400, detail="Invalid image format or corrupted file")
+        log.debug("Received image", bytes=len(contents))
+        try:
+            img, decode_info = await run_inference(decode_upload, contents)
+        except ImageRejected as e:
+            log.debug("Image rejected before matching", reason=str(e))
+            raise HTTPException(status_code=400, detail=str(e))
+        log.debug("Decoded upload", scale=decode_info["scale"], decode_ms=round(decode_info["decode_ms"], 1))
 
         # 3. Detect Landmarks
         try:
-            detector.find_hands(img)
-            landmarks, h_type = detector.find_position(img)
-        except Exception as e:
-            print(f"DEBUG: Hand detector crash: {str(e)}")
+            analysis = await run_inference(registry.analyze, img, check_quality=False)
+            landmarks, h_type = analysis.landmarks, analysis.hand_type
+        except Exception:
+            log.exception("Hand detector crash")
             raise HTTPException(status_code=500, detail="Internal hand detection error")
         
         if not landmarks:
-            print("DEBUG: No hand landmarks detected in image")
+            log.debug("No hand landmarks detected")
             raise HTTPException(status_code=422, detail="Hand not detected. Please ensure your hand is clearly visible.")
             
-        print(f"DEBUG: Detected {len(landmarks)} landmarks")
+        log.debug("Detected landmarks", count=len(landmarks))
 
         # 4. Extract and Match Features
         try:
@@ -103,10 +123,13 @@ async def verify_hand(
             if not new_vector:
                  raise HTTPException(status_code=422, detail="Could not extract reliable biometric features.")
                  
-            is_verified, score = Matcher.verify(new_vector, biometric_data["feature_vectors"])
+            match_result, _ = await run_inference(Matcher.verify_compiled, new_vector, template, None, h_type)
+            if match_result == "re-register":
+                raise HTTPException(status_code=400, detail="Security update: Biometric profile outdated. Please re-register.")
+
             # Ensure native Python types for JSON serialization
-            is_verified = bool(is_verified)
-            score = float(score)
+            is_verified = match_result["status"] == "VERIFIED"
+            score = float(match_result["confidence_score"])
             
             # Log the verification attempt for the dashboard
             log_data = {
@@ -117,17 +140,19 @@ async def verify_hand(
                 "score": score,
                 "timestamp": ObjectId().generation_time
             }
-            await db.verification_logs.insert_one(log_data)
+            await log_verification(db, log_data)
             
-            print(f"DEBUG: Verification Result: {is_verified} (Score: {score:.4f})")
+            log.info("Verification result", email=current_user["email"], verified=is_verified, score=round(score, 4))
             
             return {
                 "verified": is_verified,
                 "score": score,
                 "message": "Verification successful" if is_verified else "Verification failed: Biometric mismatch"
             }
-        except Exception as e:
-            print(f"DEBUG: Matching error: {str(e)}")
+        except HTTPException:
+            raise
+        except Exception:
+            log.exception("Matching error")
             raise HTTPException(status_code=500, detail="Error during biometric comparison")
 
     except HTTPException as e:
@@ -140,10 +165,176 @@ async def verify_hand(
             "detail": e.detail,
             "timestamp": ObjectId().generation_time
         }
-        await db.verification_logs.insert_one(log_data)
+        await log_verification(db, log_data)
         raise e
-    except Exception as e:
-        print(f"DEBUG: UNEXPECTED ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        log.exception("Unexpected verification error")
         raise HTTPException(status_code=500, detail="A server-side error occurred during verification")
+
+@router.websocket("/stream")
+async def verify_stream(websocket: WebSocket, token: str = Query(None), db = Depends(get_db)):
+    """
+    Streaming 1:1 verification. The client sends encoded frames (binary
+    messages, one at a time, waiting for each reply) and receives JSON:
+    {"type": "feedback"|"progress"} while the server gathers good frames,
+    then one {"type": "result"} before the socket is closed.
+    Auth: the JWT is passed as ?token= since browsers can't set headers here.
+    """
+    global _open_streams
+    current_user = await get_user_from_token(token, db) if token else None
+    if current_user is None:
+        await websocket.close(code=1008)
+        return
+    if _open_streams >= STREAM_MAX_CONCURRENT:
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+
+    _open_streams += 1
+    try:
+        await _run_stream(websocket, db, current_user)
+    finally:
+        _open_streams -= 1
+
+async def _run_stream(websocket, db, current_user):
+    await websocket.accept()
+    template = await load_template(db, str(current_user["_id"]))
+    if template is None:
+        await websocket.send_json({"type": "error", "message": "Biometric profile not found. Please register your hand first."})
+        await websocket.close()
+        return
+
+    log.debug("Starting stream verification", email=current_user["email"])
+    tracker = await run_inference(registry.create_tracker)
+    session = StreamSession(template, tracker)
+    result = None
+    try:
+        while result is None:
+            # A client that goes quiet still times out
+            try:
+                data = await asyncio.wait_for(websocket.receive_bytes(), session.remaining)
+            except asyncio.TimeoutError:
+                result = session.timeout()
+                await websocket.send_json(result)
+                break
+            except KeyError:
+                # Text message: receive_bytes finds no "bytes" key
+                await websocket.send_json({"type": "error", "message": "Frames must be sent as binary messages."})
+                continue
+            message = await session.process(data)
+            if message["type"] != "result" and session.timed_out:
+                message = session.timeout()
+            if message["type"] == "result":
+                result = message
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        log.debug("Stream closed by client", frames=session.frames)
+    finally:
+        await run_inference(tracker.close)
+
+    if result is None:
+        return
+
+    log.info("Stream result", email=current_user["email"], status=result["status"], frames=session.frames, good_frames=session.good_frames)
+    await log_verification(db, {
+        "user_id": str(current_user["_id"]),
+        "user_email": current_user["email"],
+        "type": "biometric_verification",
+        "mode": "stream",
+        "status": "success" if result["verified"] else "failed",
+        "score": result["score"],
+        "frames": session.frames,
+        "timestamp": ObjectId().generation_time
+    })
+    await websocket.close()
+
+def _verify_candidates(new_vector, candidates, templates, cnn_by_mode, hand_type):
+    # Full Matcher decision gates for every shortlisted user
+    verified = []
+    for (user_id, mode, _), template in zip(candidates, templates):
+        result, _ = Matcher.verify_compiled(new_vector, template, cnn_by_mode.get(mode), hand_type)
+        if result != "re-register" and result["status"] == "VERIFIED":
+            verified.append((result["confidence_score"], user_id))
+    verified.sort(reverse=True)
+    return verified
+
+@router.post("/identify")
+async def identify_hand(
+    image: UploadFile = File(...),
+    terminal = Depends(verify_terminal_key),
+    db = Depends(get_db)
+):
+    """
+    1:N identification for "pay by palm" terminals (no prior login).
+    Shortlists candidates from the in-memory palm index, then applies the
+    same Matcher gates as 1:1 verification to each of them.
+    """
+    # 1. Keep the index in step with enrollments
+    await palm_index.ensure_fresh(db)
+
+    # 2. Decode + quality + landmarks
+    contents = await image.read()
+    try:
+        img, _ = await run_inference(decode_upload, contents)
+    except ImageRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    analysis = await run_inference(registry.analyze, img)
+    if not analysis.is_good:
+        raise HTTPException(status_code=422, detail={"message": "Image quality issues detected.", "issues": analysis.issues})
+    landmarks, h_type = analysis.landmarks, analysis.hand_type
+    if not landmarks or not h_type:
+        raise HTTPException(status_code=422, detail="Hand not detected")
+
+    new_vector = FeatureExtractor.extract_features(landmarks)
+    if not new_vector:
+        raise HTTPException(status_code=422, detail="Could not extract reliable biometric features.")
+
+    # 3. Embed the probe once per CNN preprocessing used by enrolled templates of this hand
+    modes = sorted(palm_index.preprocess_modes(h_type))
+    embeddings = await asyncio.gather(*[get_batcher().embed(img, landmarks if mode == "roi" else None) for mode in modes])
+    cnn_by_mode = {mode: emb for mode, emb in zip(modes, embeddings) if emb}
+
+    # 4. Shortlist + Matcher gates
+    candidates = palm_index.search(h_type, new_vector, cnn_by_mode)
+    templates = await asyncio.gather(*[load_template(db, user_id) for user_id, _, _ in candidates])
+    verified = await run_inference(_verify_candidates, new_vector, candidates, templates, cnn_by_mode, h_type)
+
+    identified = None
+    reason = "No enrolled palm matched."
+    if verified:
+        best_score, best_user = verified[0]
+        if len(verified) > 1 and best_score - verified[1][0] < IDENTIFY_MIN_MARGIN:
+            reason = "Ambiguous match. Please use your registered account to pay."
+        else:
+            identified = best_user
+            reason = "Palm identified."
+
+    log.info("Identification result", candidates=len(candidates), identified=identified, passed_gates=len(verified))
+    score = float(verified[0][0]) if verified else 0.0
+    await log_verification(db, {
+        "user_id": identified or "anonymous",
+        "type": "biometric_identification",
+        "status": "success" if identified else "failed",
+        "score": score,
+        "candidates": len(candidates),
+        "timestamp": ObjectId().generation_time
+    })
+    # A successful identification authorises a payment: make it durable before answering
+    await AuditLogger.log_event(db, identified, "biometric_identification", "SUCCESS" if identified else "FAILED", {
+        "score": score,
+        "candidates": len(candidates),
+        "reason": reason
+    }, critical=bool(identified))
+
+    if not identified:
+        raise HTTPException(status_code=401, detail={"message": "Palm identification failed", "reason": reason})
+
+    user = await db.users.find_one({"_id": ObjectId(identified)}, {"name": 1})
+    return {
+        "identified": True,
+        "user_id": identified,
+        "name": user.get("name") if user else None,
+        "confidence_score": score,
+        "message": reason
+    }
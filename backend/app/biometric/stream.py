@@ -0,0 +1,131 @@
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+from backend.app.biometric.feature_extractor import FeatureExtractor
+from backend.app.biometric.executor import run_inference
+from backend.app.biometric.ingest import decode_upload, ImageRejected
+from backend.app.biometric.batcher import get_batcher
+from backend.app.biometric.matcher import Matcher
+
+load_dotenv()
+
+# Consecutive verified frames needed before the stream is accepted
+STREAM_ACCEPT_FRAMES = int(os.getenv("STREAM_ACCEPT_FRAMES", 3))
+# Good-quality frames that may fail matching before the stream is rejected
+STREAM_REJECT_FRAMES = int(os.getenv("STREAM_REJECT_FRAMES", 5))
+# Give up after this many frames / seconds without a decision
+STREAM_MAX_FRAMES = int(os.getenv("STREAM_MAX_FRAMES", 90))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", 30))
+# Open streams per worker (each holds a VIDEO-mode tracker); more are refused
+STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", 16))
+
+class StreamSession:
+    """
+    Verification state for one WebSocket frame stream.
+    Frames go through a per-stream VIDEO-mode landmarker (tracking instead
+    of a full palm detection per frame), quality gating and the cascaded
+    matcher; per-frame scores are fused until the decision is confident.
+    """
+    def __init__(self, template, tracker):
+        self.template = template
+        self.tracker = tracker
+        self.frames = 0
+        self.good_frames = 0
+        self.failed_frames = 0
+        self.streak = []  # scores of the current run of verified frames
+        self.scores = []
+        self.started = time.monotonic()
+        self._last_ts = -1
+
+    def _timestamp(self):
+        # detect_for_video needs strictly increasing timestamps
+        ts = max(int((time.monotonic() - self.started) * 1000), self._last_ts + 1)
+        self._last_ts = ts
+        return ts
+
+    @property
+    def timed_out(self):
+        return self.frames >= STREAM_MAX_FRAMES or time.monotonic() - self.started > STREAM_MAX_SECONDS
+
+    @property
+    def remaining(self):
+        """Seconds left before the session times out."""
+        return max(0.0, STREAM_MAX_SECONDS - (time.monotonic() - self.started))
+
+    def _feedback(self, message, issues=None, metrics=None):
+        feedback = {"type": "feedback", "message": message, "issues": issues or [], "frames": self.frames}
+        if metrics:
+            feedback["metrics"] = metrics
+        return feedback
+
+    def _result(self, status, message, score):
+        return {
+            "type": "result",
+            "status": status,
+            "verified": status == "VERIFIED",
+            "score": float(score),
+            "message": message,
+            "frames": self.frames,
+            "good_frames": self.good_frames
+        }
+
+    def timeout(self):
+        score = np.mean(self.scores) if self.scores else 0.0
+        return self._result("REJECTED", "No confident match before the stream timed out. Please try again.", score)
+
+    async def process(self, data):
+        """Handle one encoded frame. Returns the message to send back."""
+        self.frames += 1
+
+        # 1. Decode
+        try:
+            img, _ = await run_inference(decode_upload, data)
+        except ImageRejected as e:
+            return self._feedback(str(e))
+
+        # 2. Track + quality gate on the server
+        analysis = await run_inference(self.tracker.analyze, img, timestamp_ms=self._timestamp())
+        if not analysis.landmarks:
+            return self._feedback("Show your open palm to the camera.")
+        if not analysis.is_good:
+            return self._feedback(analysis.issues[0], analysis.issues, analysis.metrics)
+
+        new_vector = FeatureExtractor.extract_features(analysis.landmarks)
+        if not new_vector:
+            return self._feedback("Spread your fingers and hold steady.")
+
+        # 3. Cascaded match (CNN only when it can change the decision)
+        early_result, stage = Matcher.geometric_stage(new_vector, self.template, analysis.hand_type)
+        if early_result is not None:
+            match_result, _ = early_result
+            if match_result == "re-register":
+                return self._result("RE-REGISTER", "Security update: Biometric profile outdated. Please re-register.", 0.0)
+        else:
+            new_cnn = None
+            if stage["cnn_needed"]:
+                roi = self.template.cnn_preprocess == "roi"
+                new_cnn = await get_batcher().embed(img, analysis.landmarks if roi else None)
+            match_result, _ = Matcher.fuse(stage, self.template, new_cnn)
+
+        # 4. Fuse over frames
+        self.good_frames += 1
+        score = match_result["confidence_score"]
+        self.scores.append(score)
+        if match_result["status"] == "VERIFIED":
+            self.streak.append(score)
+        else:
+            self.streak = []
+            self.failed_frames += 1
+
+        if len(self.streak) >= STREAM_ACCEPT_FRAMES:
+            return self._result("VERIFIED", "Hybrid Identity Confirmed.", np.mean(self.streak))
+        if self.failed_frames >= STREAM_REJECT_FRAMES:
+            return self._result("REJECTED", match_result["reason"], np.mean(self.scores))
+        return {
+            "type": "progress",
+            "message": "Hold steady..." if self.streak else match_result["reason"],
+            "frames": self.frames,
+            "good_frames": self.good_frames,
+            "score": float(score)
+        }
@@ -0,0 +1,68 @@
+import numpy as np
+from backend.app.utils.security import decode_template, encrypt_template
+
+# Storage precision inside the encrypted envelope. CNN embeddings are
+# cosine-compared after normalization, so float16 is plenty for them.
+GEO_STORAGE_DTYPE = np.float32
+CNN_STORAGE_DTYPE = np.float16
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return (matrix / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+
+class CompiledTemplate:
+    """
+    Matcher-ready form of an enrolled profile.
+    Everything Matcher.verify used to rebuild per call (row norms, centroid,
+    per-dimension mean/std for the z-score gate, CNN norms) is computed once,
+    so verification is a couple of small matrix-vector products.
+    """
+    def __init__(self, geo, cnn=None, hand_type=None, cnn_preprocess=None):
+        geo = np.asarray(geo, dtype=np.float64)
+        self.count = geo.shape[0]
+        self.dim = geo.shape[1]
+
+        # Geometric branch
+        self.geo_unit = _unit_rows(geo)
+        self.mean = geo.mean(axis=0)
+        self.centroid_unit = _unit_rows(self.mean)
+        std = geo.std(axis=0)
+        self.std = np.where(std < 0.01, 0.01, std)
+
+        # CNN branch (absent for legacy profiles)
+        self.cnn_unit = None
+        if cnn is not None and len(cnn) > 0:
+            self.cnn_unit = _unit_rows(np.asarray(cnn, dtype=np.float32))
+
+        self.hand_type = hand_type
+        self.cnn_preprocess = cnn_preprocess
+
+    @staticmethod
+    def from_record(record, upgrades=None):
+        """
+        Build from a db.biometrics document, decrypting stored vectors
+        (binary envelope or legacy JSON). If `upgrades` is a dict, legacy
+        fields are re-encoded into it in the binary format for write-back,
+        and the template is compiled from what that write-back will decode
+        to, so it matches every later load of the migrated record.
+        """
+        fields = {}
+        for field, dtype in (("feature_vectors", GEO_STORAGE_DTYPE), ("cnn_features", CNN_STORAGE_DTYPE)):
+            value = record.get(field)
+            if isinstance(value, str):
+                value, version = decode_template(value)
+                if version == 0 and value is not None and upgrades is not None:
+                    upgrades[field] = encrypt_template(value, dtype)
+                    value, _ = decode_template(upgrades[field])
+            fields[field] = value
+        geo, cnn = fields["feature_vectors"], fields["cnn_features"]
+        if geo is None or len(geo) == 0:
+            return None
+        return CompiledTemplate(geo, cnn, record.get("hand_type"), record.get("cnn_preprocess"))
+
+    @property
+    def nbytes(self):
+        arrays = [self.geo_unit, self.mean, self.centroid_unit, self.std]
+        if self.cnn_unit is not None:
+            arrays.append(self.cnn_unit)
+        return sum(a.nbytes for a in arrays)
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from backend.app.utils.logger import get_logger
+from backend.app.biometric.template import CompiledTemplate
+from backend.app.biometric.executor import run_inference
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+TEMPLATE_CACHE_MAX_BYTES = int(os.getenv("TEMPLATE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+TEMPLATE_CACHE_TTL_SECONDS = float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", 900))
+# Rewrite legacy JSON-encoded templates to the binary envelope when they are read
+TEMPLATE_MIGRATE_ON_READ = os.getenv("TEMPLATE_MIGRATE_ON_READ", "true").lower() == "true"
+
+# Only the small fields needed to validate a cached entry
+_META_PROJECTION = {"updated_at": 1, "created_at": 1}
+
+def template_version(record):
+    """
+    Version key of a biometrics document: its updated_at (or created_at),
+    normalized to naive UTC with millisecond precision as Mongo stores it.
+    """
+    value = record.get("updated_at") or record.get("created_at")
+    if not isinstance(value, datetime):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+class TemplateCache:
+    """
+    Per-process LRU + TTL cache of compiled templates keyed by user_id.
+    An entry is only served while its version matches the stored record,
+    so a re-enrollment on any worker invalidates it.
+    """
+    def __init__(self, max_bytes=TEMPLATE_CACHE_MAX_BYTES, ttl=TEMPLATE_CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (version, template, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version or entry[2] < time.monotonic():
+                if entry is not None:
+                    self._drop(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, version, template):
+        if template is None or template.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(user_id)
+            self._entries[user_id] = (version, template, time.monotonic() + self.ttl)
+            self._bytes += template.nbytes
+            # Evict least recently used entries until under the memory cap
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._drop(user_id)
+
+    def _drop(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry[1].nbytes
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+template_cache = TemplateCache()
+
+async def load_template(db, user_id):
+    """
+    Compiled template for a user, or None if not enrolled.
+    Hits cost one small projected find_one; only misses fetch and decrypt
+    the full record.
+    """
+    meta = await db.biometrics.find_one({"user_id": user_id}, _META_PROJECTION)
+    if not meta:
+        return None
+
+    version = template_version(meta)
+    template = template_cache.get(user_id, version)
+    if template is not None:
+        return template
+
+    record = await db.biometrics.find_one({"_id": meta["_id"]})
+    if not record:
+        return None
+    upgrades = {} if TEMPLATE_MIGRATE_ON_READ else None
+    template = await run_inference(CompiledTemplate.from_record, record, upgrades)
+    if upgrades:
+        await migrate_record(db, record, upgrades)
+    template_cache.put(user_id, template_version(record), template)
+    return template
+
+async def migrate_record(db, record, upgrades):
+    """
+    Write re-encoded template fields back to the biometrics document.
+    Guarded on the old ciphertexts so a concurrent re-enrollment is never
+    overwritten; updated_at is left alone since the vectors are unchanged.
+    """
+    guard = {"_id": record["_id"]}
+    for field in upgrades:
+        guard[field] = record[field]
+    result = await db.biometrics.update_one(guard, {"$set": upgrades})
+    if result.modified_count:
+        log.debug("Migrated template to binary format", user_id=record.get("user_id"), fields=list(upgrades))
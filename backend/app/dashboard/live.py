@@ -0,0 +1,215 @@
+"""
+Server-push feed for the user and admin dashboards.
+
+Viewers connect over WebSocket (/dashboard/live, /admin/live) and receive
+JSON messages instead of polling the REST endpoints:
+
+    {"type": "activity", "item": <activity-feed entry>}     dashboard
+    {"type": "payment",  "item": <payments row>}            dashboard
+    {"type": "metrics",  "metrics": {..}, "biometric_stats": {..}}   dashboard
+    {"type": "alert",    "item": <audit_logs entry>}        admin
+    {"type": "stats",    "data": <admin stats>}             admin
+    {"type": "resync"}   the viewer fell behind; refetch over REST
+
+Activity, payment and alert messages are built once per event from the
+event bus (utils/events.py) and fanned out to every viewer. Metrics and
+stats are recomputed from the rollups at most once per
+LIVE_METRICS_INTERVAL_MS after an event (and every LIVE_RESYNC_SECONDS
+regardless, which also picks up writes served by other workers), then
+fanned out the same way. Events are per process: with several workers a
+viewer only sees the activity of the worker it is connected to, and the
+clients' slow REST refresh fills the gaps.
+"""
+import asyncio
+import contextvars
+import os
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from fastapi import WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from backend.app.utils import events, rollups
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Minimum gap between two metric recomputations while events keep arriving
+LIVE_METRICS_INTERVAL_MS = float(os.getenv("LIVE_METRICS_INTERVAL_MS", 1000))
+# Metrics are re-sent at least this often, even without local events
+LIVE_RESYNC_SECONDS = float(os.getenv("LIVE_RESYNC_SECONDS", 30))
+# Messages buffered per viewer; a slower viewer is told to resync instead
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", 256))
+
+DASHBOARD_TOPICS = frozenset({"activity", "payment", "metrics"})
+ADMIN_TOPICS = frozenset({"alert", "stats"})
+
+def _isoformat(at):
+    # Live documents may carry aware datetimes; stored ones come back naive UTC
+    at = at or datetime.utcnow()
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at.isoformat()
+
+def verification_activity(v):
+    """Activity-feed entry for a verification_logs document."""
+    return {
+        "id": str(v["_id"]),
+        "event_type": f"BIOMETRIC_{v['status'].upper()}",
+        "status": v["status"].upper(),
+        "details": {"message": v.get("detail", "Auth attempt registered")},
+        "timestamp": _isoformat(v["timestamp"])
+    }
+
+def payment_activity(p, email):
+    """Activity-feed entry for a payments document."""
+    return {
+        "id": str(p["_id"]),
+        "event_type": "PAYMENT_TRANSACTION",
+        "status": p.get("payment_status", "PENDING").upper(),
+        "details": {"message": f"Secured transaction for {email}"},
+        "amount": p.get("amount", 0),
+        "timestamp": _isoformat(p.get("created_at"))
+    }
+
+def payment_row(p, email):
+    """/dashboard/payments row for a payments document."""
+    return {
+        "id": str(p["_id"]),
+        "email": email,
+        "amount": p["amount"],
+        "biometric_verified": p.get("biometric_verified", False),
+        "status": p.get("payment_status", "PENDING").upper(),
+        "timestamp": _isoformat(p.get("created_at")),
+        "details": p.get("details", {})
+    }
+
+class Viewer:
+    def __init__(self, topics):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.behind = False
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.behind = True
+
+    def resync(self):
+        # Drop the backlog; the client refetches everything over REST
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.behind = False
+        return {"type": "resync"}
+
+class LiveFeed:
+    def __init__(self):
+        self.viewers = set()
+        self.db = None
+        self._dirty = None
+        self._ticker = None
+
+    def on_event(self, topic, payload):
+        """Event bus callback: fan the event out and schedule a metrics refresh."""
+        if self.viewers:
+            for message in self._messages(topic, payload):
+                self.broadcast(message)
+            self._dirty.set()
+
+    def _messages(self, topic, payload):
+        if topic == "payment":
+            payment, email = payload["payment"], payload["email"]
+            yield {"type": "activity", "item": payment_activity(payment, email)}
+            yield {"type": "payment", "item": payment_row(payment, email)}
+        elif topic == "verification":
+            yield {"type": "activity", "item": verification_activity(payload)}
+        elif topic == "audit" and payload.get("status") in rollups.INCIDENT_STATUSES:
+            # Same shape as /admin/alerts
+            yield {"type": "alert", "item": jsonable_encoder({**payload, "_id": str(payload["_id"])})}
+
+    def broadcast(self, message):
+        for viewer in list(self.viewers):
+            if message["type"] in viewer.topics:
+                viewer.push(message)
+
+    def connect(self, db, topics):
+        viewer = Viewer(topics)
+        self.viewers.add(viewer)
+        self.db = db
+        if self._dirty is None:
+            self._dirty = asyncio.Event()
+        # New viewer gets fresh figures right away
+        self._dirty.set()
+        if self._ticker is None or self._ticker.done():
+            # Fresh context: the ticker outlives the connection that started it
+            self._ticker = contextvars.Context().run(asyncio.create_task, self._run())
+        return viewer
+
+    def disconnect(self, viewer):
+        self.viewers.discard(viewer)
+
+    async def _run(self):
+        while self.viewers:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), LIVE_RESYNC_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+            try:
+                await self._publish_figures()
+            except Exception:
+                log.exception("Live metrics refresh failed")
+            await asyncio.sleep(LIVE_METRICS_INTERVAL_MS / 1000.0)
+
+    async def _publish_figures(self):
+        # One computation per refresh, whatever the number of viewers
+        wanted = set().union(*(viewer.topics for viewer in self.viewers)) if self.viewers else set()
+        if "metrics" in wanted:
+            self.broadcast({
+                "type": "metrics",
+                "metrics": await rollups.dashboard_metrics(self.db),
+                "biometric_stats": await rollups.biometric_stats(self.db)
+            })
+        if "stats" in wanted:
+            self.broadcast({"type": "stats", "data": await rollups.admin_stats(self.db)})
+
+    async def serve(self, websocket, db, topics):
+        """Push messages for `topics` to an authenticated, not yet accepted socket until it closes."""
+        await websocket.accept()
+        viewer = self.connect(db, topics)
+        sender = asyncio.create_task(self._send(websocket, viewer))
+        try:
+            # Clients only listen; wait for the disconnect
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            self.disconnect(viewer)
+
+    async def _send(self, websocket, viewer):
+        try:
+            while True:
+                message = await viewer.queue.get()
+                if viewer.behind:
+                    message = viewer.resync()
+                await websocket.send_json(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.debug("Live viewer send failed; waiting for disconnect")
+
+    async def shutdown(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+
+live_feed = LiveFeed()
+for _topic in ("payment", "verification", "audit", "user"):
+    events.bus.subscribe(_topic, live_feed.on_event)
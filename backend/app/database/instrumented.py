@@ -0,0 +1,105 @@
+import time
+from backend.app.utils.metrics import record_mongo
+
+# Collection methods that are awaited directly and timed as one call
+_TIMED_METHODS = {
+    "find_one", "insert_one", "insert_many", "update_one", "update_many",
+    "delete_one", "delete_many", "count_documents", "find_one_and_update",
+    "replace_one", "bulk_write", "distinct", "create_index",
+}
+
+# Database-level attributes passed through untimed (everything else is a collection)
+_DATABASE_ATTRIBUTES = {"client", "name", "command", "list_collection_names", "drop_collection", "get_collection"}
+
+class InstrumentedCursor:
+    """Wraps a find/aggregate cursor; to_list and full iteration are timed as one call."""
+    def __init__(self, cursor, collection, operation):
+        self._cursor = cursor
+        self._collection = collection
+        self._operation = operation
+        self._elapsed = 0.0
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name in ("sort", "limit", "skip", "batch_size", "hint", "max_time_ms"):
+            def chain(*args, **kwargs):
+                attr(*args, **kwargs)
+                return self
+            return chain
+        return attr
+
+    async def to_list(self, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await self._cursor.to_list(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            record_mongo(self._collection, self._operation, time.perf_counter() - start, outcome)
+
+    def __aiter__(self):
+        self._iter = self._cursor.__aiter__()
+        self._elapsed = 0.0
+        return self
+
+    async def __anext__(self):
+        start = time.perf_counter()
+        try:
+            doc = await self._iter.__anext__()
+        except StopAsyncIteration:
+            record_mongo(self._collection, self._operation, self._elapsed + time.perf_counter() - start)
+            raise
+        except Exception:
+            record_mongo(self._collection, self._operation, self._elapsed + time.perf_counter() - start, "error")
+            raise
+        self._elapsed += time.perf_counter() - start
+        return doc
+
+class InstrumentedCollection:
+    def __init__(self, collection, name):
+        self._collection = collection
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in ("find", "aggregate"):
+            def open_cursor(*args, **kwargs):
+                return InstrumentedCursor(attr(*args, **kwargs), self._name, name)
+            return open_cursor
+        if name in _TIMED_METHODS:
+            async def call(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = "ok"
+                try:
+                    return await attr(*args, **kwargs)
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    record_mongo(self._name, name, time.perf_counter() - start, outcome)
+            return call
+        return attr
+
+class InstrumentedDatabase:
+    """
+    Motor database proxy that records the latency of every collection call
+    (see utils/metrics.py). Routes keep using db.<collection>.<method> as before.
+    """
+    def __init__(self, db):
+        self._db = db
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in _DATABASE_ATTRIBUTES:
+            return getattr(self._db, name)
+        return self[name]
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self._db[name], name)
+        return collection
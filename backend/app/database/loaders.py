@@ -0,0 +1,59 @@
+from bson import ObjectId
+from fastapi import Depends
+from backend.app.database.mongo import get_db
+
+def _object_id(value):
+    # User ids are stored as strings on payments / logs; "anonymous" and friends never match
+    if isinstance(value, ObjectId):
+        return value
+    return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else None
+
+class BatchLoader:
+    """
+    Resolves documents of one collection by `field` with a single $in query
+    per batch of keys not seen yet. Results, misses included, are memoized
+    for the lifetime of the loader (one request, see get_loaders).
+    """
+    def __init__(self, collection, field="_id", projection=None, coerce=None):
+        self.collection = collection
+        self.field = field
+        self.projection = projection
+        self.coerce = coerce
+        self._cache = {}
+
+    async def load_many(self, keys):
+        """{key: document or None} for every distinct, non-empty key."""
+        keys = [key for key in dict.fromkeys(keys) if key is not None]
+        lookup = {}
+        for key in keys:
+            if key in self._cache:
+                continue
+            self._cache[key] = None
+            value = self.coerce(key) if self.coerce else key
+            if value is not None:
+                lookup[value] = key
+
+        if lookup:
+            projection = {**self.projection, self.field: 1} if self.projection else None
+            async for doc in self.collection.find({self.field: {"$in": list(lookup)}}, projection):
+                key = lookup.get(doc.get(self.field))
+                # First match wins, like the find_one it replaces
+                if key is not None and self._cache[key] is None:
+                    self._cache[key] = doc
+
+        return {key: self._cache[key] for key in keys}
+
+    async def load(self, key):
+        return (await self.load_many([key])).get(key)
+
+class Loaders:
+    """Request-scoped loaders for documents that listing routes join in."""
+    def __init__(self, db):
+        # User id (string or ObjectId) -> {"email", "name"}
+        self.users = BatchLoader(db.users, projection={"email": 1, "name": 1}, coerce=_object_id)
+        # User id -> enrollment summary; never the encrypted templates
+        self.enrollments = BatchLoader(db.biometrics, field="user_id", projection={"hand_type": 1})
+
+async def get_loaders(db = Depends(get_db)):
+    # FastAPI resolves a dependency once per request, so every user of it shares the cache
+    return Loaders(db)
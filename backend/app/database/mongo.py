@@ -1,12 +1,17 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
+from backend.app.database.instrumented import InstrumentedDatabase
+from backend.app.utils.metrics import METRICS_ENABLED
 
 load_dotenv()
 
 MONGODB_URL = os.getenv("MONGODB_URL")
 client = AsyncIOMotorClient(MONGODB_URL)
 db = client.hand_biometrics_db
+if METRICS_ENABLED:
+    # Time every collection call for /metrics
+    db = InstrumentedDatabase(db)
 
 async def get_db():
     return db
@@ -1,12 +1,33 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from backend.app.auth.routes import router as auth_router
 from backend.app.biometric.routes import router as biometric_router
 from backend.app.payment.routes import router as payment_router
 from backend.app.dashboard.routes import router as dashboard_router
 from backend.app.admin.routes import router as admin_router
+from backend.app.biometric import registry, executor, batcher
+from backend.app.utils import metrics, logger, log_writer
+from backend.app.auth.utils import verify_metrics_token
+from backend.app.dashboard.live import live_feed
 
-app = FastAPI(title="Secure Biometric Payment API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.configure()
+    # Load shared biometric models before the worker starts accepting requests
+    if registry.BIOMETRIC_WARMUP:
+        registry.warm_up()
+    yield
+    await live_feed.shutdown()
+    await batcher.shutdown()
+    executor.shutdown()
+    # Write out buffered audit / verification logs
+    await log_writer.shutdown()
+    # Last: drain queued log records from the shutdown above
+    logger.shutdown()
+
+app = FastAPI(title="Secure Biometric Payment API", lifespan=lifespan)
 
 # Add CORS middleware - MUST be before route includes
 app.add_middleware(
@@ -22,6 +43,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request latency includes the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(biometric_router)
@@ -32,3 +56,11 @@ app.include_router(admin_router)
 @app.get("/")
 async def root():
     return {"message": "Secure Biometric Payment API is running"}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(scraper = Depends(verify_metrics_token)):
+    """
+    Per-route request, stage and Mongo latency histograms (Prometheus text format).
+    Scraper only: requires METRICS_TOKEN as a bearer token, disabled when unset.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
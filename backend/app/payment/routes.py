@@ -3,23 +3,27 @@ from pydantic import BaseModel
 from backend.app.database.mongo import get_db
 from backend.app.payment.razorpay_service import RazorpayService
 from backend.app.auth.utils import get_current_user
-from backend.app.utils.security import decrypt_template, mask_account_number
+from backend.app.utils.security import mask_account_number
 from backend.app.utils.audit_logger import AuditLogger
 from bson import ObjectId
+import asyncio
 import os
-import cv2
-import numpy as np
-from backend.app.biometric.hand_detector import HandDetector
 from backend.app.biometric.feature_extractor import FeatureExtractor
+from backend.app.biometric import registry
+from backend.app.biometric.executor import run_inference
+from backend.app.biometric.ingest import decode_upload, ImageRejected
+from backend.app.biometric.batcher import get_batcher
 from backend.app.biometric.matcher import Matcher
+from backend.app.biometric.template_cache import load_template
 from backend.app.utils.otp_handler import generate_otp, hash_otp, verify_otp_hash
 from backend.app.utils.email import send_otp_email
+from backend.app.utils import metrics, rollups, events
+from backend.app.utils.logger import get_logger
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/payment", tags=["payment"])
 razorpay_service = RazorpayService()
-detector = HandDetector(mode=True)
-extractor = FeatureExtractor() # Initialize global instance
+log = get_logger(__name__)
 
 class PaymentVerifyRequest(BaseModel):
     razorpay_payment_id: str
@@ -35,6 +39,16 @@ class PINVerifyRequest(BaseModel):
     pin: str
     amount: float
 
+def _discard(*tasks):
+    """Cancel unfinished tasks; retrieve the outcome of finished ones so errors aren't reported as unhandled."""
+    for task in tasks:
+        if task is None:
+            continue
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
 @router.post("/create-order")
 async def create_secure_order(
     image: UploadFile = File(...),
@@ -50,67 +64,74 @@ async def create_secure_order(
     Zero-Trust Order Creation:
     Only creates a Razorpay order if the hand biometric is verified.
     """
-    print(f"DEBUG: SECURE Order request for {current_user['email']} - Amount: ₹{amount}")
+    log.debug("Secure order request", email=current_user["email"], amount=amount)
     
-    # 1. Fetch user biometric profile
-    biometric_data = await db.biometrics.find_one({"user_id": str(current_user["_id"])})
-    if not biometric_data:
-        raise HTTPException(status_code=404, detail="Biometric profile not found. Please register your hand first.")
+    # 1. Fetch user biometric profile (compiled, from the template cache when current)
+    #    while the upload is read and decoded
+    template_task = asyncio.create_task(load_template(db, str(current_user["_id"])))
+    cnn_task = None
+    try:
+        # 2. Process image
+        contents = await image.read()
+        try:
+            img, decode_info = await run_inference(decode_upload, contents)
+        except ImageRejected as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        log.debug("Decoded upload", width=decode_info["width"], height=decode_info["height"], format=decode_info["format"],
+                  scale=decode_info["scale"], decode_ms=round(decode_info["decode_ms"], 1))
 
-    # 2. Process image
-    contents = await image.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    if img is None:
-        raise HTTPException(status_code=400, detail="Invalid image")
+        template = await template_task
+        if template is None:
+            raise HTTPException(status_code=404, detail="Biometric profile not found. Please register your hand first.")
 
-    # 3. Quality Check
-    is_good, issues = detector.check_image_quality(img)
-    if not is_good:
-        await AuditLogger.log_event(db, current_user["_id"], "biometric_auth", "FAILED", {"reason": "Quality check failed", "issues": issues}, {"amount": amount})
-        raise HTTPException(status_code=422, detail={"message": "Image quality issues detected.", "issues": issues})
+        # Full-frame (legacy) templates don't need landmarks for the CNN, so the
+        # embedding runs on a second pool thread while the landmarker works.
+        # ROI templates crop from the landmarks and are embedded after detection.
+        if template.cnn_unit is not None and template.cnn_preprocess != "roi":
+            cnn_task = asyncio.create_task(get_batcher().embed(img))
 
-    # 4. Biometric Verification
-    detector.find_hands(img)
-    landmarks, h_type = detector.find_position(img) # Unpack hand type
-    
-    if not landmarks:
-        raise HTTPException(status_code=422, detail="Hand not detected")
+        # 3. Quality Check (single detection pass, reused below)
+        analysis = await run_inference(registry.analyze, img)
+        if not analysis.is_good:
+            await AuditLogger.log_event(db, current_user["_id"], "biometric_auth", "FAILED", {"reason": "Quality check failed", "issues": analysis.issues, "metrics": analysis.metrics}, {"amount": amount})
+            raise HTTPException(status_code=422, detail={"message": "Image quality issues detected.", "issues": analysis.issues})
+
+        # 4. Biometric Verification
+        landmarks, h_type = analysis.landmarks, analysis.hand_type
         
-    new_vector = FeatureExtractor.extract_features(landmarks)
-    new_cnn_vector = extractor.extract_cnn_features(img)
-    
-    # Decrypt stored features on-the-fly
-    stored_geo = biometric_data["feature_vectors"]
-    if isinstance(stored_geo, str):
-        stored_geo = decrypt_template(stored_geo)
+        if not landmarks:
+            raise HTTPException(status_code=422, detail="Hand not detected")
+            
+        new_vector = FeatureExtractor.extract_features(landmarks)
         
-    stored_cnn = biometric_data.get("cnn_features")
-    if stored_cnn and isinstance(stored_cnn, str):
-        stored_cnn = decrypt_template(stored_cnn)
-    
-    # Strictly Enforce Identity Logic (Enrolled Type vs Current Type)
-    match_result, scores = Matcher.verify(
-        new_geo=new_vector, 
-        stored_geo=stored_geo,
-        new_cnn=new_cnn_vector,
-        stored_cnn=stored_cnn,
-        current_hand_type=h_type,
-        enrolled_hand_type=biometric_data.get("hand_type")
-    )
+        # Strictly Enforce Identity Logic (Enrolled Type vs Current Type)
+        # Cascade: cheap geometric gates first, MobileNet only if it can still change the decision
+        early_result, stage = Matcher.geometric_stage(new_vector, template, h_type)
+        if early_result is not None:
+            match_result, scores = early_result
+        else:
+            new_cnn_vector = None
+            if stage["cnn_needed"]:
+                # Embed the probe the same way the enrolled template was built
+                new_cnn_vector = await (cnn_task or get_batcher().embed(img, landmarks))
+            match_result, scores = Matcher.fuse(stage, template, new_cnn_vector)
+    finally:
+        # Overlapped work nobody awaits any more: an early exit, or a speculative
+        # embedding the decision didn't need
+        _discard(template_task, cnn_task)
+
+    if match_result == "re-register":
+        raise HTTPException(status_code=400, detail="Security update: Biometric profile outdated. Please re-register.")
     
     # Log verification attempt
     await AuditLogger.log_event(db, current_user["_id"], "biometric_auth", match_result["status"], {
         "score": match_result.get("confidence_score", 0.0),
         "geo_score": scores.get("geo_score", 0.0),
         "cnn_score": scores.get("cnn_score", 0.0),
+        "cnn_skipped": scores.get("cnn_skipped", True),
         "reason": match_result["reason"],
         "amount": amount
     })
-
-    if match_result == "re-register":
-        raise HTTPException(status_code=400, detail="Security update: Biometric profile outdated. Please re-register.")
     
     if match_result["status"] != "VERIFIED":
         # Return strict failure response
@@ -174,7 +195,8 @@ async def create_secure_order(
             })
             
             # Send Email
-            email_sent = send_otp_email(current_user["email"], otp)
+            with metrics.stage("email"):
+                email_sent = send_otp_email(current_user["email"], otp)
             if not email_sent:
                 raise HTTPException(status_code=500, detail="Failed to send OTP email. Please try again.")
             
@@ -187,7 +209,9 @@ async def create_secure_order(
             await db.otps.update_one({"_id": verified_otp["_id"]}, {"$set": {"used": True}})
 
     # 5. Create Razorpay Order only after verification (Biometric + OTP if needed)
-    order = razorpay_service.create_order(amount)
+    with metrics.stage("gateway") as span:
+        order = razorpay_service.create_order(amount)
+        span.outcome = "ok" if order is not None else "failed"
     if order is None:
         raise HTTPException(status_code=500, detail="Failed to create Razorpay order")
 
@@ -209,14 +233,17 @@ async def create_secure_order(
         "created_at": datetime.utcnow() # Use standard datetime
     }
     await db.payments.insert_one(payment_data)
+    await rollups.record_payment_created(db, payment_data)
+    events.publish("payment", {"payment": payment_data, "email": current_user["email"]})
 
     # SECURE AUDIT: Log the initiation event for Admin visibility
+    # (critical: stored before the order id is handed to the client)
     await AuditLogger.log_event(db, current_user["_id"], "payment_initiated", "SUCCESS", {
         "amount": amount,
         "recipient": recipient_name,
         "account": mask_account_number(account_number),
         "order_id": order["id"]
-    })
+    }, critical=True)
     
     return {
         "order_id": order["id"],
@@ -299,29 +326,41 @@ async def verify_payment(
     current_user = Depends(get_current_user), 
     db = Depends(get_db)
 ):
-    print(f"DEBUG: Verifying Razorpay payment for {current_user['email']}")
+    log.debug("Verifying Razorpay payment", email=current_user["email"], order_id=request.razorpay_order_id)
     
     if not request.biometric_verified:
         raise HTTPException(status_code=403, detail="Biometric verification required")
         
-    is_valid = razorpay_service.verify_payment(
-        request.razorpay_payment_id,
-        request.razorpay_order_id,
-        request.razorpay_signature
-    )
+    with metrics.stage("gateway") as span:
+        is_valid = razorpay_service.verify_payment(
+            request.razorpay_payment_id,
+            request.razorpay_order_id,
+            request.razorpay_signature
+        )
+        span.outcome = "ok" if is_valid else "failed"
     
+    # Previous state comes back with the update, so the rollups count each transition once
+    rollup_fields = {"amount": 1, "payment_status": 1, "created_at": 1, "biometric_verified": 1}
     if is_valid:
-        await db.payments.update_one(
+        previous = await db.payments.find_one_and_update(
             {"razorpay_order_id": request.razorpay_order_id},
             {"$set": {
                 "payment_status": "completed",
                 "razorpay_payment_id": request.razorpay_payment_id
-            }}
+            }},
+            projection=rollup_fields
         )
+        if previous:
+            await rollups.record_payment_status(db, previous, "completed")
+            events.publish("payment", {"payment": {**previous, "payment_status": "completed"}, "email": current_user["email"]})
         return {"message": "Payment successful"}
     else:
-        await db.payments.update_one(
+        previous = await db.payments.find_one_and_update(
             {"razorpay_order_id": request.razorpay_order_id},
-            {"$set": {"payment_status": "failed"}}
+            {"$set": {"payment_status": "failed"}},
+            projection=rollup_fields
         )
+        if previous:
+            await rollups.record_payment_status(db, previous, "failed")
+            events.publish("payment", {"payment": {**previous, "payment_status": "failed"}, "email": current_user["email"]})
         raise HTTPException(status_code=400, detail="Payment verification failed")
@@ -1,9 +1,12 @@
 import stripe
 import os
 from dotenv import load_dotenv
+from backend.app.utils.logger import get_logger
 
 load_dotenv()
 
+log = get_logger(__name__)
+
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
 class StripeService:
@@ -16,7 +19,7 @@ class StripeService:
             )
             return intent
         except Exception as e:
-            print(f"Error creating PaymentIntent: {e}")
+            log.error("Error creating PaymentIntent", error=str(e))
             return None
 
     def verify_payment(self, payment_intent_id):
@@ -26,5 +29,5 @@ class StripeService:
                 return True
             return False
         except Exception as e:
-            print(f"Error verifying PaymentIntent: {e}")
+            log.error("Error verifying PaymentIntent", error=str(e))
             return False
@@ -1,9 +1,14 @@
 from datetime import datetime
 from bson import ObjectId
+from backend.app.utils.logger import get_logger
+from backend.app.utils.log_writer import write_log
+from backend.app.utils import rollups, events
+
+log = get_logger(__name__)
 
 class AuditLogger:
     @staticmethod
-    async def log_event(db, user_id, event_type, status, details=None, context=None):
+    async def log_event(db, user_id, event_type, status, details=None, context=None, critical=False):
         """
         Log security and transaction events for audit trail.
         
@@ -14,9 +19,13 @@ class AuditLogger:
             status: "SUCCESS", "FAILED", "WARNING"
             details: Dictionary containing error messages, scores, or transaction IDs
             context: Additional context like IP address or Device info (optional)
+            critical: Wait until the entry is stored instead of returning once it is queued;
+                a failed write is raised instead of only being logged
         """
         try:
             log_entry = {
+                # Assigned here so live viewers can reference the entry before the buffered write lands
+                "_id": ObjectId(),
                 "user_id": str(user_id) if user_id else "anonymous",
                 "event_type": event_type,
                 "status": status,
@@ -25,8 +34,12 @@ class AuditLogger:
                 "timestamp": datetime.utcnow()
             }
             
-            await db.audit_logs.insert_one(log_entry)
-            print(f"[AUDIT] {event_type} - {status}: {details}")
+            await write_log(db, "audit_logs", log_entry, critical)
+            await rollups.record_audit(db, event_type, status, log_entry["timestamp"])
+            events.publish("audit", log_entry)
+            log.info("Audit event", event_type=event_type, status=status, user_id=log_entry["user_id"], details=log_entry["details"])
             
-        except Exception as e:
-            print(f"FAILED TO WRITE AUDIT LOG: {e}")
+        except Exception:
+            log.exception("Failed to write audit log", event_type=event_type, status=status)
+            if critical:
+                raise
@@ -2,20 +2,26 @@ import smtplib
 import os
 from email.message import EmailMessage
 from dotenv import load_dotenv
+from backend.app.utils.logger import get_logger
 
 load_dotenv()
 
+log = get_logger(__name__)
+
 EMAIL_USER = os.getenv("EMAIL_USER")
 EMAIL_PASS = os.getenv("EMAIL_PASS")
+# Gmail by default; point at a local SMTP sink for load tests
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 465))
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "true").lower() == "true"
 
 def send_otp_email(to_email: str, otp: str):
     """
     Sends an OTP email to the user using SMTP.
-    Gmail SMTP server: smtp.gmail.com
-    Port: 465 (SSL)
+    Default server: smtp.gmail.com, port 465 (SSL) -- see EMAIL_HOST / EMAIL_PORT
     """
     if not EMAIL_USER or not EMAIL_PASS:
-        print("ERROR: Email credentials not found in environment variables.")
+        log.error("Email credentials not found in environment variables")
         return False
 
     msg = EmailMessage()
@@ -38,10 +44,11 @@ def send_otp_email(to_email: str, otp: str):
     """)
 
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
+        smtp_class = smtplib.SMTP_SSL if EMAIL_USE_SSL else smtplib.SMTP
+        with smtp_class(EMAIL_HOST, EMAIL_PORT) as smtp:
             smtp.login(EMAIL_USER, EMAIL_PASS)
             smtp.send_message(msg)
         return True
     except Exception as e:
-        print(f"FAILED TO SEND EMAIL: {str(e)}")
+        log.error("Failed to send OTP email", to=to_email, error=str(e))
         return False
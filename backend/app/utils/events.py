@@ -0,0 +1,42 @@
+"""
+In-process event bus for domain events.
+
+Writers publish after storing a document; subscribers (the live dashboard
+feed) react without querying Mongo again. Topics and payloads:
+
+    "payment"       {"payment": <payments document>, "email": <payer email>}
+    "verification"  <verification_logs document>
+    "audit"         <audit_logs document>
+    "user"          {"user_id": <id>}
+
+Delivery is synchronous and per process: callbacks run on the event loop
+inside publish(), so they must not block or await.
+"""
+from backend.app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = {}  # topic -> [callback(topic, payload)]
+
+    def subscribe(self, topic, callback):
+        self._subscribers.setdefault(topic, []).append(callback)
+
+    def unsubscribe(self, topic, callback):
+        callbacks = self._subscribers.get(topic, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def publish(self, topic, payload):
+        for callback in list(self._subscribers.get(topic, ())):
+            try:
+                callback(topic, payload)
+            except Exception:
+                # A broken subscriber must not fail the write that published
+                log.exception("Event subscriber failed", topic=topic)
+
+bus = EventBus()
+
+def publish(topic, payload):
+    bus.publish(topic, payload)
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import os
+from dotenv import load_dotenv
+from backend.app.utils.logger import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+# Audit / verification log documents are buffered and written with one
+# unordered insert_many per collection once LOG_WRITER_BATCH_SIZE documents
+# are pending or LOG_WRITER_FLUSH_MS has passed since the first one.
+LOG_WRITER_ENABLED = os.getenv("LOG_WRITER_ENABLED", "true").lower() == "true"
+LOG_WRITER_BATCH_SIZE = int(os.getenv("LOG_WRITER_BATCH_SIZE", 100))
+LOG_WRITER_FLUSH_MS = float(os.getenv("LOG_WRITER_FLUSH_MS", 200))
+# Documents waiting to be written; writers wait (backpressure) beyond this
+LOG_WRITER_MAX_PENDING = int(os.getenv("LOG_WRITER_MAX_PENDING", 10000))
+
+class LogWriter:
+    """
+    Write-behind buffer for append-only log collections.
+    write() returns once the document is queued; write(..., critical=True)
+    returns only after it is stored and raises if the insert failed.
+    """
+    def __init__(self, batch_size=LOG_WRITER_BATCH_SIZE, flush_ms=LOG_WRITER_FLUSH_MS, max_pending=LOG_WRITER_MAX_PENDING):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_ms) / 1000.0
+        self.max_pending = max(1, max_pending)
+        self._queue = None
+        self._worker = None
+        self.written = 0
+        self.failed = 0
+
+    async def write(self, db, collection, document, critical=False):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if self._worker is None or self._worker.done():
+            # Fresh context: the worker outlives the request that started it
+            self._worker = contextvars.Context().run(asyncio.create_task, self._run())
+
+        # Blocks only when max_pending documents are already waiting
+        stored = asyncio.get_running_loop().create_future() if critical else None
+        await self._queue.put((db, collection, document, stored))
+        if stored is not None:
+            # Completed with the outcome of the insert_many that carried the document
+            await stored
+
+    async def flush(self):
+        """Wait until everything queued so far is written."""
+        if self._queue is None or self._worker is None or self._worker.done():
+            return
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put(done)
+        await done
+
+    async def _collect(self):
+        # Block for the first document, then take whatever arrives in the window
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        # A flush or a critical document ends the window early
+        while len(batch) < self.batch_size and not self._urgent(batch[-1]):
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _urgent(item):
+        return isinstance(item, asyncio.Future) or item[3] is not None
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            flushes = [item for item in batch if isinstance(item, asyncio.Future)]
+            await self._write([item for item in batch if not isinstance(item, asyncio.Future)])
+            for done in flushes:
+                if not done.done():
+                    done.set_result(None)
+
+    async def _write(self, items):
+        # One unordered insert_many per (database, collection)
+        groups = {}
+        for db, collection, document, stored in items:
+            group = groups.setdefault((id(db), collection), (db, collection, [], []))
+            group[2].append(document)
+            group[3].append(stored)
+        for db, collection, documents, waiters in groups.values():
+            try:
+                await db[collection].insert_many(documents, ordered=False)
+            except Exception as e:
+                # Unordered: the server kept every document without a write error
+                rejected = self._rejected_indexes(e, len(documents))
+                self.written += len(documents) - len(rejected)
+                self.failed += len(rejected)
+                log.exception("Log batch write failed", collection=collection, documents=len(documents), rejected=len(rejected))
+                for index, stored in enumerate(waiters):
+                    if stored is not None and not stored.done():
+                        if index in rejected:
+                            stored.set_exception(e)
+                        else:
+                            stored.set_result(None)
+                continue
+            self.written += len(documents)
+            for stored in waiters:
+                if stored is not None and not stored.done():
+                    stored.set_result(None)
+
+    @staticmethod
+    def _rejected_indexes(error, count):
+        # BulkWriteError lists the failed documents; anything else failed them all
+        write_errors = getattr(error, "details", None) or {}
+        indexes = {e.get("index") for e in write_errors.get("writeErrors", [])}
+        if write_errors.get("writeConcernErrors") or not indexes:
+            return set(range(count))
+        return indexes
+
+    async def close(self):
+        """Flush pending documents and stop the worker."""
+        if self._worker is None:
+            return
+        await self.flush()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self):
+        pending = self._queue.qsize() if self._queue is not None else 0
+        return {"pending": pending, "written": self.written, "failed": self.failed}
+
+_writer = None
+
+def get_log_writer():
+    """Process-wide write-behind log writer."""
+    global _writer
+    if _writer is None:
+        _writer = LogWriter()
+    return _writer
+
+async def write_log(db, collection, document, critical=False):
+    """Append a log document (buffered unless LOG_WRITER_ENABLED is false or critical)."""
+    if not LOG_WRITER_ENABLED:
+        await db[collection].insert_one(document)
+        return
+    await get_log_writer().write(db, collection, document, critical)
+
+async def shutdown():
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+        _writer = None
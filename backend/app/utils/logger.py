@@ -0,0 +1,158 @@
+"""
+Structured, non-blocking application logging.
+
+Request threads only enqueue records; a background QueueListener thread
+formats and writes them, so slow stdout / log shipping never adds latency
+to verification. Usage:
+
+    from backend.app.utils.logger import get_logger
+    log = get_logger(__name__)
+    log.debug("Decoded upload", width=w, height=h, decode_ms=ms)
+
+Keyword arguments become fields of the JSON record.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. "backend.app.biometric=DEBUG,backend.app.payment=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of DEBUG records kept; INFO and above are never sampled
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))
+# Records waiting for the writer thread; when full, new records are dropped (and counted)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+ROOT_LOGGER = "backend"
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def formatMessage(self, record):
+        line = super().formatMessage(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+class DebugSampler(logging.Filter):
+    """Keeps a random LOG_DEBUG_SAMPLE_RATE share of DEBUG records."""
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: a full queue drops the record."""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (the record crosses threads),
+        # but leave JSON / text formatting to the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Moves keyword arguments into the record's structured fields."""
+    _PASSTHROUGH = {"exc_info", "stack_info", "stacklevel", "extra"}
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in self._PASSTHROUGH}
+        if fields:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "fields": fields}
+        return msg, kwargs
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+def _parse_levels(spec):
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.strip().partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def configure():
+    """
+    Attach the queue handler to the application logger tree and start the
+    writer thread. Idempotent; also restarts the writer after shutdown().
+    """
+    global _handler, _listener
+    with _lock:
+        if _handler is None:
+            root = logging.getLogger(ROOT_LOGGER)
+            root.setLevel(LOG_LEVEL)
+            root.propagate = False
+            for name, level in _parse_levels(LOG_LEVELS).items():
+                logging.getLogger(name).setLevel(level)
+
+            _handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+            _handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+            root.addHandler(_handler)
+            atexit.register(shutdown)
+
+        if _listener is None:
+            writer = logging.StreamHandler(sys.stdout)
+            writer.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+            _listener = logging.handlers.QueueListener(_handler.queue, writer)
+            _listener.start()
+
+def shutdown():
+    """Write out everything still queued and stop the writer thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        if _handler.dropped:
+            print(f"WARNING: {_handler.dropped} log records dropped (queue full)", file=sys.stderr)
+            _handler.dropped = 0
+
+def get_logger(name):
+    configure()
+    return StructuredLogger(logging.getLogger(name), {})
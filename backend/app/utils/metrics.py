@@ -0,0 +1,206 @@
+"""
+Per-stage latency metrics in the Prometheus text format.
+
+Stages (decode, quality, detection, geometry, cnn, decrypt, match, fusion,
+password, gateway, email) and every Mongo call are recorded into
+histograms labeled with the route of the request that triggered them, so
+/metrics shows where each route's latency budget goes. Metrics are per
+process: scrape every uvicorn worker or sum over instances.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Adds a Server-Timing header with per-stage milliseconds to every response.
+# Off by default: it tells clients how long each security check took.
+METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "false").lower() == "true"
+
+# Seconds; covers sub-millisecond matching up to multi-second CNN queues
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values (thread-safe)."""
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            inf = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {series[-1]}")
+            lines.append(f"{self.name}_sum{plain} {series[-2]}")
+            lines.append(f"{self.name}_count{plain} {series[-1]}")
+        return "\n".join(lines)
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("route", "method", "status"))
+STAGE_LATENCY = Histogram("biometric_stage_duration_seconds", "Latency of one processing stage.", ("stage", "route", "outcome"))
+MONGO_LATENCY = Histogram("mongo_operation_duration_seconds", "Latency of one MongoDB call.", ("collection", "operation", "route", "outcome"))
+
+REGISTRY = [REQUEST_LATENCY, STAGE_LATENCY, MONGO_LATENCY]
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+class RequestTiming:
+    """Route label and stage durations of the request being served."""
+    def __init__(self, scope):
+        self.scope = scope
+        self.spans = []  # (name, seconds); appended from pool threads too
+
+    @property
+    def route(self):
+        # Set by the router once the request matched; raw paths would explode the label set
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def server_timing(self, total):
+        totals = {}
+        for name, seconds in list(self.spans):
+            totals[name] = totals.get(name, 0.0) + seconds
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+def record(stage_name, seconds, outcome="ok"):
+    """Observe one stage duration for the current request."""
+    timing = _current.get()
+    STAGE_LATENCY.observe(seconds, stage_name, timing.route if timing is not None else "-", outcome)
+    if timing is not None:
+        timing.spans.append((stage_name, seconds))
+
+def record_mongo(collection, operation, seconds, outcome="ok"):
+    """Observe one Mongo call; all calls of a request share the "mongo" Server-Timing entry."""
+    timing = _current.get()
+    MONGO_LATENCY.observe(seconds, collection, operation, timing.route if timing is not None else "-", outcome)
+    if timing is not None:
+        timing.spans.append(("mongo", seconds))
+
+class stage:
+    """
+    Time a block as a named stage:
+
+        with stage("gateway"):
+            order = razorpay_service.create_order(amount)
+
+    Outcome is "error" when the block raises ("cancelled" if it was
+    cancelled); the block may set span.outcome.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.outcome = "ok"
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if METRICS_ENABLED:
+            if exc_type is None:
+                outcome = self.outcome
+            else:
+                outcome = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+            record(self.name, time.perf_counter() - self._start, outcome)
+        return False
+
+def timed(stage_name, outcome=None):
+    """
+    Decorator form of stage() for synchronous functions.
+    outcome(result) may label the observation (e.g. the match decision).
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record(stage_name, time.perf_counter() - start, "error")
+                raise
+            record(stage_name, time.perf_counter() - start, outcome(result) if outcome else "ok")
+            return result
+        return wrapper
+    return decorator
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: opens the per-request timing context, records the
+    request latency and optionally adds the Server-Timing header.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        timing = RequestTiming(scope)
+        token = _current.set(timing)
+        if scope["type"] == "websocket":
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                _current.reset(token)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if METRICS_TIMING_HEADER:
+                    header = timing.server_timing(time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUEST_LATENCY.observe(time.perf_counter() - start, timing.route, scope["method"], str(status["code"]))
+            _current.reset(token)
@@ -0,0 +1,324 @@
+"""
+Materialized statistics for the dashboard and admin endpoints.
+
+Every write that changes a statistic also $inc-upserts two small documents
+in `stats_rollups`:
+
+    {"_id": "totals", "users": .., "payments": {..}, "mfa": {..}, ...}
+    {"_id": "day:2026-10-17", "date": .., <same counters>, "hours": {"13": {<same counters>}}}
+
+so /dashboard/metrics and /admin/stats read two or three documents instead
+of counting whole collections. Counter groups:
+
+    users                                   registrations
+    payments.{total,pending,completed,failed,completed_amount,high_value}
+    mfa.{palm_only,palm_pin,palm_otp}       completed payments by MFA tier
+    verifications.{success,failed,error}    verification_logs by status
+    biometric.{VERIFIED,REJECTED}           biometric_auth audit events
+    incidents                               FAILED / REJECTED audit events
+
+Payments are bucketed by their creation time and counted by current status
+(a status change moves the count between status counters). Everything else
+is bucketed by event time. The first stats read on an empty collection
+(new deployment, after a wipe) backfills it from the raw collections with
+backfill(), which only inserts documents that are still absent.
+rebuild() replaces every document and deletes stale days; it runs only from
+backend/scripts/rebuild_rollups.py (after upgrading a deployment that
+already has data, or after importing / deleting data outside the API).
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from backend.app.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+COLLECTION = "stats_rollups"
+TOTALS_ID = "totals"
+
+# Completed payments at or above this amount count as high value
+HIGH_VALUE_AMOUNT = 20000
+
+INCIDENT_STATUSES = ("REJECTED", "FAILED")
+
+def mfa_tier(amount):
+    """MFA tier a payment of `amount` goes through (see payment/routes.py)."""
+    if amount > 10000:
+        return "palm_otp"
+    if amount >= 2000:
+        return "palm_pin"
+    return "palm_only"
+
+def _utc(at):
+    # verification_logs use ObjectId generation times (aware), the rest naive UTC
+    if at is None:
+        return datetime.utcnow()
+    if at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+def day_id(at):
+    return "day:" + at.strftime("%Y-%m-%d")
+
+def _day_start(at):
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def _apply(db, counters, at):
+    """$inc `counters` (dotted paths) on the totals and day documents."""
+    counters = {path: value for path, value in counters.items() if value}
+    if not counters:
+        return
+    at = _utc(at)
+    hour = f"{at.hour:02d}"
+    day_inc = dict(counters)
+    day_inc.update({f"hours.{hour}.{path}": value for path, value in counters.items()})
+    try:
+        await asyncio.gather(
+            db[COLLECTION].update_one({"_id": TOTALS_ID}, {"$inc": counters}, upsert=True),
+            db[COLLECTION].update_one(
+                {"_id": day_id(at)},
+                {"$inc": day_inc, "$setOnInsert": {"date": _day_start(at)}},
+                upsert=True
+            ),
+        )
+    except Exception:
+        # Statistics must never fail the write they describe; rebuild() repairs drift
+        log.exception("Failed to update stats rollups", counters=counters)
+
+def _completed_counters(amount, sign):
+    counters = {
+        "payments.completed_amount": sign * amount,
+        f"mfa.{mfa_tier(amount)}": sign,
+    }
+    if amount >= HIGH_VALUE_AMOUNT:
+        counters["payments.high_value"] = sign
+    return counters
+
+def _payment_counters(payment):
+    status = payment.get("payment_status", "pending")
+    counters = {"payments.total": 1, f"payments.{status}": 1}
+    if status == "completed":
+        counters.update(_completed_counters(payment.get("amount", 0), 1))
+    return counters
+
+def _verification_counters(status):
+    return {f"verifications.{status}": 1}
+
+def _audit_counters(event_type, status):
+    counters = {}
+    if event_type == "biometric_auth" and status in ("VERIFIED", "REJECTED"):
+        counters[f"biometric.{status}"] = 1
+    if status in INCIDENT_STATUSES:
+        counters["incidents"] = 1
+    return counters
+
+async def record_user(db, at=None):
+    await _apply(db, {"users": 1}, at)
+
+async def record_payment_created(db, payment):
+    await _apply(db, _payment_counters(payment), payment.get("created_at"))
+
+async def record_payment_status(db, payment, status):
+    """
+    Move `payment` (the document as it was before the update) to `status`.
+    No-op when the status did not change, so repeated callbacks count once.
+    """
+    previous = payment.get("payment_status", "pending")
+    if previous == status:
+        return
+    amount = payment.get("amount", 0)
+    counters = {f"payments.{previous}": -1, f"payments.{status}": 1}
+    if previous == "completed":
+        counters.update(_completed_counters(amount, -1))
+    if status == "completed":
+        counters.update(_completed_counters(amount, 1))
+    await _apply(db, counters, payment.get("created_at"))
+
+async def record_verification(db, status, at=None):
+    await _apply(db, _verification_counters(status), at)
+
+async def record_audit(db, event_type, status, at=None):
+    await _apply(db, _audit_counters(event_type, status), at)
+
+def counter(doc, path):
+    """Value of a dotted counter path in a rollup document (0 when absent)."""
+    value = doc or {}
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return 0
+        value = value.get(part, 0)
+    return value if isinstance(value, (int, float)) else 0
+
+def sum_hours(days, path, since):
+    """Sum a counter over the hourly buckets of `days` starting at or after `since`."""
+    total = 0
+    for day in days:
+        for hour, counters in (day.get("hours") or {}).items():
+            if day["date"] + timedelta(hours=int(hour)) >= since:
+                total += counter(counters, path)
+    return total
+
+async def dashboard_metrics(db):
+    """Figures of /dashboard/metrics (two small documents)."""
+    totals, (today,) = await load(db, days=1)
+
+    verifications_today = sum(counter(today, f"verifications.{s}") for s in ("success", "failed", "error"))
+    failed_attempts = counter(totals, "verifications.failed") + counter(totals, "verifications.error")
+
+    return {
+        "totalUsers": counter(totals, "users"),
+        "successfulPayments": counter(totals, "payments.completed"),
+        "totalAmount": counter(totals, "payments.completed_amount"),
+        "verificationsToday": verifications_today,
+        "failedAttempts": failed_attempts
+    }
+
+async def biometric_stats(db):
+    """Verification outcomes of the last 7 days (today and the 6 before it) for /dashboard/biometric-stats."""
+    _, days = await load(db, days=7)
+
+    success = sum(counter(day, "verifications.success") for day in days)
+    failed = sum(counter(day, "verifications.failed") for day in days)
+    error = sum(counter(day, "verifications.error") for day in days)
+
+    total = success + failed + error
+    accuracy = (success / total * 100) if total > 0 else 0
+
+    return {
+        "success": success,
+        "failed": failed + error,
+        "accuracy": round(accuracy, 2),
+        "total": total
+    }
+
+async def admin_stats(db, now=None):
+    """Figures of /admin/stats (totals + today + yesterday)."""
+    now = now or datetime.utcnow()
+    totals, days = await load(db, days=2, now=now)
+
+    # Transaction Stats
+    total_tx = counter(totals, "payments.total")
+    completed_tx = counter(totals, "payments.completed")
+    failed_tx = counter(totals, "payments.failed")
+
+    # High-Value Transactions (>= ₹20k)
+    high_value_tx = counter(totals, "payments.high_value")
+
+    # Biometric Stats
+    biometric_success = counter(totals, "biometric.VERIFIED")
+    biometric_fail = counter(totals, "biometric.REJECTED")
+    total_bio = biometric_success + biometric_fail
+
+    # Recent Incidents (Status: REJECTED or FAILED) - the last 24 hourly buckets
+    last_24h = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+    recent_incidents = sum_hours(days, "incidents", last_24h)
+
+    return {
+        "total_users": counter(totals, "users"),
+        "total_transactions": total_tx,
+        "completed_payments": completed_tx,
+        "failed_payments": failed_tx,
+        "high_value_transactions": high_value_tx,
+        "biometric_accuracy": round((biometric_success / total_bio * 100), 1) if total_bio > 0 else 0,
+        "biometric_attempts": total_bio,
+        "recent_incidents": recent_incidents,
+        # Completed payments by tier: Palm-Only (< 2k), Palm+PIN (2k-10k), Palm+OTP (> 10k)
+        "mfa_distribution": {
+            "palm_only": counter(totals, "mfa.palm_only"),
+            "palm_pin": counter(totals, "mfa.palm_pin"),
+            "palm_otp": counter(totals, "mfa.palm_otp")
+        }
+    }
+
+_backfill_lock = None
+
+async def load(db, days=1, now=None):
+    """
+    The totals document and the day documents of the last `days` UTC days
+    (today first; days without activity are empty dicts).
+    """
+    global _backfill_lock
+    now = now or datetime.utcnow()
+    ids = [day_id(now - timedelta(days=i)) for i in range(days)]
+    docs = {doc["_id"]: doc for doc in await db[COLLECTION].find({"_id": {"$in": [TOTALS_ID] + ids}}).to_list(length=days + 1)}
+
+    if TOTALS_ID not in docs and await db[COLLECTION].find_one({}, {"_id": 1}) is None:
+        # Empty collection (new deployment or wiped): backfill from the raw collections once
+        if _backfill_lock is None:
+            _backfill_lock = asyncio.Lock()
+        async with _backfill_lock:
+            if await db[COLLECTION].find_one({}, {"_id": 1}) is None:
+                await backfill(db)
+        docs = {doc["_id"]: doc for doc in await db[COLLECTION].find({"_id": {"$in": [TOTALS_ID] + ids}}).to_list(length=days + 1)}
+
+    return docs.get(TOTALS_ID, {}), [docs.get(i, {}) for i in ids]
+
+def _accumulate(docs, counters, at):
+    at = _utc(at)
+    totals = docs[TOTALS_ID]
+    day = docs.setdefault(day_id(at), {"_id": day_id(at), "date": _day_start(at), "hours": {}})
+    hour = day["hours"].setdefault(f"{at.hour:02d}", {})
+    for target in (totals, day, hour):
+        for path, value in counters.items():
+            node = target
+            parts = path.split(".")
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = node.get(parts[-1], 0) + value
+
+async def _build(db):
+    """Every rollup document recomputed from users, payments, verification_logs and audit_logs."""
+    docs = {TOTALS_ID: {"_id": TOTALS_ID}}
+
+    async for user in db.users.find({}, {"created_at": 1}):
+        _accumulate(docs, {"users": 1}, user.get("created_at") or user["_id"].generation_time)
+
+    async for payment in db.payments.find({}, {"amount": 1, "payment_status": 1, "created_at": 1}):
+        _accumulate(docs, _payment_counters(payment), payment.get("created_at") or payment["_id"].generation_time)
+
+    async for entry in db.verification_logs.find({}, {"status": 1, "timestamp": 1}):
+        _accumulate(docs, _verification_counters(entry.get("status", "error")), entry.get("timestamp") or entry["_id"].generation_time)
+
+    audit_query = {"$or": [{"event_type": "biometric_auth"}, {"status": {"$in": list(INCIDENT_STATUSES)}}]}
+    async for entry in db.audit_logs.find(audit_query, {"event_type": 1, "status": 1, "timestamp": 1}):
+        counters = _audit_counters(entry.get("event_type"), entry.get("status"))
+        if counters:
+            _accumulate(docs, counters, entry.get("timestamp") or entry["_id"].generation_time)
+
+    docs[TOTALS_ID]["built_at"] = datetime.utcnow()
+    return docs
+
+async def backfill(db):
+    """
+    Insert the recomputed documents that do not exist yet; documents that
+    concurrent $inc upserts created during the scan are left alone (run
+    rebuild() later to fold the history into those). Returns the number of
+    documents inserted.
+    """
+    docs = await _build(db)
+    inserted = 0
+    for doc_id, doc in docs.items():
+        fields = {key: value for key, value in doc.items() if key != "_id"}
+        result = await db[COLLECTION].update_one({"_id": doc_id}, {"$setOnInsert": fields}, upsert=True)
+        if result.upserted_id is not None:
+            inserted += 1
+    if inserted < len(docs):
+        log.warning("Stats rollups partly backfilled; run backend/scripts/rebuild_rollups.py", documents=len(docs), inserted=inserted)
+    else:
+        log.info("Stats rollups backfilled", documents=inserted)
+    return inserted
+
+async def rebuild(db):
+    """
+    Replace every rollup document with one recomputed from the raw
+    collections and delete the others. Increments landing while the scan
+    runs are lost, so run it when traffic is low. Returns the number of
+    documents written.
+    """
+    docs = await _build(db)
+    for doc_id, doc in docs.items():
+        await db[COLLECTION].replace_one({"_id": doc_id}, doc, upsert=True)
+    # Days that no longer have any source documents (e.g. after a partial wipe)
+    await db[COLLECTION].delete_many({"_id": {"$nin": list(docs)}})
+
+    log.info("Stats rollups rebuilt", documents=len(docs))
+    return len(docs)
@@ -3,15 +3,20 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
+from backend.app.utils.metrics import timed
+from backend.app.utils.logger import get_logger
 
 load_dotenv()
 
+log = get_logger(__name__)
+
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
 
+@timed("password")
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -33,26 +38,55 @@ from cryptography.fernet import Fernet
 import base64
 import hashlib
 import json
+import struct
+import numpy as np
 
 # Derive a 32-byte Fernet-compatible key from the SECRET_KEY
 _encryption_key = base64.urlsafe_b64encode(hashlib.sha256(SECRET_KEY.encode()).digest())
 _cipher_suite = Fernet(_encryption_key)
 
-def encrypt_template(data: list) -> str:
-    """Encrypts a list of features (floats) to a secure string."""
-    json_str = json.dumps(data)
-    encrypted_bytes = _cipher_suite.encrypt(json_str.encode())
+# Binary envelope (inside the Fernet token):
+#   magic "HBT" | version u8 | dtype u8 | rows u32 | cols u32 | packed little-endian values
+# Version 0 is the legacy JSON list, which never starts with the magic.
+TEMPLATE_FORMAT_VERSION = 1
+_TEMPLATE_MAGIC = b"HBT"
+_TEMPLATE_HEADER = struct.Struct("<3sBBII")
+_TEMPLATE_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+_TEMPLATE_DTYPE_CODES = {dt: code for code, dt in _TEMPLATE_DTYPES.items()}
+
+def encrypt_template(data, dtype=np.float32) -> str:
+    """Encrypts a feature matrix (rows of floats) as a packed float32/float16 envelope."""
+    matrix = np.atleast_2d(np.asarray(data, dtype=np.dtype(dtype).newbyteorder("<")))
+    if matrix.size == 0:
+        matrix = matrix.reshape(0, 0)
+    code = _TEMPLATE_DTYPE_CODES[matrix.dtype]
+    header = _TEMPLATE_HEADER.pack(_TEMPLATE_MAGIC, TEMPLATE_FORMAT_VERSION, code, matrix.shape[0], matrix.shape[1])
+    encrypted_bytes = _cipher_suite.encrypt(header + np.ascontiguousarray(matrix).tobytes())
     return encrypted_bytes.decode()
 
-def decrypt_template(token: str) -> list:
-    """Decrypts a secure string back to a list of features."""
-    if not token: return []
+@timed("decrypt")
+def decode_template(token: str):
+    """
+    Decrypts either template format straight to NumPy.
+    Returns: (array or None, format version) -- version 0 means legacy JSON.
+    """
+    if not token: return None, TEMPLATE_FORMAT_VERSION
     try:
-        decrypted_bytes = _cipher_suite.decrypt(token.encode())
-        return json.loads(decrypted_bytes.decode())
+        payload = _cipher_suite.decrypt(token.encode())
+        if not payload.startswith(_TEMPLATE_MAGIC):
+            return np.array(json.loads(payload.decode()), dtype=np.float64), 0
+        _, version, code, rows, cols = _TEMPLATE_HEADER.unpack_from(payload)
+        if version != TEMPLATE_FORMAT_VERSION or code not in _TEMPLATE_DTYPES:
+            raise ValueError(f"Unsupported template envelope v{version} dtype {code}")
+        body = np.frombuffer(payload, dtype=_TEMPLATE_DTYPES[code], offset=_TEMPLATE_HEADER.size)
+        return body.reshape(rows, cols), version
     except Exception as e:
-        print(f"Decryption Error: {e}")
-        return []
+        log.error("Template decryption failed", error=str(e))
+        return None, TEMPLATE_FORMAT_VERSION
+
+def decrypt_template(token: str):
+    """Decrypts a secure string back to a feature matrix (None on failure)."""
+    return decode_template(token)[0]
 
 def mask_account_number(account_number: str) -> str:
     """Masks a bank account number, keeping only last 4 digits."""
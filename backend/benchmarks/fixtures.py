@@ -0,0 +1,87 @@
+"""
+Deterministic synthetic fixtures for the benchmark suite.
+Everything is generated from fixed seeds, so runs are reproducible offline
+without shipping large image files.
+"""
+import cv2
+import numpy as np
+
+SEED = 1234
+
+# Name -> (width, height)
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "12mp": (4000, 3000),
+}
+
+# Enrolled samples per template
+TEMPLATE_SIZES = [5, 10, 20]
+
+GEO_DIM = 48
+CNN_DIM = 1280
+
+# Normalized (x, y, z) landmarks of an open right palm, MediaPipe ordering
+_BASE_LANDMARKS = np.array([
+    [0.50, 0.85, 0.00],                                                          # 0 wrist
+    [0.40, 0.78, -0.02], [0.33, 0.70, -0.03], [0.28, 0.62, -0.04], [0.24, 0.55, -0.05],  # thumb
+    [0.42, 0.55, -0.01], [0.41, 0.44, -0.02], [0.40, 0.37, -0.03], [0.40, 0.31, -0.03],  # index
+    [0.50, 0.53, -0.01], [0.50, 0.41, -0.02], [0.50, 0.33, -0.03], [0.50, 0.27, -0.03],  # middle
+    [0.58, 0.55, -0.01], [0.59, 0.44, -0.02], [0.60, 0.37, -0.03], [0.60, 0.31, -0.03],  # ring
+    [0.65, 0.59, -0.01], [0.67, 0.51, -0.02], [0.68, 0.46, -0.03], [0.69, 0.41, -0.03],  # pinky
+])
+
+_FINGERS = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]]
+
+def landmarks(jitter=0.004, seed=SEED):
+    """21 x 3 landmark list with a little per-sample jitter."""
+    rng = np.random.default_rng(seed)
+    return (_BASE_LANDMARKS + rng.normal(0, jitter, _BASE_LANDMARKS.shape)).tolist()
+
+def landmark_batch(n, seed=SEED):
+    return np.array([landmarks(seed=seed + i) for i in range(n)])
+
+def hand_image(width, height, seed=SEED):
+    """
+    BGR frame with a skin-toned palm and fingers drawn along the fixture
+    landmarks over a textured background (gives realistic blur/brightness
+    statistics and JPEG sizes).
+    """
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 12, (height // 8 + 1, width // 8 + 1)).astype(np.float32)
+    noise = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    background = np.array([70, 80, 90], dtype=np.float32)
+    img = np.clip(background + noise[..., None] + rng.normal(0, 3, (height, width, 1)), 0, 255).astype(np.uint8)
+
+    pts = (_BASE_LANDMARKS[:, :2] * (width, height)).astype(np.int32)
+    skin = (120, 160, 210)
+    thickness = max(4, int(min(width, height) * 0.045))
+    palm = pts[[0, 1, 5, 9, 13, 17]]
+    cv2.fillConvexPoly(img, cv2.convexHull(palm), skin)
+    for finger in _FINGERS:
+        chain = [0] + finger
+        for a, b in zip(chain[:-1], chain[1:]):
+            cv2.line(img, (int(pts[a][0]), int(pts[a][1])), (int(pts[b][0]), int(pts[b][1])), skin, thickness, cv2.LINE_AA)
+    # Palm creases for some texture inside the hand
+    for _ in range(6):
+        p0 = pts[0] + rng.integers(-thickness, thickness, 2)
+        p1 = pts[9] + rng.integers(-2 * thickness, 2 * thickness, 2)
+        cv2.line(img, tuple(int(v) for v in p0), tuple(int(v) for v in p1), (100, 135, 180), 1, cv2.LINE_AA)
+    return img
+
+def encoded(img, fmt="jpeg"):
+    if fmt == "png":
+        return cv2.imencode(".png", img)[1].tobytes()
+    return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+def template_vectors(samples, seed=SEED):
+    """Geometry and CNN rows for an enrolled template plus a matching probe."""
+    rng = np.random.default_rng(seed)
+    geo_base = rng.random(GEO_DIM) + 0.5
+    cnn_base = rng.random(CNN_DIM)
+    geo = geo_base + rng.normal(0, 0.01, (samples, GEO_DIM))
+    cnn = cnn_base + rng.normal(0, 0.05, (samples, CNN_DIM))
+    probe_geo = geo_base + rng.normal(0, 0.01, GEO_DIM)
+    probe_cnn = cnn_base + rng.normal(0, 0.05, CNN_DIM)
+    return geo.tolist(), cnn.tolist(), probe_geo.tolist(), probe_cnn.tolist()
@@ -0,0 +1,105 @@
+"""
+Timing, reporting and JSON baselines for the benchmark suite.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+class Benchmark:
+    """
+    Times a zero-argument callable: a few warmup calls, then at least
+    `min_iters` calls and until `min_time` seconds have passed.
+    """
+    def __init__(self, name, func, items=1, warmup=3, min_iters=20, min_time=1.0, max_iters=10000):
+        self.name = name
+        self.func = func
+        self.items = items  # work items per call (e.g. batch size) for throughput
+        self.warmup = warmup
+        self.min_iters = min_iters
+        self.min_time = min_time
+        self.max_iters = max_iters
+
+    def run(self):
+        for _ in range(self.warmup):
+            self.func()
+
+        samples = []
+        start = time.perf_counter()
+        while len(samples) < self.max_iters:
+            t0 = time.perf_counter()
+            self.func()
+            samples.append(time.perf_counter() - t0)
+            if len(samples) >= self.min_iters and time.perf_counter() - start >= self.min_time:
+                break
+
+        ms = np.array(samples) * 1000
+        return {
+            "iterations": len(samples),
+            "items": self.items,
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "min_ms": float(ms.min()),
+            "throughput_per_s": float(self.items * 1000 / ms.mean())
+        }
+
+def environment():
+    """Versions and hardware, stored with every baseline."""
+    import cv2
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info["commit"] = None
+    return info
+
+def print_table(results):
+    print(f"{'benchmark':<44}{'iters':>7}{'p50 ms':>11}{'p99 ms':>11}{'items/s':>12}")
+    for name, r in results.items():
+        print(f"{name:<44}{r['iterations']:>7}{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['throughput_per_s']:>12.1f}")
+
+def save_baseline(path, results, skipped):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results, "skipped": skipped}, f, indent=2)
+    print(f"✅ Baseline written to {path}")
+
+def compare(path, results, threshold):
+    """
+    Compare p50 against a saved baseline.
+    Returns: names of benchmarks slower than (1 + threshold) x baseline
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {path} (commit {baseline['environment'].get('commit')}):")
+    print(f"{'benchmark':<44}{'base p50':>11}{'now p50':>11}{'change':>10}")
+    regressions = []
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<44}{'-':>11}{r['p50_ms']:>11.3f}{'new':>10}")
+            continue
+        change = r["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<44}{base['p50_ms']:>11.3f}{r['p50_ms']:>11.3f}{change:>+9.1%}{flag}")
+    return regressions
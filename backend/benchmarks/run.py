@@ -0,0 +1,177 @@
+"""
+Microbenchmarks for the biometric hot path.
+
+    python backend/benchmarks/run.py                      # everything
+    python backend/benchmarks/run.py --filter decode,cnn  # only some groups
+    python backend/benchmarks/run.py --save backend/benchmarks/baselines/main.json
+    python backend/benchmarks/run.py --compare backend/benchmarks/baselines/main.json
+
+Runs offline on CPU: fixtures are generated from fixed seeds and the CNN
+uses randomly initialised MobileNetV2 weights (same cost as ImageNet ones).
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+root_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_dir))
+
+# Template encryption needs a key; never used for real data here
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key")
+# Keep per-call debug / audit logs out of the timings
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import numpy as np
+import torch
+from backend.benchmarks import fixtures
+from backend.benchmarks.harness import Benchmark, print_table, save_baseline, compare
+
+def decode_benchmarks(quick):
+    from backend.app.biometric.ingest import decode_upload
+    cases = []
+    for res, (w, h) in fixtures.RESOLUTIONS.items():
+        if quick and res == "12mp":
+            continue
+        img = fixtures.hand_image(w, h)
+        for fmt in ("jpeg", "png"):
+            data = fixtures.encoded(img, fmt)
+            cases.append(Benchmark(f"decode/{fmt}/{res}", lambda data=data: decode_upload(data)))
+    return cases
+
+def quality_benchmarks(quick):
+    from backend.app.biometric.quality import QualityAnalyzer
+    analyzer = QualityAnalyzer()
+    cases = []
+    for res, (w, h) in fixtures.RESOLUTIONS.items():
+        if res == "12mp":  # uploads are decoded at reduced scale before this stage
+            continue
+        img = fixtures.hand_image(w, h)
+        cases.append(Benchmark(f"quality/{res}", lambda img=img: analyzer.analyze(img)))
+    return cases
+
+def detector_benchmarks(quick):
+    model_path = root_dir / "backend" / "app" / "biometric" / "hand_landmarker.task"
+    if not model_path.exists():
+        return "hand_landmarker.task not found next to hand_detector.py"
+    from backend.app.biometric.hand_detector import HandDetector
+    detector = HandDetector(mode=True)
+    tracker = HandDetector(mode=True, video=True)
+    clock = iter(range(0, 10**9, 33))
+    cases = []
+    for res in ("480p", "720p"):
+        img = fixtures.hand_image(*fixtures.RESOLUTIONS[res])
+        cases.append(Benchmark(f"detector/image/{res}", lambda img=img: detector.analyze(img)))
+        cases.append(Benchmark(f"detector/video/{res}", lambda img=img: tracker.analyze(img, timestamp_ms=next(clock))))
+    return cases
+
+def geometry_benchmarks(quick):
+    from backend.app.biometric.feature_extractor import FeatureExtractor
+    single = fixtures.landmarks()
+    cases = [Benchmark("geometry/extract_features", lambda: FeatureExtractor.extract_features(single))]
+    for n in (8, 64):
+        batch = fixtures.landmark_batch(n)
+        cases.append(Benchmark(f"geometry/extract_features_batch/{n}", lambda batch=batch: FeatureExtractor.extract_features_batch(batch), items=n))
+    return cases
+
+def cnn_benchmarks(quick):
+    from backend.app.biometric.feature_extractor import FeatureExtractor
+    torch.manual_seed(fixtures.SEED)
+    extractor = FeatureExtractor(backend="eager", pretrained=False)
+    img = fixtures.hand_image(*fixtures.RESOLUTIONS["720p"])
+    lms = fixtures.landmarks()
+    cases = [
+        Benchmark("cnn/legacy_full_frame", lambda: extractor.extract_cnn_features(img), min_iters=5),
+        Benchmark("cnn/roi", lambda: extractor.extract_cnn_features(img, lms), min_iters=5),
+    ]
+    for n in ((4,) if quick else (4, 8)):
+        images, landmarks = [img] * n, [lms] * n
+        cases.append(Benchmark(f"cnn/roi_batch/{n}", lambda images=images, landmarks=landmarks: extractor.extract_cnn_features_batch(images, landmarks), items=n, min_iters=3))
+    return cases
+
+def matcher_benchmarks(quick):
+    from backend.app.biometric.matcher import Matcher
+    from backend.app.biometric.template import CompiledTemplate
+    cases = []
+    for samples in fixtures.TEMPLATE_SIZES:
+        geo, cnn, probe_geo, probe_cnn = fixtures.template_vectors(samples)
+        template = CompiledTemplate(geo, cnn, "Right", "roi")
+        cases.append(Benchmark(f"matcher/verify/{samples}", lambda geo=geo, cnn=cnn, probe_geo=probe_geo, probe_cnn=probe_cnn:
+                               Matcher.verify(probe_geo, geo, probe_cnn, cnn, "Right", "Right")))
+        cases.append(Benchmark(f"matcher/verify_compiled/{samples}", lambda template=template, probe_geo=probe_geo, probe_cnn=probe_cnn:
+                               Matcher.verify_compiled(probe_geo, template, probe_cnn, "Right")))
+        cases.append(Benchmark(f"matcher/compile_template/{samples}", lambda geo=geo, cnn=cnn: CompiledTemplate(geo, cnn, "Right", "roi")))
+    return cases
+
+def crypto_benchmarks(quick):
+    from backend.app.utils.security import encrypt_template, decrypt_template
+    from backend.app.biometric.template import CNN_STORAGE_DTYPE
+    cases = []
+    for samples in fixtures.TEMPLATE_SIZES:
+        geo, cnn, _, _ = fixtures.template_vectors(samples)
+        geo_token = encrypt_template(geo)
+        cnn_token = encrypt_template(cnn, CNN_STORAGE_DTYPE)
+        cases += [
+            Benchmark(f"crypto/encrypt_geo/{samples}", lambda geo=geo: encrypt_template(geo)),
+            Benchmark(f"crypto/decrypt_geo/{samples}", lambda token=geo_token: decrypt_template(token)),
+            Benchmark(f"crypto/encrypt_cnn/{samples}", lambda cnn=cnn: encrypt_template(cnn, CNN_STORAGE_DTYPE)),
+            Benchmark(f"crypto/decrypt_cnn/{samples}", lambda token=cnn_token: decrypt_template(token)),
+        ]
+    return cases
+
+GROUPS = {
+    "decode": decode_benchmarks,
+    "quality": quality_benchmarks,
+    "detector": detector_benchmarks,
+    "geometry": geometry_benchmarks,
+    "cnn": cnn_benchmarks,
+    "matcher": matcher_benchmarks,
+    "crypto": crypto_benchmarks,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the biometric hot path")
+    parser.add_argument("--filter", help="Comma-separated groups to run: " + ", ".join(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="Fewer cases and shorter timing windows")
+    parser.add_argument("--threads", type=int, default=1, help="torch / OpenCV threads (default 1 for stable numbers)")
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare p50 against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p50 slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    import cv2
+    torch.set_num_threads(args.threads)
+    cv2.setNumThreads(args.threads)
+
+    groups = args.filter.split(",") if args.filter else list(GROUPS)
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(unknown)}")
+
+    results, skipped = {}, {}
+    for group in groups:
+        cases = GROUPS[group](args.quick)
+        if isinstance(cases, str):
+            print(f"⚠️  Skipping {group}: {cases}")
+            skipped[group] = cases
+            continue
+        for case in cases:
+            if args.quick:
+                case.min_iters, case.min_time = min(case.min_iters, 5), 0.2
+            print(f"Running {case.name:<60}", end="\r", file=sys.stderr, flush=True)
+            results[case.name] = case.run()
+    print(" " * 70, end="\r", file=sys.stderr)
+
+    print_table(results)
+    if args.save:
+        save_baseline(args.save, results, skipped)
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+The production app wired to load-test stand-ins.
+
+    uvicorn backend.loadtest.app:app --workers 4
+
+Environment:
+    LOADTEST_MONGO_URL   use this mongod instead of the in-memory store
+                         (required with more than one worker, each worker
+                         would otherwise get its own empty store)
+    LOADTEST_DB          database name on that server (never the real one)
+    LOADTEST_RAZORPAY_MS simulated Razorpay order latency in milliseconds
+    EMAIL_HOST / EMAIL_PORT / EMAIL_USE_SSL=false point OTP mail at an SmtpSink
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from backend.app.main import app
+from backend.app.database.mongo import get_db
+from backend.app.database.instrumented import InstrumentedDatabase
+from backend.app.payment import routes as payment_routes
+from backend.loadtest.memory_db import InMemoryDatabase
+from backend.loadtest.stubs import StubRazorpayService
+
+LOADTEST_MONGO_URL = os.getenv("LOADTEST_MONGO_URL")
+LOADTEST_DB = os.getenv("LOADTEST_DB", "hand_biometrics_loadtest")
+LOADTEST_RAZORPAY_MS = float(os.getenv("LOADTEST_RAZORPAY_MS", 0))
+
+if LOADTEST_DB == "hand_biometrics_db":
+    raise RuntimeError("LOADTEST_DB must not point at the application database")
+
+def connect(mongo_url=None, db_name=LOADTEST_DB):
+    """Motor database on `mongo_url`, or a fresh in-memory store (timed like the real one)."""
+    if not mongo_url:
+        return InstrumentedDatabase(InMemoryDatabase())
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return InstrumentedDatabase(AsyncIOMotorClient(mongo_url)[db_name])
+
+db = connect(LOADTEST_MONGO_URL)
+razorpay_stub = StubRazorpayService(LOADTEST_RAZORPAY_MS)
+
+async def get_loadtest_db():
+    return db
+
+app.dependency_overrides[get_db] = get_loadtest_db
+payment_routes.razorpay_service = razorpay_stub
@@ -0,0 +1,352 @@
+"""
+In-memory stand-in for the Motor database used by the app.
+Covers the subset of the Motor/PyMongo API the routes call (find_one, find
+with sort/limit/skip, insert, update / find_one_and_update / replace_one
+with $set/$inc/$setOnInsert/upsert, delete_many, count_documents and
+$match/$group/$sort/$limit/$project aggregations). Not a general MongoDB emulator.
+"""
+import asyncio
+import copy
+import re
+from datetime import datetime, timezone
+from bson import ObjectId
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+_MISSING = object()
+
+def _store(value):
+    # Deep copy for storage; aware datetimes come back as naive UTC, like pymongo
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, dict):
+        return {k: _store(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_store(v) for v in value]
+    return copy.deepcopy(value)
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+def _compare(value, op, arg):
+    arg = _store(arg) if isinstance(arg, datetime) else arg
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$ne":
+        return value != arg
+    if op == "$in":
+        return value in arg if not isinstance(value, list) else any(v in arg for v in value)
+    if op == "$nin":
+        return value not in arg
+    if op == "$regex":
+        return isinstance(value, str) and re.search(arg, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > arg
+        if op == "$gte":
+            return value >= arg
+        if op == "$lt":
+            return value < arg
+        if op == "$lte":
+            return value <= arg
+    except TypeError:
+        return False
+    raise NotImplementedError(f"Query operator {op} is not supported by the in-memory store")
+
+def matches(doc, query):
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif isinstance(value, list) and not isinstance(cond, list):
+            if cond not in value:
+                return False
+        elif (None if value is _MISSING else value) != cond:
+            return False
+    return True
+
+def project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if k not in projection}
+
+def _sort_key(value):
+    # Missing / None sort first like MongoDB; mixed types sort by type name
+    if value is _MISSING or value is None:
+        return (0, "", 0)
+    return (1, type(value).__name__, value)
+
+def _sorted(docs, spec):
+    for field, direction in reversed(spec):
+        docs = sorted(docs, key=lambda d: _sort_key(_get(d, field)), reverse=direction < 0)
+    return docs
+
+class Cursor:
+    def __init__(self, docs, projection=None):
+        self._docs = docs
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        self._sort = key if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, n):
+        self._skip = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def _results(self):
+        docs = _sorted(self._docs, self._sort) if self._sort else self._docs
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(0)
+        docs = self._results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        self._iter = iter(self._results())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+def _group_value(doc, expr):
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict):
+        return {k: _group_value(doc, v) for k, v in expr.items()}
+    return expr
+
+def _aggregate(docs, pipeline):
+    for stage in pipeline:
+        (op, arg), = stage.items()
+        if op == "$match":
+            docs = [d for d in docs if matches(d, arg)]
+        elif op == "$sort":
+            docs = _sorted(docs, list(arg.items()))
+        elif op == "$limit":
+            docs = docs[:arg]
+        elif op == "$skip":
+            docs = docs[arg:]
+        elif op == "$project":
+            docs = [project(d, arg) for d in docs]
+        elif op == "$group":
+            groups = {}
+            for d in docs:
+                key = _group_value(d, arg["_id"])
+                bucket_key = repr(key)
+                if bucket_key not in groups:
+                    groups[bucket_key] = {"_id": key, **{f: 0 for f in arg if f != "_id"}}
+                for field, acc in arg.items():
+                    if field == "_id":
+                        continue
+                    (acc_op, acc_expr), = acc.items()
+                    if acc_op != "$sum":
+                        raise NotImplementedError(f"Accumulator {acc_op} is not supported by the in-memory store")
+                    value = _group_value(d, acc_expr)
+                    groups[bucket_key][field] += value if isinstance(value, (int, float)) else 0
+            docs = list(groups.values())
+        else:
+            raise NotImplementedError(f"Aggregation stage {op} is not supported by the in-memory store")
+    return docs
+
+class Collection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+        self._lock = asyncio.Lock()
+
+    async def find_one(self, query=None, projection=None):
+        await asyncio.sleep(0)
+        for doc in self._docs:
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        return Cursor([d for d in self._docs if matches(d, query)], projection)
+
+    def aggregate(self, pipeline):
+        return Cursor(_aggregate(list(self._docs), pipeline))
+
+    async def count_documents(self, query=None):
+        await asyncio.sleep(0)
+        return sum(1 for d in self._docs if matches(d, query))
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        async with self._lock:
+            self._docs.append(_store(doc))
+        return InsertOneResult(doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        ids = []
+        async with self._lock:
+            for doc in docs:
+                doc.setdefault("_id", ObjectId())
+                self._docs.append(_store(doc))
+                ids.append(doc["_id"])
+        return InsertManyResult(ids)
+
+    @staticmethod
+    def _apply(doc, update, inserting=False):
+        for op, fields in update.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                for path, value in fields.items():
+                    _set(doc, path, _store(value))
+            elif op == "$inc":
+                for path, value in fields.items():
+                    current = _get(doc, path)
+                    _set(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$setOnInsert":
+                continue
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the in-memory store")
+
+    async def update_one(self, query, update, upsert=False):
+        async with self._lock:
+            for doc in self._docs:
+                if matches(doc, query):
+                    before = copy.deepcopy(doc)
+                    self._apply(doc, update)
+                    return UpdateResult(1, int(doc != before))
+            if not upsert:
+                return UpdateResult(0, 0)
+            doc = {k: _store(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            doc.setdefault("_id", ObjectId())
+            self._apply(doc, update, inserting=True)
+            self._docs.append(doc)
+            return UpdateResult(0, 0, doc["_id"])
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=False):
+        # return_document: False = ReturnDocument.BEFORE, True = ReturnDocument.AFTER
+        async with self._lock:
+            for doc in self._docs:
+                if matches(doc, query):
+                    before = project(doc, projection)
+                    self._apply(doc, update)
+                    return project(doc, projection) if return_document else before
+            if not upsert:
+                return None
+            doc = {k: _store(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            doc.setdefault("_id", ObjectId())
+            self._apply(doc, update, inserting=True)
+            self._docs.append(doc)
+            return project(doc, projection) if return_document else None
+
+    async def replace_one(self, query, replacement, upsert=False):
+        async with self._lock:
+            for i, doc in enumerate(self._docs):
+                if matches(doc, query):
+                    new = _store(replacement)
+                    new["_id"] = doc["_id"]
+                    self._docs[i] = new
+                    return UpdateResult(1, int(new != doc))
+            if not upsert:
+                return UpdateResult(0, 0)
+            doc = _store(replacement)
+            doc.setdefault("_id", query.get("_id", ObjectId()))
+            self._docs.append(doc)
+            return UpdateResult(0, 0, doc["_id"])
+
+    async def update_many(self, query, update, upsert=False):
+        async with self._lock:
+            matched = [d for d in self._docs if matches(d, query)]
+            for doc in matched:
+                self._apply(doc, update)
+            return UpdateResult(len(matched), len(matched))
+
+    async def delete_many(self, query):
+        async with self._lock:
+            keep = [d for d in self._docs if not matches(d, query)]
+            deleted = len(self._docs) - len(keep)
+            self._docs = keep
+        return DeleteResult(deleted)
+
+    async def delete_one(self, query):
+        async with self._lock:
+            for i, doc in enumerate(self._docs):
+                if matches(doc, query):
+                    del self._docs[i]
+                    return DeleteResult(1)
+        return DeleteResult(0)
+
+    async def create_index(self, keys, **kwargs):
+        return keys if isinstance(keys, str) else "_".join(f"{k}_{v}" for k, v in keys)
+
+class InMemoryDatabase:
+    """Attribute / item access to lazily created collections, like a Motor database."""
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = Collection(name)
+        return self._collections[name]
+
+    def stats(self):
+        return {name: len(c._docs) for name, c in self._collections.items()}
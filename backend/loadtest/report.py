@@ -0,0 +1,99 @@
+"""
+Latency histograms and per-stage reports for the load-test runner.
+"""
+import json
+import math
+from collections import Counter
+
+class Histogram:
+    """
+    Log-bucketed latency histogram (10 buckets per decade from 0.1 ms), so
+    percentiles stay within ~12% at any scale with fixed memory.
+    """
+    BUCKETS_PER_DECADE = 10
+    MIN_MS = 0.1
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _bucket(self, ms):
+        return max(0, int(math.log10(max(ms, self.MIN_MS) / self.MIN_MS) * self.BUCKETS_PER_DECADE))
+
+    def _upper(self, bucket):
+        return self.MIN_MS * 10 ** ((bucket + 1) / self.BUCKETS_PER_DECADE)
+
+    def record(self, ms):
+        self.counts[self._bucket(ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._upper(bucket), self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": {f"{self._upper(b):.3g}": n for b, n in sorted(self.counts.items())}
+        }
+
+class StageStats:
+    """Everything recorded while one concurrency level was running."""
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.latency = {}   # endpoint -> Histogram
+        self.statuses = {}  # endpoint -> Counter of status codes / exception names
+        self.scenarios = Counter()
+        self.notes = Counter()
+        self.elapsed = 0.0
+
+    def record(self, endpoint, ms, status):
+        self.latency.setdefault(endpoint, Histogram()).record(ms)
+        self.statuses.setdefault(endpoint, Counter())[str(status)] += 1
+
+    def summary(self):
+        requests = sum(h.count for h in self.latency.values())
+        return {
+            "concurrency": self.concurrency,
+            "elapsed_s": self.elapsed,
+            "requests": requests,
+            "requests_per_s": requests / self.elapsed if self.elapsed else 0.0,
+            "scenarios_per_s": {k: v / self.elapsed for k, v in self.scenarios.items()} if self.elapsed else {},
+            "endpoints": {
+                endpoint: {**hist.summary(), "statuses": dict(self.statuses[endpoint])}
+                for endpoint, hist in sorted(self.latency.items())
+            },
+            "notes": dict(self.notes)
+        }
+
+def print_stage(summary):
+    print(f"\n== concurrency {summary['concurrency']}: {summary['requests']} requests in {summary['elapsed_s']:.1f}s "
+          f"({summary['requests_per_s']:.1f} req/s)")
+    print(f"{'endpoint':<34}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}  statuses")
+    for endpoint, s in summary["endpoints"].items():
+        statuses = " ".join(f"{code}:{n}" for code, n in sorted(s["statuses"].items()))
+        print(f"{endpoint:<34}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}  {statuses}")
+    for note, n in summary["notes"].items():
+        print(f"⚠️  {note} x{n}")
+
+def write_report(path, environment, config, stages):
+    with open(path, "w") as f:
+        json.dump({"environment": environment, "config": config, "stages": stages}, f, indent=2)
+    print(f"\n✅ Report written to {path}")
@@ -0,0 +1,186 @@
+"""
+End-to-end load test: replays a weighted mix of user journeys against the
+FastAPI app with concurrency ramps and reports per-endpoint latency.
+
+    python backend/loadtest/run.py                                  # in-process, in-memory store
+    python backend/loadtest/run.py --mix login=1,pin=1 --ramp 1,8,32 --stage-seconds 20
+    python backend/loadtest/run.py --mongo-url mongodb://localhost:27017 --report load.json
+
+By default the app runs in this process (httpx ASGI transport) against the
+in-memory store, the stub Razorpay service and a local SMTP sink. To size
+uvicorn workers, run the server separately and point the runner at it:
+
+    LOADTEST_MONGO_URL=mongodb://localhost:27017 EMAIL_HOST=127.0.0.1 EMAIL_PORT=2525 \\
+    EMAIL_USE_SSL=false EMAIL_USER=load EMAIL_PASS=load \\
+        uvicorn backend.loadtest.app:app --workers 4 --port 8001
+    python backend/loadtest/run.py --url http://127.0.0.1:8001 --mongo-url mongodb://localhost:27017 --smtp-port 2525
+
+Needs httpx (pip install httpx). Scenarios: see backend/loadtest/scenarios.py.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+root_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_dir))
+
+# Token signing / template encryption need a key; never used for real data here
+os.environ.setdefault("SECRET_KEY", "loadtest-only-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+from backend.loadtest.stubs import SmtpSink
+from backend.loadtest.report import StageStats, print_stage, write_report
+
+DEFAULT_MIX = "login=3,verify=2,pin=1,otp=1,dashboard=3"
+MODEL_PATH = root_dir / "backend" / "app" / "biometric" / "hand_landmarker.task"
+
+def parse_mix(text, scenarios):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in scenarios:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(scenarios)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+class RunContext:
+    """Shared by all virtual users: timing hooks, samples and the SMTP sink."""
+    def __init__(self, hands, sink):
+        self.hands = hands
+        self.sink = sink
+        self.stage = None
+
+    async def request(self, client, method, path, **kwargs):
+        endpoint = f"{method} {path}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.stage.record(endpoint, (time.perf_counter() - start) * 1000, status)
+        if response is None:
+            # Scenario steps check status_code; a transport error ends the journey
+            return httpx.Response(599, request=httpx.Request(method, path))
+        return response
+
+    def note(self, message):
+        self.stage.notes[message] += 1
+
+async def virtual_user(client, ctx, users, names, weights, scenarios, deadline):
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        # Own the user for the whole journey (OTP flows must not interleave)
+        user = await users.get()
+        try:
+            await scenarios[name](client, user, ctx)
+            ctx.stage.scenarios[name] += 1
+        finally:
+            users.put_nowait(user)
+
+async def run_stages(client, ctx, users, mix, ramp, stage_seconds, scenarios):
+    pool = asyncio.Queue()
+    for user in users:
+        pool.put_nowait(user)
+    names, weights = list(mix), list(mix.values())
+
+    summaries = []
+    for concurrency in ramp:
+        if concurrency > len(users):
+            print(f"⚠️  concurrency {concurrency} > {len(users)} seeded users; virtual users will queue for accounts")
+        ctx.stage = StageStats(concurrency)
+        start = time.perf_counter()
+        deadline = start + stage_seconds
+        await asyncio.gather(*(virtual_user(client, ctx, pool, names, weights, scenarios, deadline) for _ in range(concurrency)))
+        ctx.stage.elapsed = time.perf_counter() - start
+        summary = ctx.stage.summary()
+        print_stage(summary)
+        summaries.append(summary)
+    return summaries
+
+@contextlib.asynccontextmanager
+async def in_process_client(lifespan_app):
+    transport = httpx.ASGITransport(app=lifespan_app, raise_app_exceptions=False)
+    async with lifespan_app.router.lifespan_context(lifespan_app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            yield client
+
+async def main_async(args):
+    # 1. Local SMTP sink; the app must read these before backend.app.utils.email is imported
+    sink = SmtpSink(port=args.smtp_port).start()
+    os.environ.update({
+        "EMAIL_HOST": sink.host, "EMAIL_PORT": str(sink.port), "EMAIL_USE_SSL": "false",
+        "EMAIL_USER": os.getenv("EMAIL_USER") or "loadtest", "EMAIL_PASS": os.getenv("EMAIL_PASS") or "loadtest",
+        "LOADTEST_RAZORPAY_MS": str(args.razorpay_ms),
+    })
+    if args.mongo_url and not args.url:
+        os.environ["LOADTEST_MONGO_URL"] = args.mongo_url
+    if not args.verbose:
+        # Failures show up in the status counts; per-request logs would swamp the stage tables
+        os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+    if not MODEL_PATH.exists():
+        print(f"⚠️  {MODEL_PATH.name} not found: verify / payment requests will fail in hand detection (500)")
+        os.environ["BIOMETRIC_WARMUP"] = "false"
+
+    from backend.loadtest import app as loadtest_app
+    from backend.loadtest.scenarios import SCENARIOS, HandSamples, seed
+    mix = parse_mix(args.mix, SCENARIOS)
+
+    # 2. Seed the store the server reads from
+    if args.url:
+        if not args.mongo_url:
+            raise SystemExit("--url needs --mongo-url (the server's LOADTEST_MONGO_URL) to seed users")
+        db = loadtest_app.connect(args.mongo_url)
+    else:
+        db = loadtest_app.db
+    hands = await HandSamples(args.hand_images).load()
+    users = await seed(db, args.users, hands)
+    print(f"Seeded {len(users)} users; mix {mix}; ramp {args.ramp}; {args.stage_seconds}s per stage")
+
+    # 3. Ramp
+    ctx = RunContext(hands, sink)
+    ramp = [int(c) for c in args.ramp.split(",")]
+    try:
+        if args.url:
+            async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+                stages = await run_stages(client, ctx, users, mix, ramp, args.stage_seconds, SCENARIOS)
+        else:
+            async with in_process_client(loadtest_app.app) as client:
+                stages = await run_stages(client, ctx, users, mix, ramp, args.stage_seconds, SCENARIOS)
+    finally:
+        sink.stop()
+
+    if args.report:
+        from backend.benchmarks.harness import environment
+        config = {"mix": mix, "ramp": ramp, "stage_seconds": args.stage_seconds, "users": args.users,
+                  "target": args.url or "in-process", "store": args.mongo_url or "memory",
+                  "razorpay_ms": args.razorpay_ms, "real_hands": bool(args.hand_images)}
+        write_report(args.report, environment(), config, stages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the payment API against local stand-ins")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--ramp", default="1,4,16,32", help="Comma-separated concurrency per stage")
+    parser.add_argument("--stage-seconds", type=float, default=30, help="Duration of each stage")
+    parser.add_argument("--users", type=int, default=200, help="Seeded accounts")
+    parser.add_argument("--hand-images", help="Folder of real palm photos (enrollment template + probes)")
+    parser.add_argument("--mongo-url", help="Use this mongod (database LOADTEST_DB) instead of the in-memory store")
+    parser.add_argument("--url", help="Target an already running server instead of the in-process app")
+    parser.add_argument("--smtp-port", type=int, default=0, help="SMTP sink port (fixed when the server runs separately)")
+    parser.add_argument("--razorpay-ms", type=float, default=0, help="Simulated Razorpay order latency")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout against --url")
+    parser.add_argument("--report", help="Write all stage summaries and histograms as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's logs (LOG_LEVEL from the environment)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Seeded users and the traffic scenarios replayed by the load-test runner.
+Each scenario is an async callable (client, user, ctx) that issues one
+user journey; every HTTP call goes through ctx.request so it is timed.
+"""
+import random
+from datetime import datetime
+from pathlib import Path
+from backend.app.utils.security import get_password_hash, encrypt_template
+from backend.app.biometric.template import CNN_STORAGE_DTYPE
+from backend.benchmarks import fixtures
+
+PASSWORD = "LoadTest#2024"
+PIN = "4321"
+EMAIL_DOMAIN = "loadtest.local"
+
+# Amount per tier (see create_secure_order): palm only / palm + PIN / palm + OTP
+PALM_AMOUNT = 500.0
+PIN_AMOUNT = 5000.0
+OTP_AMOUNT = 15000.0
+
+class LoadUser:
+    def __init__(self, index):
+        self.index = index
+        self.name = f"Load User {index}"
+        self.email = f"user{index}@{EMAIL_DOMAIN}"
+        self.token = None
+
+class HandSamples:
+    """
+    Enrollment template and probe uploads. Synthetic by default: the drawn
+    fixture hand is not a real palm, so verification requests exercise
+    decode + detection and are answered "Hand not detected". Pass a folder
+    of real palm photos to replay full matches.
+    """
+    def __init__(self, image_dir=None):
+        self.image_dir = image_dir
+        self.uploads = []
+        self.geo, self.cnn = None, None
+        self.hand_type, self.cnn_preprocess = "Right", "roi"
+
+    async def load(self):
+        if self.image_dir:
+            from backend.app.biometric.enrollment import run_enrollment
+            paths = sorted(p for p in Path(self.image_dir).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+            self.uploads = [p.read_bytes() for p in paths]
+            enrollment = await run_enrollment(self.uploads)
+            if enrollment.accepted == 0:
+                raise RuntimeError(f"No usable hand images in {self.image_dir}: {enrollment.rejections}")
+            self.geo, self.cnn = enrollment.feature_vectors, enrollment.cnn_vectors
+            self.hand_type, self.cnn_preprocess = enrollment.hand_types[0], enrollment.cnn_preprocess
+        else:
+            self.uploads = [fixtures.encoded(fixtures.hand_image(*fixtures.RESOLUTIONS["720p"], seed=fixtures.SEED + i)) for i in range(5)]
+            self.geo, self.cnn, _, _ = fixtures.template_vectors(5)
+        return self
+
+    def probe(self):
+        return random.choice(self.uploads)
+
+async def seed(db, count, hands):
+    """
+    Insert `count` users with a password, PIN and biometric template.
+    Written straight to the store (one bcrypt hash shared by all users) so
+    seeding doesn't dominate short runs.
+    """
+    # 1. Drop users (and their templates) left over from an earlier run
+    previous = await db.users.find({"email": {"$regex": f"@{EMAIL_DOMAIN}$"}}, {"_id": 1}).to_list(None)
+    if previous:
+        await db.biometrics.delete_many({"user_id": {"$in": [str(u["_id"]) for u in previous]}})
+        await db.users.delete_many({"_id": {"$in": [u["_id"] for u in previous]}})
+
+    # 2. Users and templates in two bulk inserts
+    password_hash, pin_hash = get_password_hash(PASSWORD), get_password_hash(PIN)
+    geo_token, cnn_token = encrypt_template(hands.geo), encrypt_template(hands.cnn, CNN_STORAGE_DTYPE)
+    now = datetime.utcnow()
+
+    users = [LoadUser(i) for i in range(count)]
+    result = await db.users.insert_many([{
+        "name": u.name,
+        "email": u.email,
+        "password_hash": password_hash,
+        "hashed_pin": pin_hash,
+        "created_at": now
+    } for u in users])
+    await db.biometrics.insert_many([{
+        "user_id": str(user_id),
+        "feature_vectors": geo_token,
+        "cnn_features": cnn_token,
+        "hand_type": hands.hand_type,
+        "cnn_preprocess": hands.cnn_preprocess,
+        "created_at": now,
+        "updated_at": now
+    } for user_id in result.inserted_ids])
+    return users
+
+def _auth(user):
+    return {"Authorization": f"Bearer {user.token}"}
+
+def _order_form(amount):
+    return {
+        "amount": str(amount),
+        "recipient_name": "Load Recipient",
+        "account_number": "123456789012",
+        "ifsc_code": "LOAD0000001",
+        "bank_name": "Load Bank"
+    }
+
+async def ensure_token(client, user, ctx):
+    if user.token is None:
+        await login(client, user, ctx)
+    return user.token is not None
+
+async def login(client, user, ctx):
+    response = await ctx.request(client, "POST", "/auth/login", data={"username": user.email, "password": PASSWORD})
+    if response.status_code == 200:
+        user.token = response.json()["access_token"]
+
+async def verify(client, user, ctx):
+    if not await ensure_token(client, user, ctx):
+        return
+    await ctx.request(client, "POST", "/biometric/verify-hand", headers=_auth(user),
+                      files={"image": ("palm.jpg", ctx.hands.probe(), "image/jpeg")})
+
+async def palm_payment(client, user, ctx):
+    if not await ensure_token(client, user, ctx):
+        return
+    await ctx.request(client, "POST", "/payment/create-order", headers=_auth(user), data=_order_form(PALM_AMOUNT),
+                      files={"image": ("palm.jpg", ctx.hands.probe(), "image/jpeg")})
+
+async def pin(client, user, ctx):
+    if not await ensure_token(client, user, ctx):
+        return
+    await ctx.request(client, "POST", "/payment/verify-pin", headers=_auth(user), json={"pin": PIN, "amount": PIN_AMOUNT})
+
+async def otp(client, user, ctx):
+    """create-order over the OTP threshold, read the mail from the sink, verify-otp, create-order again."""
+    if not await ensure_token(client, user, ctx):
+        return
+    order = lambda: ctx.request(client, "POST", "/payment/create-order", headers=_auth(user), data=_order_form(OTP_AMOUNT),
+                                files={"image": ("palm.jpg", ctx.hands.probe(), "image/jpeg")})
+    response = await order()
+    if response.status_code != 200 or not response.json().get("otp_required"):
+        return
+    code = ctx.sink.latest_otp(user.email)
+    if code is None:
+        ctx.note("otp mail not received")
+        return
+    response = await ctx.request(client, "POST", "/payment/verify-otp", headers=_auth(user), json={"otp": code, "amount": OTP_AMOUNT})
+    if response.status_code == 200:
+        await order()
+
+async def dashboard(client, user, ctx):
+    if not await ensure_token(client, user, ctx):
+        return
+    for path in ("/dashboard/metrics", "/dashboard/activity-feed", "/dashboard/payments", "/dashboard/biometric-stats"):
+        await ctx.request(client, "GET", path, headers=_auth(user))
+
+async def register(client, user, ctx):
+    """Fresh secure-register with the sample uploads (a new account per call)."""
+    email = f"new{random.getrandbits(48):012x}@{EMAIL_DOMAIN}"
+    files = [("images", (f"palm{i}.jpg", data, "image/jpeg")) for i, data in enumerate(ctx.hands.uploads[:5])]
+    await ctx.request(client, "POST", "/auth/secure-register", files=files,
+                      data={"name": "Load Register", "email": email, "password": PASSWORD, "pin": PIN})
+
+SCENARIOS = {
+    "login": login,
+    "verify": verify,
+    "palm": palm_payment,
+    "pin": pin,
+    "otp": otp,
+    "dashboard": dashboard,
+    "register": register,
+}
@@ -0,0 +1,143 @@
+"""
+Local stand-ins for Razorpay and Gmail SMTP used by the load-test harness.
+"""
+import base64
+import re
+import socketserver
+import threading
+import time
+import uuid
+
+class StubRazorpayService:
+    """
+    Drop-in for RazorpayService: same method signatures, no network.
+    create_order can simulate the gateway's round trip with `latency_ms`.
+    """
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.orders = 0
+
+    def create_order(self, amount, currency="INR"):
+        if self.latency:
+            time.sleep(self.latency)
+        self.orders += 1
+        return {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "amount": int(amount * 100),
+            "currency": currency,
+            "status": "created"
+        }
+
+    def verify_payment(self, payment_id, order_id, signature):
+        return True
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib: EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.reply("220 loadtest-smtp ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-loadtest-smtp")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "HELO":
+                self.reply("250 loadtest-smtp")
+            elif verb == "AUTH":
+                parts = command.split()
+                if len(parts) >= 2 and parts[1].upper() == "LOGIN":
+                    # Username / password prompts ("Username:" / "Password:" base64)
+                    if len(parts) == 2:
+                        self.reply("334 " + base64.b64encode(b"Username:").decode())
+                        self.rfile.readline()
+                    self.reply("334 " + base64.b64encode(b"Password:").decode())
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                match = re.search(r"<([^>]*)>", command)
+                recipients.append(match.group(1) if match else command)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    body.append(data.decode(errors="replace"))
+                self.server.sink.deliver(recipients, "".join(body))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class _ThreadedServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SmtpSink:
+    """
+    Plain-text SMTP server on localhost that keeps every delivered message.
+    Use with EMAIL_HOST=127.0.0.1, EMAIL_PORT=<sink.port>, EMAIL_USE_SSL=false.
+    """
+    OTP_PATTERN = re.compile(r"OTP is:\s*(\d{6})")
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = _ThreadedServer((host, port), _SmtpHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self.messages = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def deliver(self, recipients, body):
+        with self._lock:
+            for rcpt in recipients:
+                self.messages.append((rcpt, body))
+
+    def latest_otp(self, email):
+        """Most recent OTP mailed to `email`, or None."""
+        with self._lock:
+            for rcpt, body in reversed(self.messages):
+                if rcpt == email:
+                    # Bodies may be quoted-printable / base64 encoded by EmailMessage
+                    match = self.OTP_PATTERN.search(_decode_body(body))
+                    if match:
+                        return match.group(1)
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def _decode_body(raw):
+    # EmailMessage sends non-ASCII (the ₹ sign) bodies base64 encoded
+    headers, _, body = raw.partition("\r\n\r\n") if "\r\n\r\n" in raw else raw.partition("\n\n")
+    if "base64" in headers.lower():
+        try:
+            return base64.b64decode("".join(body.split())).decode(errors="replace")
+        except ValueError:
+            return raw
+    if "quoted-printable" in headers.lower():
+        import quopri
+        return quopri.decodestring(body.encode()).decode(errors="replace")
+    return raw
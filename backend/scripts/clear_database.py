@@ -32,7 +32,7 @@ async def clear_database():
         db = client.hand_biometrics_db
         
         # Define collections to clear
-        collections = ['users', 'biometrics', 'verification_logs']
+        collections = ['users', 'biometrics', 'verification_logs', 'stats_rollups']
         
         for coll in collections:
             count = await db[coll].count_documents({})
@@ -0,0 +1,90 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+root_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_dir))
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+from backend.app.biometric.feature_extractor import FeatureExtractor
+from backend.app.biometric.cnn_backend import EagerRunner, load_runner, model_path, parity_report
+
+def export_torchscript(model, example):
+    path = model_path("torchscript")
+    traced = torch.jit.trace(model, example)
+    frozen = torch.jit.freeze(traced.eval())
+    frozen.save(path)
+    print(f"✅ TorchScript graph written to {path}")
+
+def export_onnx(model, example, int8=False):
+    path = model_path("onnx")
+    torch.onnx.export(
+        model, example, path,
+        input_names=["input"], output_names=["embedding"],
+        dynamic_axes={"input": {0: "batch"}, "embedding": {0: "batch"}},
+        opset_version=17, dynamo=False
+    )
+    print(f"✅ ONNX graph written to {path}")
+
+    if int8:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = model_path("onnx", "int8")
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✅ Dynamically quantized int8 graph written to {int8_path}")
+
+def load_samples(image_dir, count):
+    """Preprocessed parity batch: palm photos from image_dir, or seeded noise."""
+    preprocess = FeatureExtractor.build_preprocess()
+    images = []
+    if image_dir:
+        for p in sorted(Path(image_dir).glob("*"))[:count]:
+            img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+            if img is not None:
+                images.append(img)
+    rng = np.random.default_rng(0)
+    while len(images) < count:
+        images.append(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+    return torch.stack([preprocess(Image.fromarray(img)) for img in images])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the MobileNetV2 embedding model and check parity against eager PyTorch.")
+    parser.add_argument("--backends", nargs="+", default=["torchscript", "onnx"], choices=["torchscript", "onnx"])
+    parser.add_argument("--int8", action="store_true", help="Also write a dynamically quantized int8 ONNX graph")
+    parser.add_argument("--check-only", action="store_true", help="Skip export, only report parity of existing graphs")
+    parser.add_argument("--images", help="Directory of sample hand photos for the parity check")
+    parser.add_argument("--samples", type=int, default=16)
+    parser.add_argument("--random-weights", action="store_true", help="Offline smoke test only; never deploy these graphs")
+    args = parser.parse_args()
+
+    model = FeatureExtractor.build_model(pretrained=not args.random_weights)
+    example = torch.zeros(1, 3, 224, 224)
+    batch = load_samples(args.images, args.samples)
+
+    if args.random_weights:
+        # Untrained BatchNorm stats collapse activations to ~1e-9; calibrate
+        # them on the sample batch so the parity numbers stay meaningful.
+        with torch.no_grad():
+            model.train()
+            model(batch)
+        model.eval()
+
+    if not args.check_only:
+        if "torchscript" in args.backends:
+            export_torchscript(model, example)
+        if "onnx" in args.backends:
+            export_onnx(model, example, int8=args.int8)
+
+    # Parity: cosine drift of every exported graph against the eager embeddings
+    reference = EagerRunner(model)
+    variants = [(b, "") for b in args.backends]
+    if "onnx" in args.backends and args.int8:
+        variants.append(("onnx", "int8"))
+
+    for backend, quantize in variants:
+        report = parity_report(reference, load_runner(backend, quantize), batch)
+        label = backend + (f"/{quantize}" if quantize else "")
+        print(f"{label:<16} mean cos {report['mean_cosine']:.6f} | min cos {report['min_cosine']:.6f} | max drift {report['max_drift']:.2e}")
@@ -0,0 +1,38 @@
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add project root to path
+root_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_dir))
+
+load_dotenv(root_dir / ".env")
+
+from backend.app.utils import rollups
+
+async def rebuild_rollups():
+    """
+    Recompute the dashboard / admin statistics (stats_rollups) from the raw
+    collections. Run after importing or deleting data outside the API.
+    """
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL"))
+    db = client.hand_biometrics_db
+
+    print(f"Rebuilding stats rollups in '{db.name}'...")
+    written = await rollups.rebuild(db)
+    totals = await db[rollups.COLLECTION].find_one({"_id": rollups.TOTALS_ID})
+
+    print(f"✅ Wrote {written} rollup documents")
+    print(f"   Users: {rollups.counter(totals, 'users')}")
+    print(f"   Payments: {rollups.counter(totals, 'payments.total')} "
+          f"(completed {rollups.counter(totals, 'payments.completed')}, failed {rollups.counter(totals, 'payments.failed')})")
+    print(f"   Biometric auth: {rollups.counter(totals, 'biometric.VERIFIED')} verified, "
+          f"{rollups.counter(totals, 'biometric.REJECTED')} rejected")
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(rebuild_rollups())
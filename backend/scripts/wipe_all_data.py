@@ -35,7 +35,8 @@ async def wipe_all_data():
             'audit_trail', 
             'otps', 
             'payments', 
-            'pin_verifications'
+            'pin_verifications',
+            'stats_rollups'
         ]
         
         for coll in collections:
@@ -0,0 +1,6 @@
+import os
+
+# Modules read their configuration from the environment at import time
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("BIOMETRIC_WARMUP", "false")
@@ -0,0 +1,36 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from backend.app.auth import utils
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(utils, "METRICS_TOKEN", "scrape-token")
+    monkeypatch.setattr(utils, "TERMINAL_API_KEY", "terminal-key")
+    app = FastAPI()
+
+    @app.get("/metrics")
+    async def metrics(scraper = Depends(utils.verify_metrics_token)):
+        return {"ok": True}
+
+    @app.get("/terminal")
+    async def terminal(terminal = Depends(utils.verify_terminal_key)):
+        return {"ok": True}
+
+    return TestClient(app)
+
+def test_metrics_token(client):
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics").status_code == 401
+
+def test_non_ascii_credentials_are_rejected(client):
+    # Header bytes outside ASCII arrive as latin-1 decoded str
+    bearer = "Bearer sçrape-tökén".encode("latin-1")
+    assert client.get("/metrics", headers={"Authorization": bearer}).status_code == 401
+    assert client.get("/terminal", headers={"X-Terminal-Key": "términal".encode("latin-1")}).status_code == 401
+    assert client.get("/terminal", headers={"X-Terminal-Key": "terminal-key"}).status_code == 200
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(utils, "METRICS_TOKEN", None)
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 404
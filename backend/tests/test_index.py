@@ -0,0 +1,45 @@
+import numpy as np
+from backend.app.biometric import index
+from backend.app.biometric.index import Partition, train_ivf
+
+def unit_rows(rng, n, dim=16):
+    rows = rng.normal(size=(n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+def test_install_reassigns_rows_written_during_training(monkeypatch):
+    monkeypatch.setattr(index, "IDENTIFY_IVF_MIN_SIZE", 100)
+    rng = np.random.default_rng(3)
+    partition = Partition(16)
+    for i, vector in enumerate(unit_rows(rng, 400)):
+        partition.upsert(f"u{i}", vector)
+    assert partition.training_due()
+
+    vectors = partition.snapshot()
+    assert not partition.training_due()
+    # Writes racing the off-loop training: removals swap rows, upserts append / overwrite
+    for i in range(0, 120, 3):
+        partition.remove(f"u{i}")
+    for i, vector in enumerate(unit_rows(rng, 60)):
+        partition.upsert(f"u{400 + i}", vector)
+    partition.upsert("u5", unit_rows(rng, 1)[0])
+
+    centroids, assignments = train_ivf(vectors)
+    partition.install(centroids, assignments)
+
+    assert partition.trained_size == 400
+    assert len(partition.assignments) == len(partition)
+    np.testing.assert_array_equal(partition.assignments, np.argmax(partition.vectors @ centroids.T, axis=1))
+    for row in (0, 50, len(partition) - 1):
+        assert partition.search(partition.vectors[row], 1)[0][0] == partition.user_ids[row]
+
+def test_small_partition_drops_ivf(monkeypatch):
+    monkeypatch.setattr(index, "IDENTIFY_IVF_MIN_SIZE", 100)
+    rng = np.random.default_rng(4)
+    partition = Partition(16)
+    for i, vector in enumerate(unit_rows(rng, 150)):
+        partition.upsert(f"u{i}", vector)
+    partition.install(*train_ivf(partition.snapshot()))
+    for i in range(100):
+        partition.remove(f"u{i}")
+    assert not partition.training_due()
+    assert partition.centroids is None and partition.assignments is None
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+from backend.app.biometric.quality import QualityAnalyzer, QUALITY_BLUR_THRESHOLD
+
+# Threshold of the full-frame CV_64F Laplacian variance the proxy gate replaced
+LEGACY_BLUR_THRESHOLD = 20
+
+def legacy_blur(img):
+    return cv2.Laplacian(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+
+def natural_frame(seed=7):
+    """640x480 frame with the 1/f amplitude spectrum of natural images."""
+    rng = np.random.default_rng(seed)
+    fy = np.fft.fftfreq(480)[:, None]
+    fx = np.fft.rfftfreq(640)[None, :]
+    f = np.sqrt(fx ** 2 + fy ** 2)
+    f[0, 0] = 1
+    spectrum = (rng.normal(size=f.shape) + 1j * rng.normal(size=f.shape)) / f
+    spectrum[0, 0] = 0
+    field = np.fft.irfft2(spectrum, s=(480, 640))
+    gray = np.clip(128 + 50 * field / field.std(), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def test_blur_gate_matches_legacy_gate():
+    analyzer = QualityAnalyzer()
+    base = natural_frame()
+    compared = 0
+    for sigma in np.arange(0.3, 4.0, 0.1):
+        frame = cv2.GaussianBlur(base, (0, 0), sigma)
+        legacy = legacy_blur(frame)
+        # Frames within 15% of the legacy threshold may fall either way
+        if abs(legacy - LEGACY_BLUR_THRESHOLD) < 0.15 * LEGACY_BLUR_THRESHOLD:
+            continue
+        compared += 1
+        assert (legacy < LEGACY_BLUR_THRESHOLD) == (analyzer.analyze(frame).blur < QUALITY_BLUR_THRESHOLD), sigma
+    assert compared > 20
+
+def test_blur_gate_rejects_legacy_threshold_frame():
+    # The frame the legacy gate barely accepted must not clear the new gate by a wide margin
+    analyzer = QualityAnalyzer()
+    base = natural_frame()
+    sigmas = np.arange(0.3, 4.0, 0.02)
+    legacy = np.array([legacy_blur(cv2.GaussianBlur(base, (0, 0), s)) for s in sigmas])
+    sigma = sigmas[np.argmin(np.abs(legacy - LEGACY_BLUR_THRESHOLD))]
+    blur = analyzer.analyze(cv2.GaussianBlur(base, (0, 0), sigma)).blur
+    assert 0.75 * QUALITY_BLUR_THRESHOLD < blur < 1.25 * QUALITY_BLUR_THRESHOLD
@@ -0,0 +1,25 @@
+import json
+import numpy as np
+from backend.app.biometric.template import CompiledTemplate
+from backend.app.utils import security
+
+def legacy_token(matrix):
+    # Pre-envelope format: Fernet-encrypted JSON list of float64 rows
+    return security._cipher_suite.encrypt(json.dumps(matrix.tolist()).encode()).decode()
+
+def test_migrated_template_matches_stored_record():
+    rng = np.random.default_rng(5)
+    record = {
+        "_id": "b1",
+        "user_id": "u1",
+        "hand_type": "Right",
+        "feature_vectors": legacy_token(rng.normal(size=(5, 24))),
+        "cnn_features": legacy_token(rng.normal(size=(5, 1280)) * 3.1),
+    }
+    upgrades = {}
+    migrated = CompiledTemplate.from_record(record, upgrades)
+    assert set(upgrades) == {"feature_vectors", "cnn_features"}
+
+    reloaded = CompiledTemplate.from_record({**record, **upgrades}, {})
+    for field in ("geo_unit", "mean", "centroid_unit", "std", "cnn_unit"):
+        np.testing.assert_array_equal(getattr(migrated, field), getattr(reloaded, field))
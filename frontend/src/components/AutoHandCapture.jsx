@@ -5,10 +5,14 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { Hands } from '@mediapipe/hands';
 import * as drawingUtils from '@mediapipe/drawing_utils';
 import { Camera as MediaPipeCamera } from '@mediapipe/camera_utils';
+import { biometricService } from '../services/api';
 
 const STABILITY_THRESHOLD = 0.005; // Maximum average movement allowed between frames
 const CAPTURE_INTERVAL = 900; // ms between captures
-const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand Capture", autoStart = false }) => {
+// streamVerify: stream frames to /biometric/stream for live server feedback and
+// hand over the frame the server decided on (single-frame verification only).
+// Falls back to the stable-frame capture below if the stream is unavailable.
+const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand Capture", autoStart = false, streamVerify = false }) => {
     const webcamRef = useRef(null);
     const canvasRef = useRef(null);
     const handsRef = useRef(null);
@@ -28,6 +32,12 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
     const lastCaptureTime = useRef(0);
     const captureStream = useRef([]);
 
+    // Verification stream refs
+    const streamRef = useRef(null);
+    const frameInFlight = useRef(false);
+    const lastFrame = useRef(null);
+    const [streamMessage, setStreamMessage] = useState(null);
+
     // Initialize MediaPipe Hands
     useEffect(() => {
         const hands = new Hands({
@@ -48,6 +58,7 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
         setIsModelLoading(false);
 
         return () => {
+            closeStream();
             if (cameraRef.current) cameraRef.current.stop();
             if (handsRef.current) handsRef.current.close();
         };
@@ -99,9 +110,13 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
             stable = movement < STABILITY_THRESHOLD;
             lastLandmarks.current = landmarks;
 
-            // Auto-capture logic
+            // Auto-capture logic (streaming: one frame in flight at a time, the server paces the rest)
             const now = Date.now();
-            if (isCapturingRef.current && stable && (now - lastCaptureTime.current > CAPTURE_INTERVAL) && captureStream.current.length < requiredCount) {
+            if (streamRef.current) {
+                if (isCapturingRef.current && streamRef.current.readyState === WebSocket.OPEN && !frameInFlight.current) {
+                    sendFrame();
+                }
+            } else if (isCapturingRef.current && stable && (now - lastCaptureTime.current > CAPTURE_INTERVAL) && captureStream.current.length < requiredCount) {
                 console.log("📸 Automated Capture Triggered:", captureStream.current.length + 1);
                 const imageSrc = webcamRef.current.getScreenshot();
                 if (imageSrc) {
@@ -124,6 +139,67 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
         canvasCtx.restore();
     }, []);
 
+    const sendFrame = () => {
+        const imageSrc = webcamRef.current.getScreenshot();
+        if (!imageSrc) return;
+        frameInFlight.current = true;
+        lastFrame.current = imageSrc;
+        // Binary message: the JPEG bytes of the screenshot
+        fetch(imageSrc)
+            .then((res) => res.blob())
+            .then((blob) => streamRef.current?.send(blob))
+            .catch(() => { frameInFlight.current = false; });
+    };
+
+    const closeStream = () => {
+        const socket = streamRef.current;
+        streamRef.current = null;
+        frameInFlight.current = false;
+        if (socket && socket.readyState <= WebSocket.OPEN) socket.close();
+    };
+
+    const openStream = () => {
+        let socket;
+        try {
+            socket = biometricService.openVerifyStream();
+        } catch (err) {
+            console.warn("Verification stream unavailable, capturing frames instead", err);
+            return;
+        }
+        streamRef.current = socket;
+
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            frameInFlight.current = false;
+            if (message.type === 'result' && !lastFrame.current) {
+                // Timed out before any frame was sent
+                fallBackToCapture(message.message);
+            } else if (message.type === 'result') {
+                // The decision is final; the caller's request re-verifies the decisive frame
+                closeStream();
+                setStreamMessage(message.message);
+                captureStream.current = [lastFrame.current];
+                setCapturedImages([...captureStream.current]);
+                setProgress(requiredCount);
+                finishCapture();
+            } else if (message.type === 'error') {
+                fallBackToCapture(message.message);
+            } else {
+                setStreamMessage(message.message);
+            }
+        };
+        // Refused (server busy), dropped or failed before a decision
+        socket.onclose = () => {
+            if (streamRef.current === socket) fallBackToCapture();
+        };
+    };
+
+    const fallBackToCapture = (reason) => {
+        console.warn("Verification stream ended early, capturing frames instead", reason || '');
+        closeStream();
+        setStreamMessage(null);
+    };
+
     const startCapture = () => {
         if (!webcamRef.current?.video) return;
 
@@ -132,6 +208,9 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
         setCapturedImages([]);
         captureStream.current = [];
         setProgress(0);
+        setStreamMessage(null);
+        lastFrame.current = null;
+        if (streamVerify) openStream();
 
         if (!cameraRef.current) {
             cameraRef.current = new MediaPipeCamera(webcamRef.current.video, {
@@ -148,6 +227,7 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
     const finishCapture = () => {
         setIsCapturing(false);
         isCapturingRef.current = false;
+        closeStream();
         if (cameraRef.current) {
             cameraRef.current.stop();
             cameraRef.current = null;
@@ -203,6 +283,9 @@ const AutoHandCapture = ({ onCapture, requiredCount = 5, title = "Automatic Hand
 
                     {/* Progress Bar */}
                     <div className="w-full max-w-xs space-y-3">
+                        {streamMessage && (
+                            <p className="text-center text-sm font-semibold text-white drop-shadow">{streamMessage}</p>
+                        )}
                         <div className="flex justify-between text-xs font-bold text-white/70 uppercase tracking-widest">
                             <span>Capturing Progress</span>
                             <span>{progress} / {requiredCount}</span>
@@ -386,6 +386,7 @@ const PaymentModal = ({ isOpen, onClose, amount: initialAmount, onSuccess }) =>
                                 <AutoHandCapture
                                     requiredCount={1}
                                     autoStart={true}
+                                    streamVerify={true}
                                     onCapture={handleCaptureComplete}
                                     title="Scanning Neural Handprint"
                                 />
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import {
     ShieldCheck, AlertTriangle, Activity, Users, FileText,
@@ -11,6 +11,10 @@ import { adminService } from '../services/api';
 import Loader from '../components/Loader';
 import { containerVariants, itemVariants } from '../animations/motionVariants';
 
+// Poll interval while the live feed is down, and the refresh of logs / users while it is up
+const POLL_MS = 30000;
+const LIVE_REFRESH_MS = 60000;
+
 const AdminDashboard = () => {
     const navigate = useNavigate();
     const [activeTab, setActiveTab] = useState('overview'); // overview, users, transactions, alerts
@@ -21,6 +25,7 @@ const AdminDashboard = () => {
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('');
     const [adminUser, setAdminUser] = useState(null);
+    const liveRef = useRef(false);
 
     const fetchData = async () => {
         setLoading(true);
@@ -57,8 +62,26 @@ const AdminDashboard = () => {
         }
 
         fetchData();
-        const interval = setInterval(fetchData, 30000);
-        return () => clearInterval(interval);
+        const closeLive = adminService.openLive({
+            onMessage: (message) => {
+                if (message.type === 'stats') setStats(message.data);
+                else if (message.type === 'alert') setAlerts((prev) => [message.item, ...prev].slice(0, 20));
+            },
+            onResync: fetchData,
+            onStatus: (connected) => { liveRef.current = connected; },
+        });
+        // Polling fallback while the live feed is unavailable
+        let lastFetch = Date.now();
+        const interval = setInterval(() => {
+            if (!liveRef.current || Date.now() - lastFetch >= LIVE_REFRESH_MS) {
+                lastFetch = Date.now();
+                fetchData();
+            }
+        }, POLL_MS);
+        return () => {
+            clearInterval(interval);
+            closeLive();
+        };
     }, [filter, navigate]);
 
     const MetricCard = ({ title, value, icon: Icon, color, subtext }) => (
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion, AnimatePresence } from 'framer-motion';
 import {
@@ -11,6 +11,19 @@ import PaymentModal from '../components/PaymentModal';
 import { dashboardService } from '../services/api';
 import { containerVariants, itemVariants } from '../animations/motionVariants';
 
+// Poll interval while the live feed is down, and the safety-net refresh while it is up
+const POLL_MS = 5000;
+const LIVE_REFRESH_MS = 60000;
+
+// Replace the entry with the same id in place, or put a new one on top
+const upsertById = (list, item, limit) => {
+    const index = list.findIndex((entry) => entry.id === item.id);
+    if (index === -1) return [item, ...list].slice(0, limit);
+    const next = [...list];
+    next[index] = item;
+    return next;
+};
+
 const Dashboard = () => {
     const [user, setUser] = useState(null);
     const [showPaymentModal, setShowPaymentModal] = useState(false);
@@ -22,6 +35,7 @@ const Dashboard = () => {
     const [isLoading, setIsLoading] = useState(true);
     const [lastUpdated, setLastUpdated] = useState(new Date());
     const [customAmount, setCustomAmount] = useState('');
+    const liveRef = useRef(false);
 
     const fetchData = useCallback(async (isInitial = false) => {
         if (isInitial) setIsLoading(true);
@@ -44,6 +58,20 @@ const Dashboard = () => {
         }
     }, []);
 
+    const applyLiveMessage = useCallback((message) => {
+        if (message.type === 'metrics') {
+            setMetrics(message.metrics);
+            setStats(message.biometric_stats);
+        } else if (message.type === 'activity') {
+            setActivities((prev) => upsertById(prev, message.item, 15));
+        } else if (message.type === 'payment') {
+            setPayments((prev) => upsertById(prev, message.item, 20));
+        } else {
+            return;
+        }
+        setLastUpdated(new Date());
+    }, []);
+
     const navigate = useNavigate();
 
     useEffect(() => {
@@ -58,9 +86,24 @@ const Dashboard = () => {
         }
 
         fetchData(true);
-        const interval = setInterval(() => fetchData(), 5000);
-        return () => clearInterval(interval);
-    }, [fetchData, navigate]);
+        const closeLive = dashboardService.openLive({
+            onMessage: applyLiveMessage,
+            onResync: () => fetchData(),
+            onStatus: (connected) => { liveRef.current = connected; },
+        });
+        // Polling fallback while the live feed is unavailable
+        let lastFetch = Date.now();
+        const interval = setInterval(() => {
+            if (!liveRef.current || Date.now() - lastFetch >= LIVE_REFRESH_MS) {
+                lastFetch = Date.now();
+                fetchData();
+            }
+        }, POLL_MS);
+        return () => {
+            clearInterval(interval);
+            closeLive();
+        };
+    }, [fetchData, applyLiveMessage, navigate]);
 
     const handlePayClick = (amount) => {
         setSelectedAmount(amount);
@@ -48,7 +48,12 @@ const UpdateBiometrics = () => {
             setTimeout(() => navigate('/dashboard'), 2000);
         } catch (err) {
             console.error("Biometric Update Error:", err);
-            setError(err.response?.data?.detail || "Update failed. Please ensure hand is clear and try again.");
+            const detail = err.response?.data?.detail;
+            if (detail && typeof detail === 'object') {
+                setError(detail.message || JSON.stringify(detail));
+            } else {
+                setError(detail || "Update failed. Please ensure hand is clear and try again.");
+            }
         } finally {
             setLoading(false);
         }
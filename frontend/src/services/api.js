@@ -12,6 +12,48 @@ api.interceptors.request.use((config) => {
     return config;
 });
 
+// Live dashboard feed over a WebSocket (the JWT goes in ?token=), reconnecting
+// with backoff. onResync fires when the server asks for a full refetch and after
+// every reconnect; onStatus(connected) reports the connection state.
+// Returns a function that closes the feed for good.
+const openLiveFeed = (path, { onMessage, onResync, onStatus }) => {
+    const wsBase = api.defaults.baseURL.replace(/^http/, 'ws');
+    let socket = null;
+    let retry = null;
+    let delay = 1000;
+    let opened = false;
+    let closed = false;
+
+    const connect = () => {
+        const token = localStorage.getItem('token');
+        socket = new WebSocket(`${wsBase}${path}?token=${encodeURIComponent(token)}`);
+        socket.onopen = () => {
+            delay = 1000;
+            onStatus?.(true);
+            if (opened) onResync?.();
+            opened = true;
+        };
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'resync') onResync?.();
+            else onMessage(message);
+        };
+        socket.onclose = () => {
+            onStatus?.(false);
+            if (closed) return;
+            retry = setTimeout(connect, delay);
+            delay = Math.min(delay * 2, 30000);
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        clearTimeout(retry);
+        socket?.close();
+    };
+};
+
 export const authService = {
     register: (userData) => api.post('/auth/register', userData),
     login: (credentials) => api.post('/auth/login', new URLSearchParams(credentials)),
@@ -28,6 +70,12 @@ export const biometricService = {
     verifyHand: (formData) => api.post('/biometric/verify-hand', formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
     }),
+    // Streaming verification: send JPEG frames as binary messages, one per reply
+    openVerifyStream: () => {
+        const token = localStorage.getItem('token');
+        const wsBase = api.defaults.baseURL.replace(/^http/, 'ws');
+        return new WebSocket(`${wsBase}/biometric/stream?token=${encodeURIComponent(token)}`);
+    },
 };
 
 export const paymentService = {
@@ -44,6 +92,8 @@ export const dashboardService = {
     getActivity: () => api.get('/dashboard/activity-feed'),
     getPayments: () => api.get('/dashboard/payments'),
     getBiometricStats: () => api.get('/dashboard/biometric-stats'),
+    // Pushes activity, payment and metrics messages
+    openLive: (handlers) => openLiveFeed('/dashboard/live', handlers),
 };
 
 export const adminService = {
@@ -52,6 +102,8 @@ export const adminService = {
     getHealth: () => api.get('/admin/health'),
     getUsers: () => api.get('/admin/users'),
     getAlerts: () => api.get('/admin/alerts'),
+    // Pushes stats and alert messages
+    openLive: (handlers) => openLiveFeed('/admin/live', handlers),
 };
 
 export default api;
@@ -8,6 +8,7 @@ sys.path.append(os.getcwd())
 
 from backend.app.database.mongo import db
 from backend.app.utils.security import get_password_hash
+from backend.app.utils import rollups
 
 async def seed_admin():
     print("🚀 Seeding Default Admin User...")
@@ -33,6 +34,8 @@ async def seed_admin():
             "created_at": datetime.utcnow()
         }
         await db.users.insert_one(admin_user)
+        # Same rollup hook as /auth/register, so dashboard user counts include the admin
+        await rollups.record_user(db, admin_user["created_at"])
         print(f"✅ Created Default Admin: {admin_email}")
 
     print("\n--- ADMIN CREDENTIALS ---")